@@ -0,0 +1,108 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import date
+
+# =======================
+# API Cache Configuration
+# =======================
+API_CACHE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "api_cache.sqlite")
+# Jak długo (w sekundach) odpowiedź Custom Search uznajemy za aktualną
+API_CACHE_TTL = 3 * 24 * 3600
+
+
+class ApiResponseCache:
+    """Stores Custom Search responses keyed by (query, gl, hl, start) and counts hits vs billed calls."""
+
+    def __init__(self, path=API_CACHE_FILE, ttl=API_CACHE_TTL):
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " query TEXT NOT NULL, gl TEXT NOT NULL, hl TEXT NOT NULL, start INTEGER NOT NULL,"
+            " response TEXT NOT NULL, fetched_at REAL NOT NULL,"
+            " PRIMARY KEY (query, gl, hl, start));"
+            "CREATE TABLE IF NOT EXISTS stats ("
+            " day TEXT PRIMARY KEY, hits INTEGER NOT NULL DEFAULT 0, billed INTEGER NOT NULL DEFAULT 0);"
+        )
+        self._conn.commit()
+
+    def get(self, query, gl, hl, start):
+        """Returns a fresh cached response (dict) or None. Counts a hit when found."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, fetched_at FROM responses WHERE query = ? AND gl = ? AND hl = ? AND start = ?",
+                (query, gl, hl, start),
+            ).fetchone()
+            if row is None or time.time() - row[1] >= self.ttl:
+                return None
+            self._bump("hits")
+            self._conn.commit()
+        return json.loads(row[0])
+
+    def is_cached(self, query, gl, hl, start):
+        """Checks for a fresh entry without counting it as a hit."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT fetched_at FROM responses WHERE query = ? AND gl = ? AND hl = ? AND start = ?",
+                (query, gl, hl, start),
+            ).fetchone()
+        return row is not None and time.time() - row[0] < self.ttl
+
+    def store(self, query, gl, hl, start, response):
+        """Saves a billed API response and counts the billed call."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (query, gl, hl, start, response, fetched_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (query, gl, hl, start, json.dumps(response), time.time()),
+            )
+            self._bump("billed")
+            self._conn.commit()
+
+    def _bump(self, column):
+        self._conn.execute("INSERT OR IGNORE INTO stats (day) VALUES (?)", (date.today().isoformat(),))
+        self._conn.execute(f"UPDATE stats SET {column} = {column} + 1 WHERE day = ?",
+                           (date.today().isoformat(),))
+
+    def stats(self, day=None):
+        """Returns (hits, billed) for the given ISO day, or totals when day is None."""
+        with self._lock:
+            if day is None:
+                row = self._conn.execute("SELECT SUM(hits), SUM(billed) FROM stats").fetchone()
+            else:
+                row = self._conn.execute("SELECT hits, billed FROM stats WHERE day = ?", (day,)).fetchone()
+        if row is None:
+            return 0, 0
+        return row[0] or 0, row[1] or 0
+
+    def stats_summary(self):
+        """Human-readable readout of cache hits versus billed API calls."""
+        today_hits, today_billed = self.stats(date.today().isoformat())
+        total_hits, total_billed = self.stats()
+        total = total_hits + total_billed
+        rate = 100.0 * total_hits / total if total else 0.0
+        return (f"API cache - today: {today_hits} hits / {today_billed} billed; "
+                f"all time: {total_hits} hits / {total_billed} billed ({rate:.1f}% saved)")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_api_cache = None
+_api_cache_lock = threading.Lock()
+
+
+def get_api_cache():
+    """Returns the shared API response cache, opening it on first use."""
+    global _api_cache
+    if _api_cache is None:
+        with _api_cache_lock:
+            if _api_cache is None:
+                _api_cache = ApiResponseCache()
+    return _api_cache
@@ -0,0 +1,170 @@
+import hashlib
+import os
+import threading
+from datetime import datetime
+
+from quota import DAILY_QUERY_LIMIT, QuotaLedger, next_quota_reset
+
+# =======================
+# Key Pool Configuration
+# =======================
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+# Plik konfiguracyjny do zapisu kluczy API; każda para API_KEY=/CSE_ID= to osobny klucz w puli
+API_CONFIG_FILE = os.path.join(BASE_DIR, "api_config.txt")
+# Dawny licznik pierwszego klucza; przenoszony raz do pliku klucza, do którego należał
+QUERIES_COUNT_FILE = os.path.join(BASE_DIR, "query_counter.txt")
+
+# Statusy, po których klucz jest wyłączany do następnego resetu limitu
+KEY_FAILOVER_STATUSES = (403, 429)
+
+
+def key_fingerprint(api_key):
+    """Short, non-secret identifier of a key, safe to print and use in file names."""
+    return hashlib.sha1(api_key.encode("utf-8")).hexdigest()[:8]
+
+
+def counter_file(api_key):
+    """Counter file of a key, named by its fingerprint so the count follows the key, not its position."""
+    return os.path.join(BASE_DIR, f"query_counter_{key_fingerprint(api_key)}.txt")
+
+
+def migrate_legacy_counter(pairs):
+    """Moves query_counter.txt (and its history) to the file of the key it belonged to, once.
+
+    It was used by the first key of api_config.txt (or the only key given, without a config file).
+    If that key already has its own counter, the legacy files are dropped.
+    """
+    if not os.path.exists(QUERIES_COUNT_FILE):
+        return
+    owners = parse_api_config() or pairs
+    if not owners:
+        return
+    target = counter_file(owners[0][0])
+    for suffix in ("", ".history.json"):
+        try:
+            if os.path.exists(target + suffix):
+                os.remove(QUERIES_COUNT_FILE + suffix)
+            else:
+                os.replace(QUERIES_COUNT_FILE + suffix, target + suffix)
+        except OSError:
+            # Brak pliku historii albo migracja wykonana w tej chwili przez inny proces
+            pass
+
+
+def parse_api_config(path=API_CONFIG_FILE):
+    """Reads (api_key, cse_id) pairs from the config file, in file order."""
+    pairs = []
+    api_key = None
+    try:
+        with open(path, "r") as f:
+            for line in f:
+                if line.startswith("API_KEY="):
+                    api_key = line.split("=", 1)[1].strip()
+                elif line.startswith("CSE_ID=") and api_key is not None:
+                    pairs.append((api_key, line.split("=", 1)[1].strip()))
+                    api_key = None
+    except FileNotFoundError:
+        pass
+    return [(api_key, cse_id) for api_key, cse_id in pairs if api_key and cse_id]
+
+
+def write_api_config(pairs, path=API_CONFIG_FILE):
+    """Saves (api_key, cse_id) pairs to the config file."""
+    with open(path, "w") as f:
+        for api_key, cse_id in pairs:
+            f.write(f"API_KEY={api_key}\n")
+            f.write(f"CSE_ID={cse_id}\n")
+
+
+class ApiKey:
+    """One API key / CSE ID pair with its own daily quota ledger."""
+
+    def __init__(self, api_key, cse_id, counter_file, limit=DAILY_QUERY_LIMIT):
+        self.api_key = api_key
+        self.cse_id = cse_id
+        self.name = key_fingerprint(api_key)
+        self.ledger = QuotaLedger(counter_file, limit)
+        self.disabled_until = None
+
+    def is_available(self, now=None):
+        if self.disabled_until is not None:
+            if (now or datetime.now()) < self.disabled_until:
+                return False
+            self.disabled_until = None
+        return self.ledger.remaining() > 0
+
+
+class ApiKeyPool:
+    """Spreads Custom Search pages across several keys and fails over on 403/429."""
+
+    def __init__(self, pairs, limit=DAILY_QUERY_LIMIT):
+        self._lock = threading.Lock()
+        migrate_legacy_counter(pairs)
+        self.keys = [ApiKey(api_key, cse_id, counter_file(api_key), limit) for api_key, cse_id in pairs]
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _best_key(self):
+        available = [key for key in self.keys if key.is_available()]
+        if not available:
+            return None
+        return max(available, key=lambda key: key.ledger.remaining())
+
+    def acquire(self):
+        """Returns the available key with the most remaining quota, or None if the pool is exhausted."""
+        with self._lock:
+            return self._best_key()
+
+    def reserve(self):
+        """Like acquire(), but charges one query to the key up front so parallel searches never overshoot.
+
+        Call refund() when the request turns out not to be billed (failover, network error).
+        """
+        with self._lock:
+            key = self._best_key()
+            if key is not None:
+                key.ledger.increment()
+            return key
+
+    def refund(self, key):
+        with self._lock:
+            key.ledger.increment(-1)
+
+    def disable(self, key, reason=""):
+        """Takes a key out of rotation until the next 9:00 reset (quota exceeded / forbidden)."""
+        with self._lock:
+            key.disabled_until = next_quota_reset()
+        print(f"API key {key.name} disabled until {key.disabled_until:%Y-%m-%d %H:%M} {reason}".rstrip())
+
+    def subscribe(self, callback):
+        """Registers callback(used, capacity), called whenever any key's counter changes."""
+        for key in self.keys:
+            key.ledger.subscribe(lambda count, limit: callback(self.used(), self.capacity()))
+
+    def used(self):
+        return sum(key.ledger.get_count() for key in self.keys)
+
+    def capacity(self):
+        return sum(key.ledger.limit for key in self.keys)
+
+    def remaining(self):
+        """Queries still available today across all usable keys."""
+        return sum(key.ledger.remaining() for key in self.keys if key.is_available())
+
+    def history(self):
+        """Queries used per quota day, summed over the keys of the pool."""
+        totals = {}
+        for key in self.keys:
+            for day, count in key.ledger.history().items():
+                totals[day] = totals.get(day, 0) + count
+        return dict(sorted(totals.items()))
+
+    def status_lines(self):
+        """Per-key readout of used/limit, plus the pool total."""
+        lines = []
+        for key in self.keys:
+            state = "" if key.disabled_until is None else f" (disabled until {key.disabled_until:%H:%M})"
+            lines.append(f"Key {key.name}: {key.ledger.get_count()}/{key.ledger.limit}{state}")
+        lines.append(f"Pool: {self.remaining()} of {self.capacity()} queries remaining today")
+        return lines
@@ -0,0 +1,92 @@
+"""Benchmark: bulk URL -> registrable domain normalization.
+
+Compares the old "last two labels" rule with the public-suffix resolver, cold (list compiled
+and host cache empty) and warm (repeated hosts served from the cache), and prints how many
+distinct domains each rule finds. The URL set is synthetic unless ``--urls FILE`` is given
+(one URL per line).
+
+Usage:
+    python benchmarks/bench_domains.py [--urls FILE] [--count N] [--repeat N]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from urllib.parse import urlparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import public_suffix  # noqa: E402
+
+from bench_results import record_result  # noqa: E402
+
+SUFFIXES = ["pl", "com.pl", "waw.pl", "de", "co.uk", "org.uk", "com", "fr", "it", "com.au", "blogspot.com"]
+PREFIXES = ["", "www.", "sklep.", "m.", "kontakt.www."]
+
+
+def two_labels(url):
+    """The previous get_domain_from_url rule, for comparison."""
+    parts = urlparse(url).netloc.split(".")
+    return ".".join(parts[-2:]) if len(parts) > 1 else urlparse(url).netloc
+
+
+def synthetic_urls(count, hosts=5000, seed=0):
+    rnd = random.Random(seed)
+    pool = []
+    for i in range(hosts):
+        name = f"firma{i}" if i % 50 else f"łódź-firma{i}"
+        port = ":8080" if i % 97 == 0 else ""
+        pool.append(f"{rnd.choice(PREFIXES)}{name}.{rnd.choice(SUFFIXES)}{port}")
+    return [f"https://{rnd.choice(pool)}/oferta/{rnd.randint(1, 50)}" for _ in range(count)]
+
+
+def time_rule(rule, urls, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for url in urls:
+            rule(url)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--urls", help="file with one URL per line")
+    parser.add_argument("--count", type=int, default=200000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.urls:
+        with open(args.urls, "r", encoding="utf-8") as f:
+            urls = [line.strip() for line in f if line.strip()]
+    else:
+        urls = synthetic_urls(args.count)
+    print(f"URLs: {len(urls)}, distinct hosts: {len({urlparse(url).netloc for url in urls})}")
+
+    start = time.perf_counter()
+    resolver = public_suffix.get_public_suffix_list()
+    print(f"Compile public suffix list: {1000 * (time.perf_counter() - start):.1f} ms")
+
+    public_suffix.domain_of_netloc.cache_clear()
+    cold = time_rule(public_suffix.registrable_domain_of_url, urls, 1)
+    warm = time_rule(public_suffix.registrable_domain_of_url, urls, args.repeat)
+    uncached = time_rule(lambda url: resolver.registrable_domain(public_suffix.normalize_host(urlparse(url).netloc)),
+                         urls, args.repeat)
+    old = time_rule(two_labels, urls, args.repeat)
+    for name, elapsed in (("two labels", old), ("psl cold", cold), ("psl warm", warm), ("psl no cache", uncached)):
+        print(f"{name:>12}: {elapsed:.3f} s total, {1e6 * elapsed / len(urls):.2f} us/url")
+
+    print(f"Distinct domains: two labels {len(set(map(two_labels, urls)))}, "
+          f"public suffix {len(set(map(public_suffix.registrable_domain_of_url, urls)))}")
+    record_result("domains", {
+        "psl_cold_us_per_url": round(1e6 * cold / len(urls), 3),
+        "psl_warm_us_per_url": round(1e6 * warm / len(urls), 3),
+        "psl_uncached_us_per_url": round(1e6 * uncached / len(urls), 3),
+    }, params={"source": args.urls or "synthetic", "urls": len(urls)})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""Benchmark: BeautifulSoup extractor vs the single-pass extractor.
+
+Corpus sources (first one that yields pages wins):
+  1. a directory of saved *.html / *.htm files (``--corpus DIR``),
+  2. the on-disk page cache (page_cache.sqlite),
+  3. generated synthetic pages.
+
+Usage:
+    python benchmarks/bench_extract.py [--corpus DIR] [--repeat N]
+"""
+import argparse
+import glob
+import os
+import random
+import sqlite3
+import sys
+import time
+import zlib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from contact_extractor import extract_contacts_bs4, extract_contacts_fast  # noqa: E402
+from page_cache import PAGE_CACHE_FILE  # noqa: E402
+
+from bench_results import record_result  # noqa: E402
+
+
+def load_directory(path):
+    pages = []
+    for file_path in sorted(glob.glob(os.path.join(path, "**", "*.htm*"), recursive=True)):
+        with open(file_path, "r", encoding="utf-8", errors="replace") as f:
+            pages.append(("file://" + os.path.abspath(file_path), f.read()))
+    return pages
+
+
+def load_page_cache(path=PAGE_CACHE_FILE):
+    if not os.path.exists(path):
+        return []
+    conn = sqlite3.connect(path)
+    try:
+        rows = conn.execute("SELECT url, body FROM pages").fetchall()
+    finally:
+        conn.close()
+    return [(url, zlib.decompress(body).decode("utf-8")) for url, body in rows]
+
+
+def synthetic_page(seed, paragraphs):
+    rnd = random.Random(seed)
+    parts = ["<html><head><title>Firma %d</title>" % seed,
+             "<meta name='description' content='Opis firmy %d'>" % seed,
+             "<script>var tracking = 'x%d@analytics.com';</script>" % seed,
+             "<style>.a { color: red; }</style></head><body><nav>"]
+    for i in range(20):
+        parts.append("<a href='/oferta/%d'>Oferta %d</a>" % (i, i))
+    parts.append("<a href='/kontakt'>Kontakt</a></nav>")
+    for i in range(paragraphs):
+        parts.append("<div class='row'><p>Lorem ipsum dolor sit amet %d, <b>consectetur</b> adipiscing.</p>" % i)
+        if rnd.random() < 0.05:
+            parts.append("<p>Tel. +48 %03d %03d %03d, 00-%03d Warszawa</p>" % (
+                rnd.randint(100, 999), rnd.randint(0, 999), rnd.randint(0, 999), rnd.randint(0, 999)))
+        if rnd.random() < 0.03:
+            parts.append("<a href='mailto:biuro%d@firma%d.pl'>biuro%d@firma%d.pl</a>" % (i, seed, i, seed))
+        parts.append("</div>")
+    parts.append("</body></html>")
+    return "http://firma%d.pl/" % seed, "".join(parts)
+
+
+def synthetic_corpus(count=40):
+    return [synthetic_page(seed, paragraphs=50 * (1 + seed % 20)) for seed in range(count)]
+
+
+def time_extractor(extractor, pages, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for url, html in pages:
+            extractor(html, url)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", help="directory with saved HTML pages")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    pages, source = [], ""
+    if args.corpus:
+        pages, source = load_directory(args.corpus), args.corpus
+    if not pages:
+        pages, source = load_page_cache(), PAGE_CACHE_FILE
+    if not pages:
+        pages, source = synthetic_corpus(), "synthetic"
+
+    megabytes = sum(len(html.encode("utf-8")) for _, html in pages) / 1e6
+    print(f"Corpus: {len(pages)} pages, {megabytes:.2f} MB ({source})")
+
+    mismatches = [url for url, html in pages if extract_contacts_bs4(html, url) != extract_contacts_fast(html, url)]
+    print(f"Output mismatches: {len(mismatches)}")
+    for url in mismatches[:10]:
+        print(f"  {url}")
+
+    reference = time_extractor(extract_contacts_bs4, pages, args.repeat)
+    fast = time_extractor(extract_contacts_fast, pages, args.repeat)
+    for name, elapsed in (("bs4", reference), ("fast", fast)):
+        print(f"{name:>5}: {elapsed:.3f} s total, {elapsed / megabytes:.3f} s/MB, "
+              f"{1000 * elapsed / len(pages):.2f} ms/page")
+    print(f"Speed-up: {reference / fast:.2f}x")
+    record_result("extract", {
+        "bs4_seconds_per_mb": round(reference / megabytes, 4),
+        "fast_seconds_per_mb": round(fast / megabytes, 4),
+        "mismatches": len(mismatches),
+    }, params={"source": source, "pages": len(pages), "megabytes": round(megabytes, 2)})
+
+
+if __name__ == "__main__":
+    main()
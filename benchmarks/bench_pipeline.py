@@ -0,0 +1,114 @@
+"""Benchmark: end-to-end pipeline throughput against the local mock web (no real quota used).
+
+The repository's modules are copied into a temporary directory, so caches, the job journal,
+quota counters and Search_Results of the benchmark never touch the real ones. cli.py runs there
+against benchmarks/mock_web.py with fake API keys; the per-stage numbers come from the run's
+metrics.jsonl.
+
+Usage:
+    python benchmarks/bench_pipeline.py [--queries N] [--results N] [--workers N]
+                                        [--extract-workers N] [--crawl-depth N] [--latency-scale X]
+"""
+import argparse
+import glob
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from bench_results import record_result
+from mock_web import MockWeb
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DRIVER = """import sys
+import engine, cli
+# Procesy ekstrakcji (forkserver/spawn) importują ten plik ponownie - bez osłony uruchomiłyby cli
+if __name__ == "__main__":
+    engine.GOOGLE_API_URL = sys.argv[1]
+    sys.exit(cli.main(sys.argv[2:]))
+"""
+
+
+def prepare_workdir(queries, api_calls):
+    """Copies the app into a temp dir with enough fake keys for the run and a query file."""
+    workdir = tempfile.mkdtemp(prefix="bench_pipeline_")
+    for path in glob.glob(os.path.join(REPO_DIR, "*.py")) + glob.glob(os.path.join(REPO_DIR, "*.dat")):
+        shutil.copy(path, workdir)
+    with open(os.path.join(workdir, "bench_driver.py"), "w") as f:
+        f.write(DRIVER)
+    with open(os.path.join(workdir, "api_config.txt"), "w") as f:
+        for i in range(api_calls // 100 + 1):
+            f.write(f"API_KEY=bench-key-{i}\nCSE_ID=bench-cse\n")
+    with open(os.path.join(workdir, "queries.txt"), "w", encoding="utf-8") as f:
+        f.write("\n".join(queries) + "\n")
+    return workdir
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--results", type=int, default=30)
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--extract-workers", type=int, default=None)
+    parser.add_argument("--crawl-depth", type=int, default=0)
+    parser.add_argument("--latency-scale", type=float, default=1.0, help="multiplies the mock sites' latencies")
+    parser.add_argument("--keep", action="store_true", help="keep the temporary working directory")
+    args = parser.parse_args()
+
+    queries = [f"okna pcv {i}" for i in range(args.queries)]
+    web = MockWeb(latency_scale=args.latency_scale).start()
+    workdir = prepare_workdir(queries, args.queries * ((args.results + 9) // 10))
+    command = [sys.executable, "bench_driver.py", web.api_url, "--queries", "queries.txt",
+               "--results", str(args.results), "--workers", str(args.workers), "--search-qps", "1000",
+               "--crawl-depth", str(args.crawl_depth)]
+    if args.extract_workers is not None:
+        command += ["--extract-workers", str(args.extract_workers)]
+
+    try:
+        start = time.perf_counter()
+        completed = subprocess.run(command, cwd=workdir, capture_output=True, text=True)
+        wall = time.perf_counter() - start
+        if completed.returncode != 0:
+            print(completed.stdout[-2000:], completed.stderr[-2000:])
+            sys.exit(f"Pipeline run failed with exit code {completed.returncode}")
+        with open(os.path.join(workdir, "Search_Results", "metrics.jsonl"), "r", encoding="utf-8") as f:
+            stages = json.loads(f.read().splitlines()[-1])["stages"]
+    finally:
+        web.stop()
+        if args.keep:
+            print(f"Working directory: {workdir}")
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    def stage(name):
+        return stages.get(name, {"latency": {"count": 0, "sum": 0.0, "p50": 0.0, "p90": 0.0}, "bytes": 0})
+
+    pages = stage("fetch")["latency"]["count"]
+    extract = stage("extract")
+    megabytes = extract["bytes"] / 1e6
+    results = {
+        "wall_seconds": round(wall, 3),
+        "api_calls": web.api_calls,
+        "pages": pages,
+        "pages_per_second": round(pages / wall, 2) if wall else 0.0,
+        "megabytes": round(web.bytes_served / 1e6, 3),
+        "fetch_p50": stage("fetch")["latency"]["p50"],
+        "fetch_p90": stage("fetch")["latency"]["p90"],
+        "extract_seconds_per_mb": round(extract["latency"]["sum"] / megabytes, 4) if megabytes else 0.0,
+        "save_seconds": round(stage("save")["latency"]["sum"], 4),
+    }
+    print(f"Queries: {args.queries} x {args.results} results, workers {args.workers}, crawl depth {args.crawl_depth}")
+    for key, value in results.items():
+        print(f"  {key}: {value}")
+    record_result("pipeline", results, params={
+        "queries": args.queries, "results": args.results, "workers": args.workers,
+        "extract_workers": args.extract_workers, "crawl_depth": args.crawl_depth,
+        "latency_scale": args.latency_scale})
+
+
+if __name__ == "__main__":
+    main()
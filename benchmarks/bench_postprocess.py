@@ -0,0 +1,113 @@
+"""Benchmark: bulk email/phone post-processing of stored contact rows.
+
+Builds a synthetic result set with messy contacts (mixed case, duplicates written several ways,
+zip codes, image file names caught by the email regex, numbers with and without a country
+prefix), then times postprocess.normalize_contacts over all of it and the old per-number
+Python filter loop for comparison. Before timing, a few known page texts are run through
+PHONE_RE and normalize_contacts and checked against the expected E.164 numbers.
+
+Usage:
+    python benchmarks/bench_postprocess.py [--rows N] [--repeat N]
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from contact_extractor import PHONE_RE  # noqa: E402
+from postprocess import ZIP_CODE_RE, normalize_contacts  # noqa: E402
+
+from bench_results import record_result  # noqa: E402
+
+TLDS = ["pl", "de", "uk", "it", "fr", None]
+# (kraj wyszukiwania, tekst strony, oczekiwane numery E.164)
+PHONE_CASES = [
+    ("pl", "Tel. 0048 601 234 567", ["+48601234567"]),
+    ("pl", "tel: +48 601 234 567, 601-234-567", ["+48601234567"]),
+    ("pl", "48 601 234 567", ["+48601234567"]),
+    ("de", "Mobil: 0048601234567", ["+48601234567"]),
+    ("pl", "+420 601 234 567", ["+420601234567"]),
+    ("pl", "ul. Długa 5, 00-950 Warszawa", []),
+]
+OLD_PHONE_RE = re.compile(r"(?:\+?\d{2}\s*)?(\d{3}[\s-]?\d{3}[\s-]?\d{3}|\d{9})")
+
+
+def synthetic_rows(count, seed=0):
+    rnd = random.Random(seed)
+    rows = []
+    for i in range(count):
+        number = f"{rnd.randint(500, 899)} {rnd.randint(100, 999)} {rnd.randint(100, 999)}"
+        phones = [number, number.replace(" ", "-"), "+48 " + number, f"{rnd.randint(10, 99)}-{rnd.randint(100, 999)}"]
+        emails = [f"biuro@firma{i}.pl", f"Biuro@Firma{i}.PL", f"handel{rnd.randint(0, 3)}@firma{i}.pl",
+                  "logo@2x.png"]
+        rows.append({"url": f"https://www.firma{i}.com.pl/", "tld": rnd.choice(TLDS),
+                     "emails": emails[:rnd.randint(0, 4)], "phones": phones[:rnd.randint(0, 4)]})
+    return pd.DataFrame(rows)
+
+
+def old_phone_filter(texts):
+    """The previous per-page loop of extract_contacts, for comparison."""
+    for text in texts:
+        phones = set()
+        for num in OLD_PHONE_RE.findall(text):
+            clean_num = num.replace(" ", "").replace("-", "")
+            if not ZIP_CODE_RE.search(num) and len(clean_num) >= 9:
+                phones.add(num)
+
+
+def check_phone_cases():
+    """Exits with an error if a known page text does not normalize to the expected numbers."""
+    df = pd.DataFrame([{"url": "https://firma.example/", "tld": tld, "emails": [], "phones": PHONE_RE.findall(text)}
+                       for tld, text, _ in PHONE_CASES])
+    failures = [f"  {text!r} ({tld}): {got} instead of {expected}"
+                for (tld, text, expected), got in zip(PHONE_CASES, normalize_contacts(df)["phones"])
+                if got != expected]
+    if failures:
+        sys.exit("Phone normalization check failed:\n" + "\n".join(failures))
+    print(f"Phone normalization check: {len(PHONE_CASES)} cases OK")
+
+
+def best_time(func, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    check_phone_cases()
+    df = synthetic_rows(args.rows)
+    texts = [" ".join(phones) for phones in df["phones"]]
+    candidates = int(df["emails"].map(len).sum() + df["phones"].map(len).sum())
+
+    vectorized = best_time(lambda: normalize_contacts(df), args.repeat)
+    loop = best_time(lambda: old_phone_filter(texts), args.repeat)
+    result = normalize_contacts(df)
+    kept = int(result["emails"].map(len).sum() + result["phones"].map(len).sum())
+
+    print(f"{args.rows} rows, {candidates} email/phone candidates -> {kept} after normalization")
+    print(f"  normalize_contacts (emails + phones): {vectorized:.2f} s ({1e6 * vectorized / args.rows:.1f} us/row)")
+    print(f"  old phone filter loop (phones only):  {loop:.2f} s")
+    record_result("postprocess", {
+        "seconds": round(vectorized, 3),
+        "us_per_row": round(1e6 * vectorized / args.rows, 2),
+        "kept": kept,
+    }, params={"rows": args.rows})
+
+
+if __name__ == "__main__":
+    main()
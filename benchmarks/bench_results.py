@@ -0,0 +1,65 @@
+"""Shared result log for the benchmark scripts.
+
+Every run appends one JSON line to benchmarks/results.jsonl (benchmark name, time, git
+commit, Python version and the measured numbers) and prints the change against the previous
+run of the same benchmark, so regressions show up without extra tooling.
+"""
+import json
+import os
+import platform
+import subprocess
+from datetime import datetime
+
+RESULTS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results.jsonl")
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), timeout=10).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return ""
+
+
+def previous_result(name, params=None, path=RESULTS_FILE):
+    """The last recorded result of the named benchmark with the same parameters, or None."""
+    last = None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if record.get("benchmark") == name and record.get("params", {}) == (params or {}):
+                    last = record
+    except FileNotFoundError:
+        pass
+    return last
+
+
+def record_result(name, results, params=None, path=RESULTS_FILE):
+    """Appends results (a flat dict of numbers) and prints the change versus the previous run.
+
+    Only runs with identical params (corpus size, worker counts...) are compared.
+    """
+    previous = previous_result(name, params, path)
+    record = {
+        "benchmark": name,
+        "time": datetime.now().isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "params": params or {},
+        "results": results,
+    }
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    if previous is None:
+        print(f"Recorded the first {name} result with these parameters in {path}")
+        return
+    print(f"Change versus {previous['time']} ({previous.get('commit') or 'unknown commit'}):")
+    for key, value in results.items():
+        before = previous.get("results", {}).get(key)
+        if isinstance(value, (int, float)) and isinstance(before, (int, float)) and before:
+            print(f"  {key}: {before:.4g} -> {value:.4g} ({100 * (value - before) / before:+.1f}%)")
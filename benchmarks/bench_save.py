@@ -0,0 +1,91 @@
+"""Benchmark: save cost versus the size of the lead database.
+
+For each size the result store (in a temporary directory) is grown to that many rows, then
+the script measures inserting a batch of new rows one by one (as the pipeline does) and
+streaming the whole store to prospects.xlsx (optionally partitioned or as .csv/.parquet),
+with the peak Python memory of the export.
+
+Usage:
+    python benchmarks/bench_save.py [--sizes 1000,10000,50000] [--batch N]
+                                    [--format xlsx|csv|parquet] [--partition-by query|country|date]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from exporter import PARTITION_CHOICES, export_store  # noqa: E402
+from result_store import ResultStore  # noqa: E402
+
+from bench_results import record_result  # noqa: E402
+
+
+def contact_row(i):
+    return {
+        "query": f"okna pcv {i % 50}",
+        "url": f"https://firma{i}.pl/",
+        "emails": [f"biuro@firma{i}.pl", f"handel@firma{i}.pl"],
+        "phones": [f"+48 601 {i % 1000:03d} {i % 997:03d}"],
+        "description": f"Firma {i} - producent okien i drzwi PCV, montaż i serwis.",
+        "contact_links": [f"https://firma{i}.pl/kontakt"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1000,10000,50000", help="comma-separated store sizes")
+    parser.add_argument("--batch", type=int, default=500, help="rows inserted per measurement")
+    parser.add_argument("--format", default="xlsx", choices=["xlsx", "csv", "parquet"])
+    parser.add_argument("--partition-by", choices=PARTITION_CHOICES)
+    args = parser.parse_args()
+    sizes = sorted(int(size) for size in args.sizes.split(","))
+
+    workdir = tempfile.mkdtemp(prefix="bench_save_")
+    results = {}
+    try:
+        store = ResultStore(os.path.join(workdir, "prospects.sqlite"))
+        stored = 0
+        for size in sizes:
+            # Dopełnienie bazy do zadanego rozmiaru (bez pomiaru)
+            while stored < size - args.batch:
+                store.add(contact_row(stored), domain=f"firma{stored}.pl")
+                stored += 1
+
+            start = time.perf_counter()
+            for i in range(stored, stored + args.batch):
+                store.add(contact_row(i), domain=f"firma{i}.pl")
+            add_seconds = time.perf_counter() - start
+            stored += args.batch
+
+            export_path = os.path.join(workdir, f"prospects.{args.format}")
+            start = time.perf_counter()
+            files = export_store(store, export_path, partition_by=args.partition_by)["files"]
+            export_seconds = time.perf_counter() - start
+            # Osobny przebieg pod tracemalloc, żeby narzut pomiaru pamięci nie zawyżał czasu
+            tracemalloc.start()
+            export_store(store, export_path, partition_by=args.partition_by)
+            export_peak_mb = tracemalloc.get_traced_memory()[1] / 1e6
+            tracemalloc.stop()
+            megabytes = sum(os.path.getsize(path) for path in files) / 1e6
+
+            results[f"add_ms_per_row_{stored}"] = round(1000 * add_seconds / args.batch, 4)
+            results[f"export_seconds_{stored}"] = round(export_seconds, 3)
+            results[f"export_peak_mb_{stored}"] = round(export_peak_mb, 2)
+            print(f"{stored:>8} rows: add {1000 * add_seconds / args.batch:.3f} ms/row, "
+                  f"export {export_seconds:.2f} s, peak {export_peak_mb:.1f} MB "
+                  f"({megabytes:.2f} MB in {len(files)} {args.format} file(s))")
+        store.close()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    record_result("save", results, params={"sizes": sizes, "batch": args.batch, "format": args.format,
+                                           "partition_by": args.partition_by})
+
+
+if __name__ == "__main__":
+    main()
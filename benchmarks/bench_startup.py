@@ -0,0 +1,95 @@
+"""Benchmark: desktop app startup time (imports before the window appears).
+
+Runs `python -X importtime -c "import wyszukiwarka"` in fresh interpreters and reports the
+cumulative import time of the module, the wall-clock time of the whole process against an empty
+interpreter, the slowest packages (self time summed per top-level package) and which heavy
+dependencies were imported eagerly. It then times engine.warm_up_imports(), i.e. the imports the
+GUI now does in the background once the window is shown.
+
+Usage:
+    python benchmarks/bench_startup.py [--module wyszukiwarka] [--repeat N] [--top N]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from collections import Counter
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from bench_results import record_result  # noqa: E402
+
+# Zależności, które nie powinny być ładowane przed pokazaniem okna
+HEAVY_PACKAGES = ("pandas", "numpy", "requests", "urllib3", "bs4", "lxml", "openpyxl", "pyarrow")
+
+
+def run_python(code, importtime=False):
+    """Runs code in a fresh interpreter from the repo directory. Returns (seconds, stderr)."""
+    command = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", code]
+    start = time.perf_counter()
+    result = subprocess.run(command, cwd=ROOT_DIR, capture_output=True, text=True, check=True)
+    return time.perf_counter() - start, result.stderr
+
+
+def parse_importtime(stderr):
+    """[(module, self us, cumulative us, depth)] from -X importtime output."""
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        entries.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return entries
+
+
+def measure(module):
+    seconds, stderr = run_python(f"import {module}", importtime=True)
+    entries = parse_importtime(stderr)
+    cumulative = next((cum for name, _, cum, _ in entries if name == module), 0)
+    packages = Counter()
+    for name, self_us, _, _ in entries:
+        packages[name.split(".")[0]] += self_us
+    loaded = {name.split(".")[0] for name, _, _, _ in entries}
+    return seconds, cumulative / 1e6, packages, sorted(loaded.intersection(HEAVY_PACKAGES))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="wyszukiwarka")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    # Pierwsze uruchomienie tworzy pliki .pyc - mierzymy kolejne ("ciepły" start)
+    run_python(f"import {args.module}")
+    baseline = min(run_python("pass")[0] for _ in range(args.repeat))
+    runs = [measure(args.module) for _ in range(args.repeat)]
+    process = statistics.median(run[0] for run in runs)
+    imports = statistics.median(run[1] for run in runs)
+    packages, heavy = runs[-1][2], runs[-1][3]
+
+    warm_up = float(run_python("import engine, sys, time; start = time.perf_counter(); "
+                               "engine.warm_up_imports().join(); "
+                               "print(time.perf_counter() - start, file=sys.stderr)")[1].split()[-1])
+
+    print(f"import {args.module}: {imports * 1000:.0f} ms of imports, "
+          f"{(process - baseline) * 1000:.0f} ms over an empty interpreter ({baseline * 1000:.0f} ms)")
+    print(f"Heavy packages imported at startup: {', '.join(heavy) or 'none'}")
+    print("Slowest packages (self time, last run):")
+    for name, self_us in packages.most_common(args.top):
+        print(f"  {name:<24} {self_us / 1000:7.1f} ms")
+    print(f"Background warm-up after the window is shown: {warm_up * 1000:.0f} ms")
+    record_result("startup", {
+        "import_ms": round(imports * 1000, 1),
+        "process_ms": round((process - baseline) * 1000, 1),
+        "warm_up_ms": round(warm_up * 1000, 1),
+        "heavy_packages": len(heavy),
+    }, params={"module": args.module})
+
+
+if __name__ == "__main__":
+    main()
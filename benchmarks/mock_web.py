@@ -0,0 +1,161 @@
+"""Local stand-in for Google Custom Search and the sites it returns.
+
+One threaded HTTP server answers both:
+  * /customsearch/v1 - JSON shaped like the real API (``items`` with ``link``, ``title``,
+    ``displayLink``, ``snippet``), deterministic per query, with a short last page;
+  * every other path - a synthetic company site. Each result points at its own loopback
+    address (127.x.y.z, all routed to this server on Linux), so per-host politeness and
+    connection pooling behave as with real, distinct sites. Page size and response latency
+    vary per site; about half of the sites only show an email on /kontakt.
+
+Run standalone to browse it:
+    python benchmarks/mock_web.py [--port 8765]
+"""
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from bench_extract import synthetic_page
+
+# Liczba wyników "w Google" na zapytanie (ostatnia strona jest niepełna)
+RESULTS_PER_QUERY = 35
+# Rozmiary stron (akapity) i opóźnienia odpowiedzi (sekundy), losowane per strona
+PAGE_PARAGRAPHS = (10, 50, 200, 800, 2000)
+PAGE_LATENCIES = (0.0, 0.01, 0.05, 0.2)
+
+
+def site_number(query, position):
+    """Stable number of the site at a 1-based result position of a query."""
+    digest = hashlib.sha1(query.encode("utf-8")).digest()
+    return int.from_bytes(digest[:3], "big") % 50000 * 100 + position
+
+
+def site_host(number):
+    """Loopback address of a site, unique for every site number used above."""
+    return f"127.{1 + number // 65025 % 254}.{number // 255 % 255}.{1 + number % 254}"
+
+
+def site_profile(host, latency_scale=1.0):
+    rnd = random.Random(host)
+    return {
+        "paragraphs": rnd.choice(PAGE_PARAGRAPHS),
+        "latency": rnd.choice(PAGE_LATENCIES) * latency_scale,
+        "email_on_home": rnd.random() < 0.5,
+        "seed": rnd.randint(0, 10 ** 6),
+    }
+
+
+class MockWeb:
+    """Runs the mock API and synthetic sites on one port until stop()."""
+
+    def __init__(self, port=0, results_per_query=RESULTS_PER_QUERY, latency_scale=1.0):
+        self.results_per_query = results_per_query
+        self.latency_scale = latency_scale
+        self.api_calls = 0
+        self.pages_served = 0
+        self.bytes_served = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("0.0.0.0", port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def port(self):
+        return self._server.server_address[1]
+
+    @property
+    def api_url(self):
+        return f"http://127.0.0.1:{self.port}/customsearch/v1"
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def search_response(self, query, start):
+        items = []
+        for position in range(start, min(start + 10, self.results_per_query + 1)):
+            host = site_host(site_number(query, position))
+            items.append({
+                "kind": "customsearch#result",
+                "title": f"Firma {position} - {query}",
+                "link": f"http://{host}:{self.port}/",
+                "displayLink": host,
+                "snippet": f"Producent i dostawca: {query}.",
+            })
+        return {
+            "kind": "customsearch#search",
+            "queries": {"request": [{"searchTerms": query, "startIndex": start, "count": len(items)}]},
+            "searchInformation": {"totalResults": str(self.results_per_query)},
+            "items": items,
+        }
+
+    def page(self, host, path):
+        profile = site_profile(host, self.latency_scale)
+        _, html = synthetic_page(profile["seed"], profile["paragraphs"])
+        if path.startswith("/kontakt"):
+            html = html.replace("</body>", f"<p>E-mail: biuro@{host.replace('.', '-')}.pl, tel. +48 601 234 567</p></body>")
+        elif not profile["email_on_home"]:
+            # Bez adresu e-mail na stronie głównej: wymusza przejście na /kontakt przy crawlowaniu
+            html = html.replace("mailto:", "nomail:").replace("@firma", "(at)firma")
+        return profile["latency"], html
+
+    def _handler_class(self):
+        web = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                parts = urlsplit(self.path)
+                if parts.path == "/customsearch/v1":
+                    params = parse_qs(parts.query)
+                    body = json.dumps(web.search_response(params.get("q", [""])[0],
+                                                          int(params.get("start", ["1"])[0]))).encode("utf-8")
+                    content_type = "application/json; charset=UTF-8"
+                    with web._lock:
+                        web.api_calls += 1
+                else:
+                    latency, html = web.page(self.headers.get("Host", "").split(":")[0], parts.path)
+                    if latency:
+                        time.sleep(latency)
+                    body = html.encode("utf-8")
+                    content_type = "text/html; charset=utf-8"
+                    with web._lock:
+                        web.pages_served += 1
+                        web.bytes_served += len(body)
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+    web = MockWeb(args.port).start()
+    print(f"Mock Custom Search: {web.api_url}?q=okna&start=1 (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        web.stop()
+
+
+if __name__ == "__main__":
+    main()
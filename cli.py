@@ -0,0 +1,209 @@
+"""Headless command-line entry point for the prospecting pipeline.
+
+Examples:
+    python cli.py --queries queries.txt --country Poland --results 20 --output leads.csv
+    python cli.py --resume
+    python cli.py --queries campaign.txt --results 100 --enqueue
+    python cli.py --run-queue
+    python cli.py --export prospects_by_country.xlsx --partition-by country
+"""
+import argparse
+import json
+import os
+import sys
+
+import engine
+from crawler import CRAWL_MAX_PAGES
+from exporter import PARTITION_CHOICES, export_store
+from extraction_pool import EXTRACT_WORKERS
+from fetcher import FETCH_WORKERS
+from job_journal import get_job_journal
+from result_store import flatten_lists, get_result_store
+from scheduler import JobScheduler
+
+# Liczba ostatnich dni zużycia limitu pokazywanych przez --quota
+QUOTA_HISTORY_SHOWN = 14
+
+
+def read_queries(path):
+    """Reads one query per line from a file ('-' for stdin), skipping blank lines."""
+    if path == "-":
+        lines = sys.stdin.read().splitlines()
+    else:
+        with open(path, "r", encoding="utf-8") as f:
+            lines = f.read().splitlines()
+    return [line.strip() for line in lines if line.strip()]
+
+
+def filter_recent(queries, tld, skip):
+    """Warns about queries searched for this country recently; drops them when skip is set."""
+    recent = engine.recently_searched(queries, tld)
+    if not recent:
+        return queries
+    print(f"{len(recent)} of {len(queries)} queries were already searched in the last "
+          f"{engine.RECENT_SEARCH_DAYS} days{' and are skipped' if skip else ''}:", file=sys.stderr)
+    for query, row in recent.items():
+        print(f"  {query} ({row['searched_at'][:10]}, {row['leads']} leads)", file=sys.stderr)
+    return [query for query in queries if query not in recent] if skip else queries
+
+
+def write_output(df, path):
+    """Writes job results to .csv, .json, .jsonl or .xlsx (chosen by extension).
+
+    JSON keeps emails/phones/contact_links as arrays; .csv and .xlsx join them with ';'.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".csv":
+        flatten_lists(df).to_csv(path, index=False)
+    elif extension == ".json":
+        df.to_json(path, orient="records", force_ascii=False, indent=2)
+    elif extension == ".jsonl":
+        df.to_json(path, orient="records", force_ascii=False, lines=True)
+    elif extension == ".xlsx":
+        flatten_lists(df).to_excel(path, index=False)
+    else:
+        raise ValueError(f"Unsupported output format: {extension or path}")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Search Google Custom Search, fetch result pages and extract contacts.")
+    parser.add_argument("--queries", help="file with one search phrase per line ('-' reads stdin)")
+    parser.add_argument("--country", default="Poland", choices=sorted(engine.country_codes),
+                        metavar="COUNTRY", help="country from the GUI list (default: Poland)")
+    parser.add_argument("--results", type=int, default=10,
+                        help=f"results per query, 10-{engine.MAX_RESULTS_PER_QUERY} (default: 10)")
+    parser.add_argument("--workers", type=int, default=FETCH_WORKERS,
+                        help=f"concurrent page fetches (default: {FETCH_WORKERS})")
+    parser.add_argument("--search-workers", type=int, default=engine.SEARCH_WORKERS,
+                        help=f"queries searched in parallel (default: {engine.SEARCH_WORKERS})")
+    parser.add_argument("--search-qps", type=float, default=engine.SEARCH_QPS,
+                        help=f"max Custom Search calls per second (default: {engine.SEARCH_QPS})")
+    parser.add_argument("--extract-workers", type=int, default=EXTRACT_WORKERS,
+                        help=f"HTML parsing processes, 0 parses in-process (default: {EXTRACT_WORKERS})")
+    parser.add_argument("--crawl-depth", type=int, default=0,
+                        help="follow links this many hops from each result page, contact pages first (default: 0)")
+    parser.add_argument("--crawl-pages", type=int, default=CRAWL_MAX_PAGES,
+                        help=f"max pages fetched per domain when crawling (default: {CRAWL_MAX_PAGES})")
+    parser.add_argument("--resume", action="store_true", help="resume the last interrupted job")
+    parser.add_argument("--skip-recent", action="store_true",
+                        help=f"leave out queries already searched for the country in the last "
+                             f"{engine.RECENT_SEARCH_DAYS} days (by default they are only reported)")
+    parser.add_argument("--enqueue", action="store_true",
+                        help="add the queries to the job queue instead of running them now")
+    parser.add_argument("--run-queue", action="store_true",
+                        help="run queued jobs until the queue is empty, waiting for the 9:00 quota reset when needed")
+    parser.add_argument("--quota", action="store_true", help="print remaining API capacity and recent daily usage of the key pool, then exit")
+    parser.add_argument("--output", help="write this job's rows to .csv/.json/.jsonl/.xlsx")
+    parser.add_argument("--export", metavar="PATH",
+                        help="export every stored row to .xlsx/.csv/.parquet, then exit (no API key needed)")
+    parser.add_argument("--partition-by", choices=PARTITION_CHOICES,
+                        help="with --export: one sheet (or file) per query, country or day")
+    parser.add_argument("--split-files", action="store_true",
+                        help="with --export --partition-by: one .xlsx file per partition instead of one sheet each")
+    parser.add_argument("--excel", action="store_true",
+                        help="also export the full prospects.xlsx at the end (otherwise use --export)")
+    parser.add_argument("--api-key", default=os.environ.get("GOOGLE_API_KEY"),
+                        help="Google API key (default: $GOOGLE_API_KEY or api_config.txt)")
+    parser.add_argument("--cse-id", default=os.environ.get("GOOGLE_CSE_ID"),
+                        help="CSE ID (default: $GOOGLE_CSE_ID or api_config.txt)")
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    if args.export:
+        try:
+            exported = export_store(get_result_store(domain_of=engine.get_domain_from_url), args.export,
+                                    partition_by=args.partition_by, split_files=args.split_files)
+        except (ValueError, RuntimeError) as e:
+            parser.error(str(e))
+        print(f"Exported {exported['rows']} rows to {len(exported['files'])} file(s):")
+        for path in exported["files"]:
+            print(f"  {os.path.abspath(path)}")
+        return 0
+
+    engine.load_api_keys()
+    if args.api_key and args.cse_id:
+        engine.set_api_keys(args.api_key, args.cse_id)
+    if not engine.has_api_keys():
+        parser.error("missing Google API credentials: pass --api-key/--cse-id, set "
+                     "GOOGLE_API_KEY/GOOGLE_CSE_ID or run the GUI once to create api_config.txt")
+
+    if args.quota:
+        for line in engine.API_KEY_POOL.status_lines():
+            print(line)
+        history = engine.quota_history()
+        if history:
+            print("Queries used per quota day (from 9:00):")
+            for day, count in list(history.items())[-QUOTA_HISTORY_SHOWN:]:
+                print(f"  {day}: {count}")
+        return 0
+
+    export_file = engine.PROSPECTS_FILE if args.excel else None
+    if args.enqueue or args.run_queue:
+        if args.enqueue and not args.queries:
+            parser.error("--enqueue requires --queries")
+        if args.queries:
+            if not 1 <= args.results <= engine.MAX_RESULTS_PER_QUERY:
+                parser.error(f"--results must be between 1 and {engine.MAX_RESULTS_PER_QUERY}")
+            queries = read_queries(args.queries)
+            if not queries:
+                parser.error("the queries file contains no search phrases")
+            lang_code, tld = engine.country_codes[args.country]
+            queries = filter_recent(queries, tld, args.skip_recent)
+            if queries:
+                engine.enqueue_job(queries, lang_code, tld, args.results, workers=args.workers,
+                                   crawl_depth=args.crawl_depth, crawl_pages=args.crawl_pages,
+                                   extract_workers=args.extract_workers, search_workers=args.search_workers)
+            else:
+                print("All queries were searched recently; nothing was queued.")
+        if args.run_queue:
+            engine.configure_search_rate(args.search_qps)
+            JobScheduler(run_job=lambda job: engine.run_job(job, export_file=export_file)).run_until_idle()
+            print("The job queue is empty.")
+        return 0
+
+    if args.resume:
+        # Atomowe przejęcie: zadanie wykonywane przez inny proces (GUI, --run-queue) nie jest wznawiane
+        job = get_job_journal().claim_unfinished_job()
+        if job is None:
+            print("There is no interrupted job to resume (jobs running in another process are skipped).",
+                  file=sys.stderr)
+            return 1
+        queries, lang_code, tld, num_results = job["queries"], job["lang_code"], job["tld"], job["num_results"]
+        job_id = job["id"]
+    else:
+        if not args.queries:
+            parser.error("--queries is required unless --resume is given")
+        if not 1 <= args.results <= engine.MAX_RESULTS_PER_QUERY:
+            parser.error(f"--results must be between 1 and {engine.MAX_RESULTS_PER_QUERY}")
+        queries = read_queries(args.queries)
+        if not queries:
+            parser.error("the queries file contains no search phrases")
+        lang_code, tld = engine.country_codes[args.country]
+        queries = filter_recent(queries, tld, args.skip_recent)
+        if not queries:
+            print("All queries were searched recently; nothing to do.")
+            return 0
+        num_results, job_id = args.results, None
+
+    engine.configure_search_rate(args.search_qps)
+    summary = engine.process_queries_and_links(
+        queries, lang_code, tld, num_results, job_id=job_id, workers=args.workers,
+        crawl_depth=args.crawl_depth, crawl_pages=args.crawl_pages, extract_workers=args.extract_workers,
+        search_workers=args.search_workers, export_file=export_file)
+
+    if args.output:
+        write_output(engine.job_results(summary["job_id"]), args.output)
+        summary["output"] = os.path.abspath(args.output)
+
+    print(json.dumps(summary, ensure_ascii=False))
+    # 2 = zadanie niedokończone (np. limit zapytań), można je wznowić przez --resume
+    return 0 if summary["completed"] else 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
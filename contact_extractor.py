@@ -0,0 +1,160 @@
+import re
+from urllib.parse import urljoin
+
+# =======================
+# Extraction Configuration
+# =======================
+# True - jednoprzebiegowy parser strumieniowy; False - pełne drzewo BeautifulSoup
+FAST_EXTRACTION = True
+
+EMAIL_RE = re.compile(r"[a-zA-Z0-9.\-+_]+@[a-zA-Z0-9.\-+_]+\.[a-zA-Z]{2,}", re.I)
+# Cały dopasowany numer, razem z ewentualnym prefiksem kraju (+48, 0048, +420); walidacja i format E.164 w postprocess.py
+PHONE_RE = re.compile(r"(?:(?:\+|00)\d{1,3}[\s-]?|\d{2}\s*)?(?:\d{3}[\s-]?\d{3}[\s-]?\d{3}|\d{9})")
+
+# Teksty w tych tagach BeautifulSoup pomija w get_text(), więc pomijamy je i tutaj
+HIDDEN_TEXT_TAGS = frozenset(["script", "style", "template", "rt", "rp"])
+
+
+def empty_contacts():
+    return {"emails": [], "phones": [], "description": "", "contact_links": []}
+
+
+def is_contact_link(href):
+    href = href.lower()
+    return "kontakt" in href or "contact" in href or "mailto:" in href
+
+
+def build_contacts(text, description, hrefs, base_url):
+    """Applies the email/phone regexes to page text and assembles the result row.
+
+    Emails and phones are raw candidates; postprocess.normalize_contacts validates and formats
+    them in bulk once the rows are stored.
+    """
+    contact_links = [urljoin(base_url, href) for href in hrefs if is_contact_link(href)]
+    return {
+        "emails": sorted(set(EMAIL_RE.findall(text))),
+        "phones": sorted(set(PHONE_RE.findall(text))),
+        "description": description,
+        "contact_links": contact_links
+    }
+
+
+# =======================
+# BeautifulSoup Extractor (reference)
+# =======================
+def extract_contacts_bs4(html, base_url):
+    """Extracts contact details from HTML by building a full BeautifulSoup tree."""
+    return extract_page_bs4(html, base_url)[0]
+
+
+def extract_page_bs4(html, base_url):
+    """BeautifulSoup variant of extract_page."""
+    if not html:
+        return empty_contacts(), []
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "lxml")
+    text = soup.get_text(" ", strip=True)
+
+    desc = ""
+    d = soup.find("meta", {"name": "description"}) or soup.find("meta", {"property": "og:description"})
+    if d and d.get("content"):
+        desc = d.get("content").strip()
+
+    hrefs = [a["href"] for a in soup.select("a[href]")]
+    return build_contacts(text, desc, hrefs, base_url), hrefs
+
+
+# =======================
+# Single-Pass Extractor
+# =======================
+class _ContactTarget:
+    """lxml parser target collecting text, meta descriptions and link hrefs without building a tree."""
+
+    def __init__(self):
+        self.strings = []
+        self.hrefs = []
+        self.meta_description = None
+        self.og_description = None
+        self._buffer = []
+        self._hidden_depth = 0
+
+    def _flush(self):
+        if self._buffer:
+            if not self._hidden_depth:
+                string = "".join(self._buffer).strip()
+                if string:
+                    self.strings.append(string)
+            self._buffer = []
+
+    def start(self, tag, attrib, nsmap=None):
+        self._flush()
+        if tag in HIDDEN_TEXT_TAGS:
+            self._hidden_depth += 1
+        elif tag == "meta":
+            if self.meta_description is None and attrib.get("name") == "description":
+                self.meta_description = dict(attrib)
+            elif self.og_description is None and attrib.get("property") == "og:description":
+                self.og_description = dict(attrib)
+        elif tag == "a":
+            href = attrib.get("href")
+            if href is not None:
+                self.hrefs.append(href)
+
+    def end(self, tag):
+        self._flush()
+        if tag in HIDDEN_TEXT_TAGS and self._hidden_depth:
+            self._hidden_depth -= 1
+
+    def data(self, data):
+        self._buffer.append(data)
+
+    def comment(self, text):
+        self._flush()
+
+    def pi(self, target, data=None):
+        self._flush()
+
+    def close(self):
+        self._flush()
+        return self
+
+
+def extract_contacts_fast(html, base_url):
+    """Extracts contact details in one streaming lxml pass (same output as extract_contacts_bs4)."""
+    return extract_page_fast(html, base_url)[0]
+
+
+def extract_page_fast(html, base_url):
+    """Single-pass variant of extract_page."""
+    if not html:
+        return empty_contacts(), []
+    # lxml ładowany przy pierwszej stronie (w procesie ekstrakcji), nie przy starcie GUI
+    from lxml import etree
+
+    target = _ContactTarget()
+    parser = etree.HTMLParser(target=target, strip_cdata=False, recover=True)
+    try:
+        parser.feed(html)
+        parser.close()
+    except etree.LxmlError:
+        target.close()
+
+    desc = ""
+    d = target.meta_description if target.meta_description is not None else target.og_description
+    if d is not None and d.get("content"):
+        desc = d.get("content").strip()
+
+    return build_contacts(" ".join(target.strings), desc, target.hrefs, base_url), target.hrefs
+
+
+def extract_contacts(html, base_url):
+    """Extracts contact details from HTML."""
+    return extract_page(html, base_url)[0]
+
+
+def extract_page(html, base_url):
+    """Returns (contact details, raw href values of all links) from one parse of the page."""
+    if FAST_EXTRACTION:
+        return extract_page_fast(html, base_url)
+    return extract_page_bs4(html, base_url)
@@ -0,0 +1,194 @@
+import heapq
+import itertools
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from urllib.parse import urldefrag, urljoin, urlparse
+
+from contact_extractor import empty_contacts
+from extraction_pool import record_extraction, safe_extract_page
+from fetcher import FETCH_WORKERS, fetch_page_with_requests
+from metrics import get_metrics
+from page_cache import get_page_cache, normalize_url
+from politeness import HostThrottle
+
+# =======================
+# Crawl Configuration
+# =======================
+# 0 = tylko strona z wyników Google; 1 = także podstrony linkowane ze strony głównej
+CRAWL_MAX_DEPTH = 1
+# Maksymalna liczba pobranych stron na domenę (łącznie ze stroną startową)
+CRAWL_MAX_PAGES = 4
+# Kończymy przeszukiwanie domeny, gdy znaleziono już adres e-mail
+CRAWL_STOP_ON_EMAIL = True
+
+# Linki zawierające te fragmenty są odwiedzane w pierwszej kolejności
+PRIORITY_KEYWORDS = ("kontakt", "contact", "impressum", "about", "o-nas", "onas", "o-firmie",
+                     "ueber-uns", "uber-uns", "about-us", "company", "firma")
+SKIPPED_EXTENSIONS = (".pdf", ".jpg", ".jpeg", ".png", ".gif", ".svg", ".webp", ".zip", ".rar",
+                      ".doc", ".docx", ".xls", ".xlsx", ".mp4", ".mp3", ".css", ".js")
+
+
+def link_priority(url):
+    """0 for contact/impressum/about-like links, 1 for any other page."""
+    lowered = url.lower()
+    return 0 if any(keyword in lowered for keyword in PRIORITY_KEYWORDS) else 1
+
+
+class DomainFrontier:
+    """Crawl state of one domain: prioritized queue of URLs, visited set and merged contacts."""
+
+    def __init__(self, start_url, query, domain):
+        self.start_url = start_url
+        self.query = query
+        self.domain = domain
+        self.visited = {normalize_url(start_url)}
+        self.pages_fetched = 0
+        self.pages_failed = 0
+        self.emails = set()
+        self.phones = set()
+        self.description = ""
+        self.contact_links = []
+        self._queue = []
+        self._order = itertools.count()
+
+    def push(self, url, depth):
+        key = normalize_url(url)
+        if key in self.visited:
+            return
+        self.visited.add(key)
+        heapq.heappush(self._queue, (link_priority(url), depth, next(self._order), url))
+
+    def pop(self):
+        if not self._queue:
+            return None
+        _, depth, _, url = heapq.heappop(self._queue)
+        return url, depth
+
+    def merge(self, contacts):
+        self.pages_fetched += 1
+        self.emails.update(contacts["emails"])
+        self.phones.update(contacts["phones"])
+        if not self.description:
+            self.description = contacts["description"]
+        for link in contacts["contact_links"]:
+            if link not in self.contact_links:
+                self.contact_links.append(link)
+
+    def result(self):
+        return {
+            "emails": sorted(self.emails),
+            "phones": sorted(self.phones),
+            "description": self.description,
+            "contact_links": list(self.contact_links),
+            "pages_crawled": self.pages_fetched,
+        }
+
+
+def crawlable_links(hrefs, base_url, domain, domain_of):
+    """Absolute http(s) links from a page that stay within the same registrable domain."""
+    links = []
+    for href in hrefs:
+        href = href.strip()
+        if not href or href.startswith(("mailto:", "tel:", "javascript:", "#")):
+            continue
+        url = urldefrag(urljoin(base_url, href))[0]
+        parsed = urlparse(url)
+        if parsed.scheme not in ("http", "https") or parsed.path.lower().endswith(SKIPPED_EXTENSIONS):
+            continue
+        if domain_of(url) == domain:
+            links.append(url)
+    return links
+
+
+def crawl_domains(start_links, domain_of, workers=FETCH_WORKERS, throttle=None, use_cache=True,
+                  max_depth=CRAWL_MAX_DEPTH, max_pages=CRAWL_MAX_PAGES, stop_on_email=CRAWL_STOP_ON_EMAIL,
+                  extract_pool=None):
+    """Crawls each start URL's domain and yields (start_url, merged contacts) as each domain finishes.
+
+    A domain whose start page could not be fetched (error, host skipped by the circuit breaker, not
+    an HTML page) yields (start_url, None). start_links maps start URL -> query. Pages of one domain are fetched one after another (with the
+    per-host politeness delay); different domains run in parallel on the worker pool. When
+    extract_pool (a ProcessPoolExecutor) is given, pages are parsed there instead of on this thread.
+    """
+    throttle = throttle or HostThrottle()
+    cache = get_page_cache() if use_cache else None
+
+    def fetch(frontier, url, depth):
+        html = cache.get_fresh(url) if cache else None
+        if html is None:
+            if throttle.wait(url):
+                html = fetch_page_with_requests(url, use_cache=use_cache, throttle=throttle)
+        else:
+            get_metrics().cache("fetch", True)
+        return frontier, url, depth, html
+
+    frontiers = iter(DomainFrontier(url, query, domain_of(url)) for url, query in start_links.items())
+    with ThreadPoolExecutor(max_workers=max(1, int(workers))) as pool:
+        in_flight = set()
+        # Zadania parsowania w puli procesów: future -> (frontier, url, depth)
+        parsing = {}
+
+        # Najpierw zapełniamy pulę stronami startowymi kolejnych domen
+        def start_next_domain():
+            frontier = next(frontiers, None)
+            if frontier is not None:
+                in_flight.add(pool.submit(fetch, frontier, frontier.start_url, 0))
+
+        for _ in range(max(1, int(workers)) * 2):
+            start_next_domain()
+
+        while in_flight:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                in_flight.discard(future)
+                frontier, url, depth = parsing.pop(future, (None, None, None))
+                contacts = timing = None
+                if frontier is None:
+                    frontier, url, depth, html = future.result()
+                    if not html and depth == 0:
+                        # Strona startowa niepobrana - domena nie jest zapisywana, tylko ponawiana
+                        yield frontier.start_url, None
+                        start_next_domain()
+                        continue
+                    if not html:
+                        frontier.pages_failed += 1
+                    elif extract_pool is not None:
+                        try:
+                            parse = extract_pool.submit(safe_extract_page, html, url)
+                        except BrokenProcessPool as e:
+                            # Martwa pula procesów - kolejne strony parsujemy w tym wątku
+                            print(f"Extraction pool is broken ({e}); parsing on the crawler thread")
+                            extract_pool = None
+                            contacts, hrefs, timing = safe_extract_page(html, url)
+                        else:
+                            parsing[parse] = (frontier, url, depth)
+                            in_flight.add(parse)
+                            continue
+                    else:
+                        contacts, hrefs, timing = safe_extract_page(html, url)
+                else:
+                    try:
+                        contacts, hrefs, timing = future.result()
+                    except Exception as e:
+                        # Np. BrokenProcessPool po śmierci procesu - jak w extract_concurrently
+                        print(f"Error extracting {url}: {e}")
+                        contacts, hrefs = empty_contacts(), []
+
+                if contacts is not None:
+                    if timing is not None:
+                        record_extraction(timing)
+                    frontier.merge(contacts)
+                    if depth < max_depth:
+                        for link in crawlable_links(hrefs, url, frontier.domain, domain_of):
+                            frontier.push(link, depth + 1)
+
+                next_page = None
+                attempts = frontier.pages_fetched + frontier.pages_failed
+                if attempts < max_pages and not (stop_on_email and frontier.emails):
+                    next_page = frontier.pop()
+
+                if next_page is not None:
+                    in_flight.add(pool.submit(fetch, frontier, *next_page))
+                else:
+                    yield frontier.start_url, frontier.result()
+                    start_next_domain()
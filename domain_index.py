@@ -0,0 +1,140 @@
+import hashlib
+import math
+import os
+import struct
+import threading
+
+# =======================
+# Domain Index Configuration
+# =======================
+DOMAIN_INDEX_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Search_Results", "domains.bloom")
+# Rozmiar filtra: liczba domen i dopuszczalny odsetek fałszywych trafień (1M domen ~ 1,8 MB)
+DOMAIN_INDEX_CAPACITY = 1_000_000
+DOMAIN_INDEX_ERROR_RATE = 0.001
+
+_MAGIC = b"CFBLOOM2"
+# magic, capacity, error rate, number of added items, number of hash functions, tag
+_HEADER = struct.Struct("<8sQdQII")
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings: O(1) add and membership test, no false negatives."""
+
+    def __init__(self, capacity=DOMAIN_INDEX_CAPACITY, error_rate=DOMAIN_INDEX_ERROR_RATE, tag=0):
+        self.capacity = max(1, int(capacity))
+        # Dowolna liczba zapisywana z filtrem, np. wersja reguł, według których liczono elementy
+        self.tag = tag
+        self.error_rate = error_rate
+        self.num_bits = max(8, int(-self.capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.num_hashes = max(1, round(self.num_bits / self.capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.num_bits + 7) // 8)
+
+    def _positions(self, item):
+        # Podwójne haszowanie (Kirsch-Mitzenmacher): k pozycji z jednego skrótu blake2b
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def add(self, item):
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item):
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+    def is_full(self):
+        return self.count >= self.capacity
+
+    def save(self, path):
+        """Writes the filter to a temporary file and renames it over path."""
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(_HEADER.pack(_MAGIC, self.capacity, self.error_rate, self.count, self.num_hashes, self.tag))
+            f.write(self._bits)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """Reads a filter saved by save(); returns None if the file is missing or not a filter."""
+        try:
+            with open(path, "rb") as f:
+                header = f.read(_HEADER.size)
+                bits = f.read()
+        except FileNotFoundError:
+            return None
+        if len(header) < _HEADER.size:
+            return None
+        magic, capacity, error_rate, count, num_hashes, tag = _HEADER.unpack(header)
+        bloom = cls(capacity, error_rate, tag)
+        if magic != _MAGIC or num_hashes != bloom.num_hashes or len(bits) != len(bloom._bits):
+            return None
+        bloom._bits[:] = bits
+        bloom.count = count
+        return bloom
+
+
+class HarvestedDomains:
+    """Persistent index of domains already saved in the result store.
+
+    A Bloom filter answers "never harvested" in O(1) without touching the database; its rare
+    positives are confirmed against the store's unique domain index, so no new lead is dropped
+    because of a false positive. The filter is rebuilt from the store whenever its item count
+    disagrees with the store (e.g. after a crash before save()), the store's domain rules changed,
+    or it outgrows its capacity.
+    """
+
+    def __init__(self, store, path=DOMAIN_INDEX_FILE, capacity=DOMAIN_INDEX_CAPACITY):
+        self.store = store
+        self.path = path
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._version = store.domain_version()
+        stored = store.count_domains()
+        bloom = BloomFilter.load(path)
+        if bloom is None or bloom.count != stored or bloom.tag != self._version or stored > bloom.capacity:
+            bloom = self._rebuild(max(capacity, stored * 2))
+        self._bloom = bloom
+
+    def _rebuild(self, capacity):
+        bloom = BloomFilter(capacity, tag=self._version)
+        for domain in self.store.iter_domains():
+            bloom.add(domain)
+        print(f"Built the harvested-domain index ({bloom.count} domains)")
+        self._dirty = True
+        return bloom
+
+    def __contains__(self, domain):
+        with self._lock:
+            maybe = domain in self._bloom
+        return maybe and self.store.has_domain(domain)
+
+    def add(self, domain):
+        """Records a domain that was just saved to the store."""
+        with self._lock:
+            self._bloom.add(domain)
+            if self._bloom.is_full():
+                self._bloom = self._rebuild(self._bloom.capacity * 2)
+            self._dirty = True
+
+    def save(self):
+        with self._lock:
+            if self._dirty:
+                self._bloom.save(self.path)
+                self._dirty = False
+
+
+_domain_index = None
+_domain_index_lock = threading.Lock()
+
+
+def get_domain_index(store):
+    """Returns the shared harvested-domain index for the result store, loading it on first use."""
+    global _domain_index
+    if _domain_index is None:
+        with _domain_index_lock:
+            if _domain_index is None:
+                _domain_index = HarvestedDomains(store)
+    return _domain_index
@@ -0,0 +1,584 @@
+import importlib
+import os
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from api_cache import get_api_cache
+from api_keys import KEY_FAILOVER_STATUSES, ApiKeyPool, parse_api_config, write_api_config
+from crawler import CRAWL_MAX_PAGES, crawl_domains
+from domain_index import get_domain_index
+from exporter import export_store
+from extraction_pool import EXTRACT_WORKERS, create_extract_pool, extract_concurrently
+from fetcher import FETCH_WORKERS, fetch_pages_concurrently
+from http_client import REQUEST_TIMEOUT, get_session
+from job_journal import JOB_QUEUED, LINK_DONE, LINK_FAILED, LINK_MAX_ATTEMPTS, get_job_journal
+from metrics import METRICS_JSONL_FILE, error_kind, get_metrics, reset_metrics
+from page_cache import get_page_cache
+from public_suffix import registrable_domain_of_url
+from rate_limit import TokenBucket
+from result_store import PROSPECTS_FILE, get_result_store
+from search_history import RECENT_SEARCH_DAYS, get_search_history
+
+# =======================
+# API and Limit Configuration
+# =======================
+MAX_RESULTS_PER_QUERY = 100
+GOOGLE_API_URL = "https://www.googleapis.com/customsearch/v1"
+# Ostrzeżenie, gdy w całej puli zostanie tyle procent dziennego limitu
+QUOTA_WARNING_SHARE = 0.3
+# Równoległe zapytania do Custom Search i ich tempo (zapytania na sekundę, z krótkim "burstem")
+SEARCH_WORKERS = 4
+SEARCH_QPS = 1.0
+SEARCH_BURST = 3
+# Ciężkie zależności ładowane leniwie; GUI importuje je w tle zaraz po pokazaniu okna
+WARM_UP_MODULES = ("requests", "lxml.etree", "postprocess", "openpyxl")
+
+# =======================
+# Global Variables for API Keys (will be populated on load or input)
+# =======================
+GLOBAL_API_KEY = ""
+GLOBAL_CSE_ID = ""
+API_KEY_POOL = ApiKeyPool([])
+# Funkcje callback(used, capacity) wywoływane po każdej zmianie licznika zapytań puli
+_quota_observers = []
+
+
+# =======================
+# Working Folder
+# =======================
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+OUTPUT_DIR = os.path.join(BASE_DIR, "Search_Results")
+os.makedirs(OUTPUT_DIR, exist_ok=True)
+
+# Country List and Codes (Country Name: (language_code, tld))
+country_codes = {
+    "Poland": ("pl", "pl"), "Germany": ("de", "de"), "United Kingdom": ("en", "uk"),
+    "France": ("fr", "fr"), "Spain": ("es", "es"), "Italy": ("it", "it"),
+    "Netherlands": ("nl", "nl"), "Belgium": ("nl", "be"), "Sweden": ("sv", "se"),
+    "Norway": ("no", "no"), "Denmark": ("da", "dk"), "Finland": ("fi", "fi"),
+    "Switzerland": ("de", "ch"), "Austria": ("de", "at"), "Portugal": ("pt", "pt"),
+    "Ireland": ("en", "ie"), "Greece": ("el", "gr"), "Czech Republic": ("cs", "cz"),
+    "Slovakia": ("sk", "sk"), "Hungary": ("hu", "hu"), "Romania": ("ro", "ro"),
+    "Bulgaria": ("bg", "bg"), "Croatia": ("hr", "hr"), "Serbia": ("sr", "rs"),
+    "Ukraine": ("uk", "ua"), "Lithuania": ("lt", "lt"), "Latvia": ("lv", "lv"),
+    "Estonia": ("et", "ee"), "Slovenia": ("sl", "si"), "Iceland": ("is", "is"),
+    "Albania": ("sq", "al"), "Bosnia and Herzegovina": ("bs", "ba"), "Kosovo": ("sq", "xk"),
+    "North Macedonia": ("mk", "mk"), "Moldova": ("ro", "md"), "Montenegro": ("sr", "me")
+}
+
+
+# =======================
+# Pipeline Events
+# =======================
+class PipelineListener:
+    """Receives progress events from the pipeline. The default implementation logs to stdout."""
+
+    def status(self, text):
+        print(text)
+
+    def progress(self, value, maximum):
+        pass
+
+    def query_count(self, used, capacity):
+        pass
+
+    def info(self, title, message):
+        print(f"{title}: {message}")
+
+    def warning(self, title, message):
+        print(f"WARNING - {title}: {message}")
+
+    def error(self, title, message):
+        print(f"ERROR - {title}: {message}")
+
+    def history_changed(self):
+        pass
+
+
+# =======================
+# Key Persistence Functions
+# =======================
+def save_api_keys(api_key, cse_id):
+    """Saves API keys to a local file."""
+    try:
+        write_api_config([(api_key, cse_id)])
+        return True
+    except Exception as e:
+        print(f"Error saving API keys: {e}")
+        return False
+
+def load_api_keys():
+    """Loads the key pool from a local file and sets global variables (first pair = primary key)."""
+    pairs = parse_api_config()
+    set_api_key_pool(pairs)
+    return {"API_KEY": GLOBAL_API_KEY, "CSE_ID": GLOBAL_CSE_ID}
+
+
+def set_api_key_pool(pairs):
+    """Replaces the pool of (api_key, cse_id) pairs used by search_with_api."""
+    global GLOBAL_API_KEY, GLOBAL_CSE_ID, API_KEY_POOL
+    GLOBAL_API_KEY, GLOBAL_CSE_ID = pairs[0] if pairs else ("", "")
+    API_KEY_POOL = ApiKeyPool(pairs)
+    for callback in _quota_observers:
+        API_KEY_POOL.subscribe(callback)
+
+
+def set_api_keys(api_key, cse_id):
+    """Uses a single API key / CSE ID pair."""
+    set_api_key_pool([(api_key, cse_id)])
+
+
+def has_api_keys():
+    return len(API_KEY_POOL) > 0
+
+
+# =======================
+# Helper Functions (Query Counter, History, etc.)
+# =======================
+def get_query_count():
+    """Queries used today across the whole key pool."""
+    return API_KEY_POOL.used()
+
+
+def quota_status():
+    """Returns (used, capacity) for today across the whole key pool."""
+    return API_KEY_POOL.used(), API_KEY_POOL.capacity()
+
+
+def quota_remaining():
+    """Queries still available today on the keys that are not disabled."""
+    return API_KEY_POOL.remaining()
+
+
+def add_quota_observer(callback):
+    """Calls callback(used, capacity) whenever the pool's query counter changes (also after a key reload)."""
+    _quota_observers.append(callback)
+    API_KEY_POOL.subscribe(callback)
+
+
+def quota_history():
+    """Returns {quota_day: queries used} across the key pool, oldest first."""
+    return API_KEY_POOL.history()
+
+
+def record_search_history(job_id, queries, lang_code, tld, num_results):
+    """Adds a new job's queries to the search history."""
+    get_search_history().record_job(job_id, queries, lang_code, tld, num_results)
+
+
+def recently_searched(queries, tld, days=RECENT_SEARCH_DAYS):
+    """{query: last history row} for queries already searched for this country in the last days.
+
+    Worth checking before a run: repeating them spends API quota once the API cache has expired.
+    """
+    return get_search_history().recent_searches(queries, tld, days)
+
+
+def get_domain_from_url(url):
+    """Extracts the registrable domain from the given URL (firma.com.pl, not com.pl)."""
+    return registrable_domain_of_url(url)
+
+
+# =======================
+# Scraping Functions
+# =======================
+warning_displayed = False
+
+
+class SeenDomains:
+    """Thread-safe set of domains already returned in this run, shared by parallel searches."""
+
+    def __init__(self, domains=()):
+        self._domains = set(domains)
+        self._lock = threading.Lock()
+
+    def add_all(self, domains):
+        """Adds the domains and returns the ones that were not seen before."""
+        with self._lock:
+            new = set(domains) - self._domains
+            self._domains |= new
+        return new
+
+
+_search_rate_limiter = TokenBucket(SEARCH_QPS, SEARCH_BURST)
+
+
+def configure_search_rate(qps=SEARCH_QPS, burst=SEARCH_BURST):
+    """Replaces the process-wide Custom Search rate limit."""
+    global _search_rate_limiter
+    _search_rate_limiter = TokenBucket(qps, burst)
+
+
+def search_with_api(query, lang_code, num_results, tld, listener=None, seen_domains=None, rate_limiter=None):
+    """Searches for links on Google using the API, spreading pages across the key pool.
+
+    Paging stops early when a page has fewer than 10 items or only domains already in seen_domains.
+    Billed calls are paced by the shared token bucket instead of a fixed sleep.
+    """
+    listener = listener or PipelineListener()
+    rate_limiter = rate_limiter or _search_rate_limiter
+    seen_domains = seen_domains if seen_domains is not None else SeenDomains()
+
+    if not has_api_keys():
+        listener.error("Błąd API", "Brak kluczy Google API Key i CSE ID.")
+        return []
+
+    links = []
+    queries_to_make = (num_results + 9) // 10
+    start_indexes = [i * 10 + 1 for i in range(queries_to_make)]
+
+    # Strony zapisane w cache nie zużywają dziennego limitu
+    api_cache = get_api_cache()
+    pool = API_KEY_POOL
+    if pool.remaining() == 0 and not all(api_cache.is_cached(query, tld, lang_code, start_index)
+                                         for start_index in start_indexes):
+        listener.error("Query Limit", "Daily limit of API queries reached for all keys.")
+        return None
+
+    # None oznacza, że zapytanie nie zostało dokończone (limit lub błąd) i można je wznowić
+    completed = True
+    session = get_session()
+    for start_index in start_indexes:
+        results = api_cache.get(query, tld, lang_code, start_index)
+        get_metrics().cache("search", results is not None)
+        if results is not None:
+            print(f"API cache hit for '{query}' (start={start_index}), no query used.")
+        else:
+            results = fetch_search_page(session, query, lang_code, tld, start_index, rate_limiter, listener)
+            if results is None:
+                completed = False
+                break
+            api_cache.store(query, tld, lang_code, start_index, results)
+
+        items = results.get('items', [])
+        for item in items:
+            links.append({"query": query, "url": item['link']})
+
+        # Kolejna strona nie ma sensu, gdy ta była niepełna lub nie wniosła nowych domen
+        new_domains = seen_domains.add_all(get_domain_from_url(item['link']) for item in items)
+        if len(items) < 10 or not new_domains:
+            break
+
+    return links if completed else None
+
+
+def fetch_search_page(session, query, lang_code, tld, start_index, rate_limiter, listener):
+    """Makes one billed Custom Search call, failing over between keys. Returns the JSON or None."""
+    global warning_displayed
+    # requests jest już załadowany przez get_session(); import lokalny, by engine nie ładował go przy starcie GUI
+    import requests
+
+    pool = API_KEY_POOL
+    while True:
+        key = pool.reserve()
+        if key is None:
+            listener.error("Query Limit", "Dzienny limit API queries osiągnięty dla wszystkich kluczy.")
+            return None
+        params = {"key": key.api_key, "cx": key.cse_id, "q": query,
+                  "gl": tld, "hl": lang_code, "start": start_index}
+
+        metrics = get_metrics()
+        start = time.perf_counter()
+        rate_limiter.acquire()
+        metrics.observe("search_wait", time.perf_counter() - start)
+        start = time.perf_counter()
+        try:
+            # Wspólna sesja utrzymuje ciepłe połączenia z googleapis.com
+            response = session.get(GOOGLE_API_URL, params=params, timeout=REQUEST_TIMEOUT)
+            metrics.observe("search", time.perf_counter() - start, len(response.content))
+            if response.status_code in KEY_FAILOVER_STATUSES:
+                # Limit lub brak uprawnień dla tego klucza - przechodzimy na następny
+                metrics.error("search", f"HTTP {response.status_code}")
+                pool.refund(key)
+                pool.disable(key, f"(HTTP {response.status_code})")
+                continue
+            response.raise_for_status()
+            results = response.json()
+        except (requests.exceptions.RequestException, ValueError) as e:
+            metrics.error("search", error_kind(e))
+            pool.refund(key)
+            print(f"Error during API query for '{query}': {e}")
+            return None
+
+        used, capacity = pool.used(), pool.capacity()
+        listener.query_count(used, capacity)
+
+        remaining = pool.remaining()
+        if remaining <= capacity * QUOTA_WARNING_SHARE and not warning_displayed:
+            listener.warning("Uwaga: Limit Zapytania", f"Zostało {remaining} zapytań.")
+            warning_displayed = True
+        return results
+
+
+# =======================
+# Pipeline
+# =======================
+def process_queries_and_links(queries, lang_code, tld, num_results_to_get, job_id=None,
+                              workers=FETCH_WORKERS, listener=None, export_file=None,
+                              crawl_depth=0, crawl_pages=CRAWL_MAX_PAGES, extract_workers=EXTRACT_WORKERS,
+                              search_workers=SEARCH_WORKERS):
+    """Runs search -> fetch -> extract -> save for one job. Pass job_id to resume a job.
+
+    With crawl_depth > 0 each domain is crawled (contact/impressum/about pages first, at most
+    crawl_pages pages) and its emails and phones are merged into one row. HTML is parsed on a pool
+    of extract_workers processes (0 parses on the pipeline thread). Up to search_workers queries are
+    searched at the same time, sharing the SEARCH_QPS rate limit. The whole store is exported to
+    export_file only when one is given; otherwise export_prospects() does it on demand.
+
+    Returns a summary dict: job_id, new_records, total_records, export_file, completed.
+    """
+    global warning_displayed
+    listener = listener or PipelineListener()
+    warning_displayed = False
+    reset_metrics()
+
+    journal = get_job_journal()
+    if job_id is None:
+        job_id = journal.create_job(queries, lang_code, tld, num_results_to_get)
+        record_search_history(job_id, queries, lang_code, tld, num_results_to_get)
+        listener.history_changed()
+        print(f"Started job #{job_id}")
+    else:
+        print(f"Resuming job #{job_id}")
+
+    # Dzierżawa: inny proces (GUI, cli.py) nie wznowi tego zadania, dopóki ten przebieg trwa
+    with journal.lease(job_id):
+        return _run_job_steps(job_id, lang_code, tld, num_results_to_get, listener, workers=workers,
+                              export_file=export_file, crawl_depth=crawl_depth, crawl_pages=crawl_pages,
+                              extract_workers=extract_workers, search_workers=search_workers)
+
+
+def _run_job_steps(job_id, lang_code, tld, num_results_to_get, listener, workers, export_file,
+                   crawl_depth, crawl_pages, extract_workers, search_workers):
+    """Steps 1-3 of process_queries_and_links for a journal job leased to this process."""
+    journal = get_job_journal()
+    metrics = get_metrics()
+
+    # --- Step 1: Search Links ---
+    listener.status("⏳ Searching for links...")
+    for line in API_KEY_POOL.status_lines():
+        print(line)
+    pending_queries = journal.pending_queries(job_id)
+    listener.progress(0, len(pending_queries))
+
+    # Domeny z linków zebranych wcześniej w tym zadaniu (wznowienie) też liczą się jako znane
+    searched_domains = SeenDomains(get_domain_from_url(link['url']) for link in journal.links(job_id))
+    with ThreadPoolExecutor(max_workers=max(1, int(search_workers))) as search_pool:
+        searches = {
+            search_pool.submit(search_with_api, query, lang_code, num_results_to_get, tld,
+                               listener=listener, seen_domains=searched_domains): (position, query)
+            for position, query in pending_queries
+        }
+        for idx, future in enumerate(as_completed(searches)):
+            position, query = searches[future]
+            links = future.result()
+            if links is None:
+                print(f"Query '{query}' was not completed; it will be retried when the job is resumed.")
+            else:
+                journal.record_search(job_id, position, links)
+
+            listener.progress(idx + 1, len(pending_queries))
+
+    print(get_api_cache().stats_summary())
+
+    # Filtrowanie domen na pełnej liście linków zadania (także z poprzednich przebiegów)
+    store = get_result_store(domain_of=get_domain_from_url)
+    harvested = get_domain_index(store)
+    done_urls = {link["url"] for link in journal.links(job_id, LINK_DONE)}
+    # Strony porzucone po LINK_MAX_ATTEMPTS próbach nie blokują innych linków z tej samej domeny
+    failed_urls = {link["url"] for link in journal.links(job_id, LINK_FAILED)}
+    seen_domains = set()
+    link_queries = {}
+    known_domains = 0
+
+    for link in journal.links(job_id):
+        if link["url"] in failed_urls:
+            continue
+        domain = get_domain_from_url(link['url'])
+        if not domain or domain in seen_domains:
+            continue
+        seen_domains.add(domain)
+        if link["url"] in done_urls:
+            continue
+        # Domeny zapisane w poprzednich przebiegach nie są ponownie pobierane ani parsowane
+        if domain in harvested:
+            known_domains += 1
+            continue
+        link_queries[link["url"]] = link["query"]
+
+    if done_urls:
+        print(f"Skipping {len(done_urls)} pages already processed in this job.")
+    if known_domains:
+        print(f"Skipping {known_domains} domains already harvested in earlier runs.")
+
+    # --- Step 2: Fetch Pages and Extract Contacts ---
+    listener.status("⏳ Fetching pages and extracting contacts...")
+    listener.progress(0, len(link_queries))
+
+    # Każdy wiersz trafia do bazy od razu, więc awaria nie kasuje wyników całego przebiegu
+    new_records = 0
+    failed_pages = 0
+    retry_pages = 0
+    leads_by_query = Counter()
+
+    extract_pool = create_extract_pool(extract_workers) if extract_workers and link_queries else None
+    try:
+        if crawl_depth > 0:
+            print(f"Crawling {len(link_queries)} domains (depth {crawl_depth}, up to {crawl_pages} pages each) "
+                  f"with {workers} workers...")
+            results = crawl_domains(link_queries, get_domain_from_url, workers=workers,
+                                    max_depth=crawl_depth, max_pages=crawl_pages, extract_pool=extract_pool)
+        else:
+            print(f"Fetching {len(link_queries)} pages with {workers} workers, "
+                  f"parsing with {extract_workers or 'no'} extractor processes...")
+            results = extract_concurrently(fetch_pages_concurrently(link_queries, workers=workers),
+                                           workers=extract_workers, pool=extract_pool)
+
+        for idx, (url, info) in enumerate(results):
+            if info is None:
+                # Strona niepobrana: bez wiersza i bez blokady domeny, link zostaje do ponowienia
+                failed_pages += 1
+                if journal.mark_link_failed(job_id, url):
+                    retry_pages += 1
+                listener.progress(idx + 1, len(link_queries))
+                continue
+            domain = get_domain_from_url(url)
+            with metrics.timer("save"):
+                added = store.add({"query": link_queries[url], "url": url, **info}, domain=domain, tld=tld)
+            if added:
+                new_records += 1
+                leads_by_query[link_queries[url]] += 1
+                if domain:
+                    harvested.add(domain)
+            journal.mark_link_done(job_id, url)
+            listener.progress(idx + 1, len(link_queries))
+    finally:
+        harvested.save()
+        get_search_history().add_leads(job_id, leads_by_query)
+        if extract_pool is not None:
+            extract_pool.shutdown(wait=True, cancel_futures=True)
+
+    if failed_pages:
+        print(f"{failed_pages} pages could not be fetched and were not saved; {retry_pages} of them will be "
+              f"retried when the job is resumed, the rest were given up after {LINK_MAX_ATTEMPTS} attempts.")
+
+    # Strony starsze niż 4x TTL i tak byłyby pobrane od nowa - bez czyszczenia cache rośnie bez końca
+    purged = get_page_cache().purge_expired()
+    if purged:
+        print(f"Removed {purged} expired pages from the page cache.")
+
+    # Walidacja, format E.164 i deduplikacja kontaktów jednym przebiegiem na wszystkich nowych wierszach
+    # (postprocess ciągnie pandas/numpy - ładowany dopiero tutaj)
+    from postprocess import normalize_store
+
+    with metrics.timer("postprocess"):
+        normalized = normalize_store(store)
+    if normalized:
+        print(f"Normalized emails and phones of {normalized} records.")
+    # Historia pokazuje liczbę leadów z każdego zapytania
+    listener.history_changed()
+
+    # --- Step 3: Export to Excel (tylko na żądanie) ---
+    # Pełny eksport rośnie z bazą, więc nie jest wykonywany po każdym przebiegu
+    total_records = store.count()
+    if export_file:
+        try:
+            with metrics.timer("export"):
+                total_records = export_store(store, export_file)["rows"]
+            listener.info("Finished", f"Added {new_records} new records ({total_records} total) to:\n{export_file}")
+        except Exception as e:
+            listener.error("Save Error", f"An error occurred while saving the file: {e}")
+    else:
+        listener.info("Finished", f"Added {new_records} new records ({total_records} total). "
+                                  "Use \"Open .xlsx File\" to export them.")
+
+    # Zadanie z niepobranymi stronami (poniżej limitu prób) zostaje niedokończone - wznowienie je ponowi
+    pending_queries = journal.pending_queries(job_id)
+    completed = not pending_queries and not retry_pages
+    if completed:
+        journal.finish_job(job_id)
+    elif pending_queries:
+        print(f"Job #{job_id} has unfinished queries - resume it to continue.")
+    else:
+        print(f"Job #{job_id} has pages to retry - resume it to continue.")
+
+    for line in metrics.summary_lines():
+        print(line)
+    try:
+        metrics.write_jsonl(job_id=job_id, new_records=new_records, completed=completed)
+        metrics.write_prometheus()
+    except OSError as e:
+        print(f"Could not write metrics: {e}")
+
+    listener.status("✅ Ready!")
+    return {
+        "job_id": job_id,
+        "new_records": new_records,
+        "total_records": total_records,
+        "export_file": export_file,
+        "completed": completed,
+        "metrics_file": METRICS_JSONL_FILE,
+    }
+
+
+# =======================
+# Job Queue
+# =======================
+# Ustawienia przebiegu zapisywane razem z zadaniem w kolejce
+JOB_OPTIONS = ("workers", "crawl_depth", "crawl_pages", "extract_workers", "search_workers")
+
+
+def enqueue_job(queries, lang_code, tld, num_results_to_get, listener=None, **options):
+    """Adds a job to the persistent queue; scheduler.JobScheduler runs it when quota allows.
+
+    options are process_queries_and_links settings stored with the job (see JOB_OPTIONS).
+    Returns the job id.
+    """
+    unknown = set(options) - set(JOB_OPTIONS)
+    if unknown:
+        raise TypeError(f"Unsupported job options: {', '.join(sorted(unknown))}")
+    listener = listener or PipelineListener()
+    job_id = get_job_journal().create_job(queries, lang_code, tld, num_results_to_get,
+                                          status=JOB_QUEUED, options=options)
+    record_search_history(job_id, queries, lang_code, tld, num_results_to_get)
+    listener.history_changed()
+    print(f"Queued job #{job_id} ({len(queries)} queries)")
+    return job_id
+
+
+def run_job(job, listener=None, export_file=None):
+    """Runs or continues a journal job with the settings stored when it was queued."""
+    options = {key: value for key, value in job.get("options", {}).items() if key in JOB_OPTIONS}
+    return process_queries_and_links(job["queries"], job["lang_code"], job["tld"], job["num_results"],
+                                     job_id=job["id"], listener=listener, export_file=export_file, **options)
+
+
+def export_prospects(path=PROSPECTS_FILE, partition_by=None, split_files=False):
+    """Exports every stored row on demand ("Open .xlsx File", cli.py --export). Returns {"rows", "files"}."""
+    store = get_result_store(domain_of=get_domain_from_url)
+    return export_store(store, path, partition_by=partition_by, split_files=split_files)
+
+
+def job_results(job_id):
+    """Returns the stored contact rows for the pages processed by a job."""
+    urls = [link["url"] for link in get_job_journal().links(job_id, LINK_DONE)]
+    return get_result_store(domain_of=get_domain_from_url).to_dataframe(urls=urls)
+
+
+# =======================
+# Startup
+# =======================
+def warm_up_imports(modules=WARM_UP_MODULES):
+    """Imports the lazily loaded dependencies in a background thread, so the first search does not wait for them."""
+    def warm_up():
+        for name in modules:
+            try:
+                importlib.import_module(name)
+            except ImportError as e:
+                print(f"Could not preload {name}: {e}")
+
+    thread = threading.Thread(target=warm_up, name="warm-up-imports", daemon=True)
+    thread.start()
+    return thread
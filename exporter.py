@@ -0,0 +1,261 @@
+import csv
+import json
+import os
+import re
+
+from result_store import CONTACT_COLUMNS, LIST_COLUMNS, LIST_SEPARATOR, PARTITIONS
+
+# =======================
+# Export Configuration
+# =======================
+# Wiersze czytane z bazy (i zapisywane do Parquet) w jednej paczce
+EXPORT_BATCH_ROWS = 5000
+EXPORT_FORMATS = {".xlsx": "xlsx", ".csv": "csv", ".parquet": "parquet"}
+PARTITION_CHOICES = [key for key in PARTITIONS if key]
+# Limity Excela: wiersze arkusza (bez nagłówka), znaki w komórce i w nazwie arkusza
+EXCEL_MAX_ROWS = 1048575
+EXCEL_MAX_CELL_CHARS = 32767
+EXCEL_SHEET_NAME_CHARS = 31
+EXCEL_SHEET_INVALID_RE = re.compile(r"[\[\]:*?/\\]")
+FILE_NAME_INVALID_RE = re.compile(r"[^\w.\-]+")
+# Nazwa partycji bez wartości (np. wiersze sprzed zapisywania kraju)
+EMPTY_PARTITION = "unknown"
+LIST_INDEXES = [CONTACT_COLUMNS.index(column) for column in LIST_COLUMNS]
+
+
+def export_format(path):
+    """'xlsx', 'csv' or 'parquet', from the file extension."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {extension or path} (use .xlsx, .csv or .parquet)")
+    return EXPORT_FORMATS[extension]
+
+
+def flat_row(row):
+    """Row with list columns (JSON text in the store) joined by LIST_SEPARATOR."""
+    row = list(row)
+    for index in LIST_INDEXES:
+        value = row[index]
+        if value and value.startswith("["):
+            row[index] = LIST_SEPARATOR.join(json.loads(value))
+    return row
+
+
+def list_row(row):
+    """Row with list columns decoded to Python lists (for Parquet list columns)."""
+    row = list(row)
+    for index in LIST_INDEXES:
+        value = row[index]
+        if not value:
+            row[index] = []
+        elif value.startswith("["):
+            row[index] = json.loads(value)
+        else:
+            row[index] = [item for item in value.split(LIST_SEPARATOR) if item]
+    return row
+
+
+def partition_path(path, partition, used=None):
+    """prospects.xlsx + 'okna pcv' -> prospects_okna_pcv.xlsx
+
+    Names already in used (lower-cased, updated in place) get a _2, _3... suffix, so partitions that
+    sanitize to the same name, or differ only in case on Windows/macOS, do not overwrite each other.
+    """
+    base, extension = os.path.splitext(path)
+    name = FILE_NAME_INVALID_RE.sub("_", partition).strip("_") or EMPTY_PARTITION
+    target, number = f"{base}_{name}{extension}", 1
+    if used is not None:
+        while target.lower() in used:
+            number += 1
+            target = f"{base}_{name}_{number}{extension}"
+        used.add(target.lower())
+    return target
+
+
+# =======================
+# Writers
+# =======================
+class XlsxWriter:
+    """Streams rows into a write-only workbook: one sheet per partition, constant memory.
+
+    Each sheet is closed (flushed to its temporary file) as soon as its partition ends, and a
+    partition larger than Excel's row limit continues on "name (2)", "name (3)"...
+    """
+
+    def __init__(self, path):
+        # openpyxl ładowany dopiero przy eksporcie - krótszy start GUI
+        from openpyxl import Workbook
+        from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+
+        self.illegal_characters = ILLEGAL_CHARACTERS_RE
+        self.path = path
+        self.workbook = Workbook(write_only=True)
+        self.sheet = None
+        self.sheet_rows = 0
+        self.sheet_titles = set()
+        self.partition = None
+
+    def _title(self, name):
+        base = EXCEL_SHEET_INVALID_RE.sub("_", name).strip("'") or EMPTY_PARTITION
+        title, number = base[:EXCEL_SHEET_NAME_CHARS], 1
+        while title.lower() in self.sheet_titles:
+            number += 1
+            suffix = f" ({number})"
+            title = base[:EXCEL_SHEET_NAME_CHARS - len(suffix)] + suffix
+        self.sheet_titles.add(title.lower())
+        return title
+
+    def start_partition(self, name):
+        self.partition = name
+        if self.sheet is not None:
+            self.sheet.close()
+        self.sheet = self.workbook.create_sheet(self._title(name))
+        self.sheet.append(CONTACT_COLUMNS)
+        self.sheet_rows = 0
+
+    def write(self, row):
+        if self.sheet is None:
+            self.start_partition("Sheet1")
+        elif self.sheet_rows >= EXCEL_MAX_ROWS:
+            self.start_partition(self.partition)
+        values = []
+        for value in flat_row(row):
+            if isinstance(value, str):
+                value = self.illegal_characters.sub("", value)[:EXCEL_MAX_CELL_CHARS]
+            values.append(value)
+        self.sheet.append(values)
+        self.sheet_rows += 1
+
+    def close(self):
+        if self.sheet is None:
+            self.start_partition("Sheet1")
+        # Zapis do pliku tymczasowego i podmiana: przerwany eksport nie psuje poprzedniego pliku
+        temporary = self.path + ".tmp"
+        self.workbook.save(temporary)
+        os.replace(temporary, self.path)
+
+    def abort(self):
+        self.workbook = None
+
+
+class CsvWriter:
+    """Streams rows into a UTF-8 CSV file (list columns joined by LIST_SEPARATOR)."""
+
+    def __init__(self, path):
+        self.path = path
+        self.temporary = path + ".tmp"
+        # utf-8-sig: Excel rozpoznaje kodowanie polskich znaków
+        self.file = open(self.temporary, "w", newline="", encoding="utf-8-sig")
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(CONTACT_COLUMNS)
+
+    def start_partition(self, name):
+        pass
+
+    def write(self, row):
+        self.writer.writerow(flat_row(row))
+
+    def close(self):
+        self.file.close()
+        os.replace(self.temporary, self.path)
+
+    def abort(self):
+        self.file.close()
+        os.remove(self.temporary)
+
+
+class ParquetWriter:
+    """Streams rows into a Parquet file in EXPORT_BATCH_ROWS row groups, keeping list columns as lists."""
+
+    def __init__(self, path, batch_rows=EXPORT_BATCH_ROWS):
+        # Parquet jest opcjonalny - bez pyarrow dostępne są tylko .xlsx i .csv
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("Parquet export needs pyarrow: pip install pyarrow") from None
+        self.pa = pa
+        self.path = path
+        self.temporary = path + ".tmp"
+        self.batch_rows = batch_rows
+        self.schema = pa.schema([(column, pa.list_(pa.string()) if column in LIST_COLUMNS else pa.string())
+                                 for column in CONTACT_COLUMNS])
+        self.writer = pq.ParquetWriter(self.temporary, self.schema)
+        self.rows = []
+
+    def start_partition(self, name):
+        pass
+
+    def _flush(self):
+        if self.rows:
+            columns = list(zip(*self.rows))
+            pa = self.pa
+            self.writer.write_table(pa.Table.from_arrays(
+                [pa.array(values, type=field.type) for values, field in zip(columns, self.schema)],
+                schema=self.schema))
+            self.rows = []
+
+    def write(self, row):
+        self.rows.append(list_row(row))
+        if len(self.rows) >= self.batch_rows:
+            self._flush()
+
+    def close(self):
+        self._flush()
+        self.writer.close()
+        os.replace(self.temporary, self.path)
+
+    def abort(self):
+        self.writer.close()
+        os.remove(self.temporary)
+
+
+WRITERS = {"xlsx": XlsxWriter, "csv": CsvWriter, "parquet": ParquetWriter}
+
+
+# =======================
+# Export
+# =======================
+def export_store(store, path, partition_by=None, split_files=False, batch_size=EXPORT_BATCH_ROWS):
+    """Streams every stored row to path (.xlsx, .csv or .parquet) with constant memory.
+
+    partition_by ('query', 'country' or 'date') puts each partition on its own sheet of the
+    workbook, or, with split_files (always for .csv and .parquet), in its own file named
+    <path>_<partition>.<ext>. Returns {"rows": rows written, "files": paths written}.
+    """
+    writer_class = WRITERS[export_format(path)]
+    if partition_by not in PARTITIONS:
+        raise ValueError(f"Unsupported partition: {partition_by} (use one of {', '.join(PARTITION_CHOICES)})")
+    one_file_per_partition = bool(partition_by) and (split_files or writer_class is not XlsxWriter)
+
+    rows = 0
+    files = []
+    used_paths = set()
+    writer = None
+    current = None
+    try:
+        for partition, row in store.iter_rows(partition_by, batch_size):
+            if writer is None or partition != current:
+                current = partition
+                name = str(partition) if partition else EMPTY_PARTITION
+                if one_file_per_partition or writer is None:
+                    if writer is not None:
+                        writer.close()
+                    target = partition_path(path, name, used_paths) if one_file_per_partition else path
+                    writer = writer_class(target)
+                    files.append(target)
+                if partition_by:
+                    writer.start_partition(name)
+            writer.write(row)
+            rows += 1
+        if writer is None:
+            # Pusta baza: sam nagłówek
+            writer = writer_class(path)
+            files.append(path)
+    except BaseException:
+        # Poprzedni plik zostaje nietknięty; usuwamy tylko niedokończony plik tymczasowy
+        if writer is not None:
+            writer.abort()
+        raise
+    writer.close()
+    return {"rows": rows, "files": files}
@@ -0,0 +1,152 @@
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from contact_extractor import empty_contacts, extract_page
+from metrics import get_metrics
+
+# =======================
+# Extraction Pool Configuration
+# =======================
+# Liczba procesów parsujących HTML (0 = parsowanie w wątku potoku, bez osobnych procesów)
+EXTRACT_WORKERS = max(1, (os.cpu_count() or 2) - 1)
+# Maksymalna liczba pobranych stron czekających na parsowanie; po jej osiągnięciu pobieranie czeka
+EXTRACT_QUEUE_SIZE = 64
+# Procesy startowane przez forkserver (spawn na Windows), nie fork: fork z procesu z wątkami pobierania,
+# harmonogramu i Tk kopiuje blokady trzymane w tej chwili przez inne wątki i może zakleszczyć proces potomny
+EXTRACT_START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+_DONE = object()
+
+
+def create_extract_pool(workers=EXTRACT_WORKERS):
+    """Starts the process pool used for HTML extraction."""
+    return ProcessPoolExecutor(max_workers=max(1, int(workers)),
+                               mp_context=multiprocessing.get_context(EXTRACT_START_METHOD))
+
+
+def safe_extract_page(html, url):
+    """extract_page that never raises, so one broken page cannot kill a pool worker's batch.
+
+    Returns (contacts, hrefs, timing); timing is (seconds, bytes, error type or None), measured in
+    the worker process and handed to record_extraction() by the caller.
+    """
+    start = time.perf_counter()
+    size = len(html.encode("utf-8")) if html else 0
+    try:
+        contacts, hrefs = extract_page(html, url)
+        return contacts, hrefs, (time.perf_counter() - start, size, None)
+    except Exception as e:
+        print(f"Error extracting {url}: {e}")
+        return empty_contacts(), [], (time.perf_counter() - start, size, type(e).__name__)
+
+
+def record_extraction(timing):
+    """Adds one page's extraction timing to the run metrics (in the pipeline process)."""
+    seconds, size, error = timing
+    metrics = get_metrics()
+    metrics.observe("extract", seconds, size)
+    if error:
+        metrics.error("extract", error)
+
+
+def extract_concurrently(pages, workers=EXTRACT_WORKERS, max_pending=EXTRACT_QUEUE_SIZE, pool=None):
+    """Parses (url, html) pairs on a process pool and yields (url, contacts) as results arrive.
+
+    Pages without HTML (fetch error, host skipped by the circuit breaker, not an HTML page) are not
+    parsed and yield (url, None), so the caller can tell them apart from a page without contacts.
+
+    A feeder thread pulls pages from the iterable (typically fetch_pages_concurrently) and blocks
+    once max_pending pages are waiting, which throttles the fetchers instead of buffering HTML.
+    If the pool breaks (a worker killed by OOM or a crash), pages lost with it yield (url, None) and
+    the remaining pages are parsed in the feeder thread.
+    """
+    if not workers and pool is None:
+        for url, html in pages:
+            if not html:
+                yield url, None
+                continue
+            contacts, _, timing = safe_extract_page(html, url)
+            record_extraction(timing)
+            yield url, contacts
+        return
+
+    own_pool = pool is None
+    pool = pool or create_extract_pool(workers)
+    slots = threading.BoundedSemaphore(max(1, int(max_pending)))
+    results = queue.Queue()
+    stop = threading.Event()
+
+    def parse_here(html, url):
+        # Parsowanie w wątku feedera po awarii puli - wynik opakowany w Future jak z puli
+        future = Future()
+        future.set_result(safe_extract_page(html, url))
+        return future
+
+    def feed():
+        submitted = 0
+        broken = False
+        try:
+            for url, html in pages:
+                if not html:
+                    results.put((url, None))
+                    submitted += 1
+                    continue
+                slots.acquire()
+                if stop.is_set():
+                    break
+                if not broken:
+                    try:
+                        future = pool.submit(safe_extract_page, html, url)
+                        future.add_done_callback(lambda f, url=url: results.put((url, f)))
+                        submitted += 1
+                        continue
+                    except BrokenProcessPool:
+                        print("The extraction process pool broke; parsing the remaining pages in-process.")
+                        broken = True
+                results.put((url, parse_here(html, url)))
+                submitted += 1
+        except Exception as e:
+            print(f"Error while fetching pages for extraction: {e}")
+        finally:
+            results.put((_DONE, submitted))
+
+    feeder = threading.Thread(target=feed, daemon=True)
+    feeder.start()
+
+    received = 0
+    submitted = None
+    try:
+        while submitted is None or received < submitted:
+            url, future = results.get()
+            if url is _DONE:
+                submitted = future
+                continue
+            received += 1
+            if future is None:
+                yield url, None
+                continue
+            slots.release()
+            try:
+                contacts, _, timing = future.result()
+                record_extraction(timing)
+            except Exception as e:
+                # safe_extract_page nie rzuca wyjątków - błąd oznacza utratę procesu (np. BrokenProcessPool),
+                # więc strona nie jest traktowana jako pusta (nie trafia do bazy ani indeksu domen)
+                print(f"Error extracting {url}: {e}")
+                get_metrics().error("extract", type(e).__name__)
+                contacts = None
+            yield url, contacts
+    finally:
+        stop.set()
+        # Odblokowanie feedera, jeśli czeka na wolne miejsce w kolejce
+        try:
+            slots.release()
+        except ValueError:
+            pass
+        if own_pool:
+            pool.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,170 @@
+import codecs
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from http_client import REQUEST_TIMEOUT, get_session
+from metrics import error_kind, get_metrics
+from page_cache import conditional_headers, get_page_cache
+from politeness import HostThrottle, parse_retry_after
+
+# =======================
+# Fetch Configuration
+# =======================
+FETCH_WORKERS = 8
+# Limit pobieranej treści strony (po dekompresji); dłuższe strony są obcinane
+MAX_PAGE_BYTES = 2 * 1024 * 1024
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+# Typy treści, które parsujemy; PDF-y, obrazy itp. są pomijane bez pobierania treści
+HTML_CONTENT_TYPES = ("text/html", "application/xhtml+xml")
+# Kodowanie dla stron bez deklaracji, które nie są poprawnym UTF-8
+FALLBACK_ENCODING = "cp1252"
+
+_BODY_END_RE = re.compile(rb"</body\s*>", re.IGNORECASE)
+_CHARSET_RE = re.compile(rb"""<meta[^>]+charset\s*=\s*["']?\s*([a-zA-Z0-9_.:-]+)""", re.IGNORECASE)
+
+
+# =======================
+# Streamed Download
+# =======================
+class NotHtmlError(Exception):
+    """The response is not an HTML page (e.g. a PDF or an image), so its body is not downloaded."""
+
+
+def is_html_content_type(content_type):
+    mime = (content_type or "").split(";")[0].strip().lower()
+    # Brak nagłówka traktujemy jak HTML; treść i tak przejdzie przez parser odporny na śmieci
+    return not mime or mime in HTML_CONTENT_TYPES
+
+
+def read_html_body(response, max_bytes=MAX_PAGE_BYTES):
+    """Streams the body until '</body>' or max_bytes. Returns (bytes, truncated)."""
+    body = bytearray()
+    for chunk in response.iter_content(DOWNLOAD_CHUNK_SIZE):
+        # Szukamy także na styku z poprzednim fragmentem
+        search_from = max(0, len(body) - 8)
+        body += chunk
+        match = _BODY_END_RE.search(body, search_from)
+        if match:
+            del body[match.end():]
+            return bytes(body), False
+        if len(body) >= max_bytes:
+            del body[max_bytes:]
+            return bytes(body), True
+    return bytes(body), False
+
+
+def detect_encoding(body, content_type):
+    """Cheap charset detection: HTTP header, BOM, <meta charset> in the first 4 KB, then UTF-8 check."""
+    candidates = []
+    match = re.search(r"charset=([\w.:-]+)", content_type or "", re.IGNORECASE)
+    if match:
+        candidates.append(match.group(1))
+    if body.startswith(codecs.BOM_UTF8):
+        candidates.insert(0, "utf-8-sig")
+    match = _CHARSET_RE.search(body[:4096])
+    if match:
+        candidates.append(match.group(1).decode("ascii"))
+    for name in candidates:
+        try:
+            return codecs.lookup(name).name
+        except LookupError:
+            continue
+    try:
+        body.decode("utf-8")
+        return "utf-8"
+    except UnicodeDecodeError as e:
+        # Obcięcie w środku znaku wielobajtowego nie przekreśla UTF-8
+        return "utf-8" if e.start >= len(body) - 3 else FALLBACK_ENCODING
+
+
+def decode_html(body, content_type):
+    return body.decode(detect_encoding(body, content_type), errors="replace")
+
+
+# =======================
+# Page Fetching
+# =======================
+def fetch_page_with_requests(url, use_cache=True, max_bytes=MAX_PAGE_BYTES, throttle=None):
+    """Fetches page content through the shared session, reusing or revalidating cached copies.
+
+    When a HostThrottle is given, the response time, status and Retry-After are reported to it.
+    """
+    # Już załadowany przez get_session(); import tutaj, by moduł nie ładował requests przy starcie GUI
+    import requests
+
+    metrics = get_metrics()
+    cache = get_page_cache() if use_cache else None
+    entry = cache.get(url) if cache else None
+    if cache and cache.is_fresh(entry):
+        metrics.cache("fetch", True)
+        return entry.html
+
+    start = time.perf_counter()
+    response = None
+    try:
+        # stream=True: najpierw same nagłówki, treść czytamy dopiero po sprawdzeniu Content-Type
+        response = get_session().get(url, timeout=REQUEST_TIMEOUT, headers=conditional_headers(entry), stream=True)
+        # Czas do odebrania nagłówków (DNS, TCP, TLS, odpowiedź serwera); reszta to pobieranie treści
+        metrics.observe("fetch_headers", response.elapsed.total_seconds())
+        if throttle is not None:
+            throttle.record(url, response.elapsed.total_seconds(), response.status_code,
+                            parse_retry_after(response.headers.get("Retry-After")))
+        if entry is not None and response.status_code == 304:
+            metrics.observe("fetch", time.perf_counter() - start)
+            metrics.cache("fetch", True)
+            cache.touch(url)
+            return entry.html
+        response.raise_for_status()
+        content_type = response.headers.get("Content-Type", "")
+        if not is_html_content_type(content_type):
+            raise NotHtmlError(content_type)
+        body, truncated = read_html_body(response, max_bytes)
+        if truncated:
+            metrics.event("fetch", "truncated")
+        html = decode_html(body, content_type)
+        metrics.observe("fetch", time.perf_counter() - start, len(body))
+        if cache:
+            metrics.cache("fetch", False)
+            cache.store(url, html, response.headers.get("ETag"), response.headers.get("Last-Modified"))
+        return html
+    except NotHtmlError as e:
+        metrics.observe("fetch", time.perf_counter() - start)
+        metrics.event("fetch", "not_html")
+        print(f"Skipping {url}: not an HTML page ({e})")
+        if cache:
+            # Pusty wpis: kolejne przebiegi nie pobierają ponownie tego samego PDF-a
+            cache.store(url, "", response.headers.get("ETag"), response.headers.get("Last-Modified"))
+        return ""
+    except requests.exceptions.RequestException as e:
+        metrics.observe("fetch", time.perf_counter() - start)
+        metrics.error("fetch", error_kind(e))
+        if throttle is not None and response is None:
+            # Brak odpowiedzi (DNS, połączenie, timeout) - liczy się do bezpiecznika hosta
+            throttle.record(url, failed=True)
+        print(f"Error fetching {url}: {e}")
+        return None
+    finally:
+        if response is not None:
+            response.close()
+
+
+def fetch_pages_concurrently(urls, workers=FETCH_WORKERS, throttle=None, use_cache=True):
+    """Fetches pages on a thread pool and yields (url, html) as each one completes."""
+    throttle = throttle or HostThrottle()
+    cache = get_page_cache() if use_cache else None
+
+    def fetch(url):
+        # Świeże wpisy z cache nie dotykają sieci, więc nie czekają na hosta
+        html = cache.get_fresh(url) if cache else None
+        if html is None:
+            if throttle.wait(url):
+                html = fetch_page_with_requests(url, use_cache=use_cache, throttle=throttle)
+        else:
+            get_metrics().cache("fetch", True)
+        return url, html
+
+    with ThreadPoolExecutor(max_workers=max(1, int(workers))) as pool:
+        futures = [pool.submit(fetch, url) for url in urls]
+        for future in as_completed(futures):
+            yield future.result()
@@ -0,0 +1,169 @@
+import socket
+import threading
+import time
+
+from metrics import get_metrics
+
+# Brotli jest opcjonalny - bez niego negocjujemy tylko gzip/deflate
+try:
+    import brotli  # noqa: F401
+    ACCEPT_ENCODING = "gzip, deflate, br"
+except ImportError:
+    ACCEPT_ENCODING = "gzip, deflate"
+
+# =======================
+# Session Configuration
+# =======================
+CONNECT_TIMEOUT = 5
+READ_TIMEOUT = 15
+POOL_CONNECTIONS = 32
+POOL_MAXSIZE = 32
+RETRY_TOTAL = 3
+RETRY_BACKOFF = 0.5
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+USER_AGENT = "Mozilla/5.0 (compatible; ProspectingTool/1.0)"
+# Dłuższe Retry-After nie blokują wątku w urllib3 - obsługuje je harmonogram hostów (politeness.py)
+RETRY_AFTER_MAX = 10
+# Czas życia wpisów cache DNS (sekundy); nieistniejące domeny pamiętamy krócej
+DNS_CACHE_TTL = 300
+DNS_NEGATIVE_TTL = 60
+
+REQUEST_TIMEOUT = (CONNECT_TIMEOUT, READ_TIMEOUT)
+
+_session = None
+_session_lock = threading.Lock()
+
+
+# =======================
+# Shared DNS Cache
+# =======================
+class DnsCache:
+    """Process-wide getaddrinfo cache, so repeated pages of a host (and dead domains) skip DNS.
+
+    Lookups are cached per host with the port left out and put back into each address, so
+    http and https requests to a host share one entry. Failed lookups are cached briefly.
+    """
+
+    def __init__(self, resolver=socket.getaddrinfo, ttl=DNS_CACHE_TTL, negative_ttl=DNS_NEGATIVE_TTL):
+        self._resolve = resolver
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    def getaddrinfo(self, host, port, family=0, type=0, proto=0, flags=0):
+        if port is not None and not isinstance(port, int):
+            if not str(port).isdigit():
+                return self._resolve(host, port, family, type, proto, flags)
+            port = int(port)
+        key = (host, family, type, proto, flags)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None and entry[0] > now:
+            get_metrics().cache("dns", True)
+            result = entry[1]
+        else:
+            get_metrics().cache("dns", False)
+            try:
+                result = self._resolve(host, 0, family, type, proto, flags)
+                expires = now + self.ttl
+            except socket.gaierror as e:
+                result = e
+                expires = now + self.negative_ttl
+            with self._lock:
+                self._entries[key] = (expires, result)
+        if isinstance(result, socket.gaierror):
+            raise socket.gaierror(*result.args)
+        return [(af, socktype, proto_, canonname, (sockaddr[0], port or 0) + tuple(sockaddr[2:]))
+                for af, socktype, proto_, canonname, sockaddr in result]
+
+    def resolve_ip(self, host):
+        """First address of the host, or None if it does not resolve."""
+        try:
+            return self.getaddrinfo(host, 0, 0, socket.SOCK_STREAM)[0][4][0]
+        except (OSError, IndexError, UnicodeError):
+            return None
+
+
+_dns_cache = None
+_dns_cache_lock = threading.Lock()
+
+
+def get_dns_cache():
+    """Returns the shared DNS cache, routing socket.getaddrinfo (used by urllib3) through it."""
+    global _dns_cache
+    if _dns_cache is None:
+        with _dns_cache_lock:
+            if _dns_cache is None:
+                _dns_cache = DnsCache()
+                socket.getaddrinfo = _dns_cache.getaddrinfo
+    return _dns_cache
+
+
+# =======================
+# Session
+# =======================
+def build_session(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE,
+                  retries=RETRY_TOTAL, backoff=RETRY_BACKOFF):
+    """Creates a keep-alive session with connection pooling and a retry policy."""
+    # requests/urllib3 ładowane przy pierwszej sesji, nie przy starcie GUI
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    class PoliteRetry(Retry):
+        """urllib3 Retry that sleeps on Retry-After only up to RETRY_AFTER_MAX seconds.
+
+        Longer values fall back to the normal backoff; when the retries run out the response is
+        returned and the host scheduler defers the host instead of blocking a worker thread.
+        """
+
+        def get_retry_after(self, response):
+            retry_after = super().get_retry_after(response)
+            if retry_after is not None and retry_after > RETRY_AFTER_MAX:
+                return None
+            return retry_after
+
+    get_dns_cache()
+    retry = PoliteRetry(
+        total=retries,
+        connect=retries,
+        read=retries,
+        backoff_factor=backoff,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset(["GET", "HEAD"]),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize,
+                          max_retries=retry, pool_block=False)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({
+        "User-Agent": USER_AGENT,
+        "Accept-Encoding": ACCEPT_ENCODING,
+        "Connection": "keep-alive",
+    })
+    return session
+
+
+def get_session():
+    """Returns the shared session, creating it on first use."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = build_session()
+    return _session
+
+
+def configure_session(**kwargs):
+    """Replaces the shared session, e.g. to size the pool for more fetch workers."""
+    global _session
+    with _session_lock:
+        old, _session = _session, build_session(**kwargs)
+    if old is not None:
+        old.close()
+    return _session
@@ -0,0 +1,303 @@
+import json
+import os
+import platform
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+# =======================
+# Job Journal Configuration
+# =======================
+JOB_JOURNAL_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "jobs.sqlite")
+
+# queued - czeka na harmonogram; running - w toku albo przerwane (wznawiane ręcznie); finished - gotowe
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_FINISHED = "finished"
+
+QUERY_PENDING = "pending"
+QUERY_SEARCHED = "searched"
+
+LINK_PENDING = "pending"
+LINK_DONE = "done"
+# Strona, której nie udało się pobrać LINK_MAX_ATTEMPTS razy - zadanie przestaje na nią czekać
+LINK_FAILED = "failed"
+LINK_MAX_ATTEMPTS = 3
+
+# Zadanie w toku ma właściciela (host:pid), który co JOB_HEARTBEAT_SECONDS odnawia dzierżawę;
+# bez odnowienia przez JOB_LEASE_SECONDS (np. po awarii procesu) inny proces może je wznowić
+JOB_HEARTBEAT_SECONDS = 30
+JOB_LEASE_SECONDS = 120
+
+
+JOB_KEYS = ["id", "created_at", "status", "lang_code", "tld", "num_results", "queries", "options"]
+
+
+class JobJournal:
+    """Persists each run's queries, harvested links and per-URL state so it can be resumed.
+
+    It is also the persistent job queue: queued jobs wait here until the scheduler claims them.
+    """
+
+    def __init__(self, path=JOB_JOURNAL_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(
+            "PRAGMA journal_mode=WAL;"
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id INTEGER PRIMARY KEY,"
+            " created_at TEXT NOT NULL, status TEXT NOT NULL,"
+            " lang_code TEXT NOT NULL, tld TEXT NOT NULL, num_results INTEGER NOT NULL,"
+            " queries TEXT NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS job_queries ("
+            " job_id INTEGER NOT NULL, position INTEGER NOT NULL, query TEXT NOT NULL,"
+            " status TEXT NOT NULL, PRIMARY KEY (job_id, position));"
+            "CREATE TABLE IF NOT EXISTS job_links ("
+            " job_id INTEGER NOT NULL, url TEXT NOT NULL, query TEXT NOT NULL,"
+            " status TEXT NOT NULL, PRIMARY KEY (job_id, url));"
+        )
+        # Ustawienia przebiegu zadania z kolejki (workers, crawl_depth...) jako JSON
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        if "options" not in columns:
+            self._conn.execute("ALTER TABLE jobs ADD COLUMN options TEXT NOT NULL DEFAULT '{}'")
+        # Dzierżawa zadania w toku: proces, który je wykonuje, i czas ostatniego odnowienia
+        if "owner" not in columns:
+            self._conn.execute("ALTER TABLE jobs ADD COLUMN owner TEXT")
+            self._conn.execute("ALTER TABLE jobs ADD COLUMN heartbeat TEXT")
+        # Nieudane próby pobrania strony (ponawiane przy wznowieniu do LINK_MAX_ATTEMPTS)
+        link_columns = {row[1] for row in self._conn.execute("PRAGMA table_info(job_links)")}
+        if "attempts" not in link_columns:
+            self._conn.execute("ALTER TABLE job_links ADD COLUMN attempts INTEGER NOT NULL DEFAULT 0")
+        # Pozycja zapytania i miejsce w jego wynikach: link należy do najwcześniejszego zapytania zadania,
+        # niezależnie od tego, które z równoległych wyszukiwań skończyło się pierwsze
+        if "position" not in link_columns:
+            self._conn.execute("ALTER TABLE job_links ADD COLUMN position INTEGER")
+            self._conn.execute("ALTER TABLE job_links ADD COLUMN rank INTEGER NOT NULL DEFAULT 0")
+            self._conn.execute(
+                "UPDATE job_links SET position = (SELECT MIN(position) FROM job_queries q"
+                " WHERE q.job_id = job_links.job_id AND q.query = job_links.query), rank = rowid")
+        self._conn.commit()
+
+    @staticmethod
+    def owner():
+        """Lease owner id of this process."""
+        return f"{platform.node()}:{os.getpid()}"
+
+    @staticmethod
+    def _now():
+        return datetime.now().isoformat(timespec="seconds")
+
+    @staticmethod
+    def _lease_cutoff():
+        return (datetime.now() - timedelta(seconds=JOB_LEASE_SECONDS)).isoformat(timespec="seconds")
+
+    def create_job(self, queries, lang_code, tld, num_results, status=JOB_RUNNING, options=None):
+        """Starts a new journal entry (or queues it, with status=JOB_QUEUED) and returns its id.
+
+        A job created as running is leased to this process.
+        """
+        running = status == JOB_RUNNING
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO jobs (created_at, status, lang_code, tld, num_results, queries, options, owner, heartbeat)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (self._now(), status, lang_code, tld, num_results, json.dumps(queries), json.dumps(options or {}),
+                 self.owner() if running else None, self._now() if running else None),
+            )
+            job_id = cursor.lastrowid
+            self._conn.executemany(
+                "INSERT INTO job_queries (job_id, position, query, status) VALUES (?, ?, ?, ?)",
+                [(job_id, position, query, QUERY_PENDING) for position, query in enumerate(queries)],
+            )
+            self._conn.commit()
+        return job_id
+
+    def get_job(self, job_id):
+        """Returns the job settings as a dict, or None."""
+        with self._lock:
+            row = self._conn.execute(f"SELECT {', '.join(JOB_KEYS)} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._job(row)
+
+    @staticmethod
+    def _job(row):
+        if row is None:
+            return None
+        job = dict(zip(JOB_KEYS, row))
+        job["queries"] = json.loads(job["queries"])
+        job["options"] = json.loads(job["options"] or "{}")
+        return job
+
+    def queued_jobs(self):
+        """Jobs waiting for the scheduler, oldest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {', '.join(JOB_KEYS)} FROM jobs WHERE status = ? ORDER BY id", (JOB_QUEUED,)
+            ).fetchall()
+        return [self._job(row) for row in rows]
+
+    def claim_job(self, job_id):
+        """Moves a queued job to running, leased to this process. False if another process took it first."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = ?, owner = ?, heartbeat = ? WHERE id = ? AND status = ?",
+                (JOB_RUNNING, self.owner(), self._now(), job_id, JOB_QUEUED))
+            self._conn.commit()
+        return cursor.rowcount == 1
+
+    def requeue_job(self, job_id):
+        """Puts an unfinished job back in the queue, so the scheduler continues it later.
+
+        A job still leased to another process is left alone. Returns True if the job was queued.
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = ?, owner = NULL, heartbeat = NULL"
+                " WHERE id = ? AND status != ? AND (owner IS NULL OR owner = ? OR heartbeat < ?)",
+                (JOB_QUEUED, job_id, JOB_FINISHED, self.owner(), self._lease_cutoff()))
+            self._conn.commit()
+        return cursor.rowcount == 1
+
+    def last_unfinished_job(self):
+        """Returns the most recent interrupted job (running, but not leased by a live process), or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id FROM jobs WHERE status = ? AND (owner IS NULL OR heartbeat < ?) ORDER BY id DESC LIMIT 1",
+                (JOB_RUNNING, self._lease_cutoff()),
+            ).fetchone()
+        return self.get_job(row[0]) if row else None
+
+    def claim_unfinished_job(self):
+        """Leases the most recent interrupted job to this process and returns it, or None (cli.py --resume).
+
+        Same conditional UPDATE as claim_job, so two processes resuming at once cannot both take it.
+        """
+        while True:
+            job = self.last_unfinished_job()
+            if job is None:
+                return None
+            with self._lock:
+                cursor = self._conn.execute(
+                    "UPDATE jobs SET owner = ?, heartbeat = ?"
+                    " WHERE id = ? AND status = ? AND (owner IS NULL OR heartbeat < ?)",
+                    (self.owner(), self._now(), job["id"], JOB_RUNNING, self._lease_cutoff()))
+                self._conn.commit()
+            if cursor.rowcount == 1:
+                return job
+
+    def renew_lease(self, job_id):
+        with self._lock:
+            self._conn.execute("UPDATE jobs SET heartbeat = ? WHERE id = ? AND owner = ?",
+                               (self._now(), job_id, self.owner()))
+            self._conn.commit()
+
+    def release_job(self, job_id):
+        """Drops this process's lease; an unfinished job can then be resumed at once."""
+        with self._lock:
+            self._conn.execute("UPDATE jobs SET owner = NULL, heartbeat = NULL WHERE id = ? AND owner = ?",
+                               (job_id, self.owner()))
+            self._conn.commit()
+
+    @contextmanager
+    def lease(self, job_id):
+        """Renews the job's lease in the background while the block runs, then releases it."""
+        stop = threading.Event()
+
+        def heartbeat():
+            while not stop.wait(JOB_HEARTBEAT_SECONDS):
+                self.renew_lease(job_id)
+
+        thread = threading.Thread(target=heartbeat, name=f"job-{job_id}-lease", daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            stop.set()
+            thread.join()
+            self.release_job(job_id)
+
+    def pending_queries(self, job_id):
+        """Queries of the job that have not been searched yet, in original order."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT position, query FROM job_queries WHERE job_id = ? AND status = ? ORDER BY position",
+                (job_id, QUERY_PENDING),
+            ).fetchall()
+        return rows
+
+    def record_search(self, job_id, position, links):
+        """Stores the links harvested for one query and marks the query as searched, atomically.
+
+        A URL found by several queries stays with the one earliest in the job (lowest position),
+        whichever search finished first.
+        """
+        with self._lock:
+            self._conn.executemany(
+                "INSERT INTO job_links (job_id, url, query, status, position, rank) VALUES (?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT (job_id, url) DO UPDATE SET"
+                " query = excluded.query, position = excluded.position, rank = excluded.rank"
+                " WHERE excluded.position < job_links.position AND job_links.status = ?",
+                [(job_id, link["url"], link["query"], LINK_PENDING, position, rank, LINK_PENDING)
+                 for rank, link in enumerate(links)],
+            )
+            self._conn.execute(
+                "UPDATE job_queries SET status = ? WHERE job_id = ? AND position = ?",
+                (QUERY_SEARCHED, job_id, position),
+            )
+            self._conn.commit()
+
+    def links(self, job_id, status=None):
+        """Harvested links of the job (optionally only those with the given status)."""
+        sql = "SELECT url, query FROM job_links WHERE job_id = ?"
+        params = [job_id]
+        if status is not None:
+            sql += " AND status = ?"
+            params.append(status)
+        # Kolejność zapytań z zadania i ich wyników, a nie kolejność zakończenia równoległych wyszukiwań
+        order = " ORDER BY position, rank"
+        with self._lock:
+            rows = self._conn.execute(sql + order, params).fetchall()
+        return [{"url": url, "query": query} for url, query in rows]
+
+    def mark_link_done(self, job_id, url):
+        with self._lock:
+            self._conn.execute("UPDATE job_links SET status = ? WHERE job_id = ? AND url = ?",
+                               (LINK_DONE, job_id, url))
+            self._conn.commit()
+
+    def mark_link_failed(self, job_id, url):
+        """Counts a failed fetch of the link. Returns True while it will be retried, False once given up."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE job_links SET attempts = attempts + 1,"
+                " status = CASE WHEN attempts + 1 >= ? THEN ? ELSE status END WHERE job_id = ? AND url = ?",
+                (LINK_MAX_ATTEMPTS, LINK_FAILED, job_id, url))
+            self._conn.commit()
+            row = self._conn.execute("SELECT status FROM job_links WHERE job_id = ? AND url = ?",
+                                     (job_id, url)).fetchone()
+        return row is not None and row[0] == LINK_PENDING
+
+    def finish_job(self, job_id):
+        with self._lock:
+            self._conn.execute("UPDATE jobs SET status = ?, owner = NULL, heartbeat = NULL WHERE id = ?",
+                               (JOB_FINISHED, job_id))
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_job_journal = None
+_job_journal_lock = threading.Lock()
+
+
+def get_job_journal():
+    """Returns the shared job journal, opening it on first use."""
+    global _job_journal
+    if _job_journal is None:
+        with _job_journal_lock:
+            if _job_journal is None:
+                _job_journal = JobJournal()
+    return _job_journal
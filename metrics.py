@@ -0,0 +1,222 @@
+import bisect
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+# =======================
+# Metrics Configuration
+# =======================
+METRICS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Search_Results")
+# Jedna linia JSON na przebieg (do porównań między przebiegami)
+METRICS_JSONL_FILE = os.path.join(METRICS_DIR, "metrics.jsonl")
+# Ostatni przebieg w formacie tekstowym Prometheusa (np. dla node_exporter textfile collector)
+METRICS_PROM_FILE = os.path.join(METRICS_DIR, "metrics.prom")
+# Górne granice przedziałów histogramu opóźnień, w sekundach
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+def error_kind(error):
+    """Short error label: 'HTTP 503' for HTTP errors with a response, otherwise the exception class name."""
+    response = getattr(error, "response", None)
+    if response is not None and getattr(response, "status_code", None):
+        return f"HTTP {response.status_code}"
+    return type(error).__name__
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram (Prometheus style) with count, sum and max."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-quantile (max for the overflow bucket)."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def to_dict(self):
+        return {
+            "count": self.count, "sum": round(self.sum, 6), "max": round(self.max, 6),
+            "p50": round(self.quantile(0.5), 6), "p90": round(self.quantile(0.9), 6),
+            "p99": round(self.quantile(0.99), 6),
+            "buckets": {str(bound): count for bound, count in zip(self.buckets, self.counts)},
+            "overflow": self.counts[-1],
+        }
+
+
+class StageStats:
+    """Everything recorded for one pipeline stage."""
+
+    def __init__(self):
+        self.latency = Histogram()
+        self.bytes = 0
+        self.errors = {}
+        self.events = {}
+        self.cache = {"hit": 0, "miss": 0}
+
+    def to_dict(self):
+        lookups = self.cache["hit"] + self.cache["miss"]
+        return {
+            "latency": self.latency.to_dict(),
+            "bytes": self.bytes,
+            "errors": dict(self.errors),
+            "events": dict(self.events),
+            "cache": dict(self.cache, hit_rate=round(self.cache["hit"] / lookups, 4) if lookups else None),
+        }
+
+
+class PipelineMetrics:
+    """Thread-safe per-run counters: latency, bytes, errors by type and cache hits, per stage."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = time.time()
+        self.stages = {}
+
+    def _stage(self, stage):
+        stats = self.stages.get(stage)
+        if stats is None:
+            stats = self.stages[stage] = StageStats()
+        return stats
+
+    def observe(self, stage, seconds, nbytes=0):
+        with self._lock:
+            stats = self._stage(stage)
+            stats.latency.observe(seconds)
+            stats.bytes += nbytes
+
+    def error(self, stage, kind):
+        """Counts an error of a stage; kind is an exception class name or e.g. 'HTTP 503'."""
+        with self._lock:
+            errors = self._stage(stage).errors
+            errors[kind] = errors.get(kind, 0) + 1
+
+    def event(self, stage, name):
+        """Counts a notable non-error outcome, e.g. a truncated or skipped download."""
+        with self._lock:
+            events = self._stage(stage).events
+            events[name] = events.get(name, 0) + 1
+
+    def cache(self, stage, hit):
+        with self._lock:
+            self._stage(stage).cache["hit" if hit else "miss"] += 1
+
+    @contextmanager
+    def timer(self, stage):
+        """Times the block; an exception escaping it is counted by type and re-raised."""
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            self.error(stage, error_kind(e))
+            raise
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                "started": datetime.fromtimestamp(self.started).isoformat(timespec="seconds"),
+                "wall_seconds": round(time.time() - self.started, 3),
+                "stages": {stage: stats.to_dict() for stage, stats in sorted(self.stages.items())},
+            }
+
+    def summary_lines(self):
+        """Human-readable per-stage table for the end of a run."""
+        data = self.to_dict()
+        lines = [f"Run metrics ({data['wall_seconds']:.1f} s wall time):"]
+        for stage, stats in data["stages"].items():
+            latency = stats["latency"]
+            line = (f"  {stage:<13} n={latency['count']:<6} total={latency['sum']:8.2f} s  "
+                    f"p50<={latency['p50']:.3f} p90<={latency['p90']:.3f} p99<={latency['p99']:.3f} "
+                    f"max={latency['max']:.3f} s")
+            if stats["bytes"]:
+                line += f"  {stats['bytes'] / 1e6:.2f} MB"
+            if stats["cache"]["hit_rate"] is not None:
+                line += f"  cache {stats['cache']['hit']}/{stats['cache']['hit'] + stats['cache']['miss']} hits"
+            if stats["events"]:
+                line += "  " + ", ".join(f"{name}={count}" for name, count in sorted(stats["events"].items()))
+            if stats["errors"]:
+                line += "  errors " + ", ".join(f"{kind}={count}" for kind, count in sorted(stats["errors"].items()))
+            lines.append(line)
+        return lines
+
+    def write_jsonl(self, path=METRICS_JSONL_FILE, **run_info):
+        """Appends this run's metrics (plus run_info such as job_id) as one JSON line."""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(dict(run_info, **self.to_dict()), ensure_ascii=False) + "\n")
+
+    def write_prometheus(self, path=METRICS_PROM_FILE):
+        """Writes the metrics in the Prometheus text exposition format (replacing the file)."""
+        data = self.to_dict()["stages"]
+        lines = ["# HELP prospecting_stage_seconds Latency of pipeline stage calls.",
+                 "# TYPE prospecting_stage_seconds histogram"]
+        for stage, stats in data.items():
+            cumulative = 0
+            for bound, count in stats["latency"]["buckets"].items():
+                cumulative += count
+                lines.append(f'prospecting_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+            lines.append(f'prospecting_stage_seconds_bucket{{stage="{stage}",le="+Inf"}} {stats["latency"]["count"]}')
+            lines.append(f'prospecting_stage_seconds_sum{{stage="{stage}"}} {stats["latency"]["sum"]}')
+            lines.append(f'prospecting_stage_seconds_count{{stage="{stage}"}} {stats["latency"]["count"]}')
+        lines += ["# HELP prospecting_stage_bytes_total Bytes transferred or parsed per stage.",
+                  "# TYPE prospecting_stage_bytes_total counter"]
+        lines += [f'prospecting_stage_bytes_total{{stage="{stage}"}} {stats["bytes"]}' for stage, stats in data.items()]
+        lines += ["# HELP prospecting_stage_errors_total Errors per stage and type.",
+                  "# TYPE prospecting_stage_errors_total counter"]
+        for stage, stats in data.items():
+            for kind, count in sorted(stats["errors"].items()):
+                lines.append(f'prospecting_stage_errors_total{{stage="{stage}",type="{kind}"}} {count}')
+        lines += ["# HELP prospecting_stage_events_total Notable outcomes per stage (truncated, not_html...).",
+                  "# TYPE prospecting_stage_events_total counter"]
+        for stage, stats in data.items():
+            for name, count in sorted(stats["events"].items()):
+                lines.append(f'prospecting_stage_events_total{{stage="{stage}",event="{name}"}} {count}')
+        lines += ["# HELP prospecting_cache_lookups_total Cache lookups per stage and result.",
+                  "# TYPE prospecting_cache_lookups_total counter"]
+        for stage, stats in data.items():
+            for result in ("hit", "miss"):
+                if stats["cache"][result]:
+                    lines.append(f'prospecting_cache_lookups_total{{stage="{stage}",result="{result}"}} '
+                                 f'{stats["cache"][result]}')
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp_path, path)
+
+
+_metrics = PipelineMetrics()
+
+
+def get_metrics():
+    """Returns the metrics of the current run."""
+    return _metrics
+
+
+def reset_metrics():
+    """Starts a fresh set of metrics (called at the beginning of each pipeline run)."""
+    global _metrics
+    _metrics = PipelineMetrics()
+    return _metrics
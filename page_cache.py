@@ -0,0 +1,126 @@
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import namedtuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# =======================
+# Cache Configuration
+# =======================
+PAGE_CACHE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "page_cache.sqlite")
+# Po tym czasie (w sekundach) wpis jest rewalidowany (If-None-Match / If-Modified-Since)
+PAGE_CACHE_TTL = 7 * 24 * 3600
+
+CacheEntry = namedtuple("CacheEntry", ["html", "etag", "last_modified", "fetched_at"])
+
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def normalize_url(url):
+    """Normalizes a URL so trivially different spellings share one cache key."""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and parts.port != _DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    path = parts.path or "/"
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((scheme, host, path, query, ""))
+
+
+class PageCache:
+    """SQLite-backed store of fetched HTML with HTTP validators and a TTL."""
+
+    def __init__(self, path=PAGE_CACHE_FILE, ttl=PAGE_CACHE_TTL):
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            " url TEXT PRIMARY KEY,"
+            " body BLOB NOT NULL,"
+            " etag TEXT,"
+            " last_modified TEXT,"
+            " fetched_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, url):
+        """Returns the cached entry for the URL (fresh or stale), or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT body, etag, last_modified, fetched_at FROM pages WHERE url = ?",
+                (normalize_url(url),),
+            ).fetchone()
+        if row is None:
+            return None
+        body, etag, last_modified, fetched_at = row
+        return CacheEntry(zlib.decompress(body).decode("utf-8"), etag, last_modified, fetched_at)
+
+    def is_fresh(self, entry):
+        """Checks whether an entry is still within the TTL."""
+        return entry is not None and time.time() - entry.fetched_at < self.ttl
+
+    def get_fresh(self, url):
+        """Returns cached HTML if it is within the TTL, otherwise None."""
+        entry = self.get(url)
+        return entry.html if self.is_fresh(entry) else None
+
+    def store(self, url, html, etag=None, last_modified=None):
+        """Saves (or replaces) a page in the cache."""
+        body = zlib.compress(html.encode("utf-8"))
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pages (url, body, etag, last_modified, fetched_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (normalize_url(url), body, etag, last_modified, time.time()),
+            )
+            self._conn.commit()
+
+    def touch(self, url):
+        """Marks a revalidated (304 Not Modified) entry as fresh again."""
+        with self._lock:
+            self._conn.execute("UPDATE pages SET fetched_at = ? WHERE url = ?",
+                               (time.time(), normalize_url(url)))
+            self._conn.commit()
+
+    def purge_expired(self, max_age=None):
+        """Deletes entries older than max_age seconds (defaults to 4x the TTL)."""
+        cutoff = time.time() - (max_age if max_age is not None else 4 * self.ttl)
+        with self._lock:
+            deleted = self._conn.execute("DELETE FROM pages WHERE fetched_at < ?", (cutoff,)).rowcount
+            self._conn.commit()
+        return deleted
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def conditional_headers(entry):
+    """Builds revalidation headers from a cached entry's validators."""
+    headers = {}
+    if entry is not None:
+        if entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+    return headers
+
+
+_page_cache = None
+_page_cache_lock = threading.Lock()
+
+
+def get_page_cache():
+    """Returns the shared page cache, opening it on first use."""
+    global _page_cache
+    if _page_cache is None:
+        with _page_cache_lock:
+            if _page_cache is None:
+                _page_cache = PageCache()
+    return _page_cache
@@ -0,0 +1,180 @@
+import ipaddress
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+from http_client import get_dns_cache
+from metrics import get_metrics
+
+# =======================
+# Politeness Configuration
+# =======================
+# Przerwa przed drugim zapytaniem do hosta, zanim poznamy jego czas odpowiedzi
+HOST_INITIAL_DELAY = 2.0
+# Granice przerwy między zapytaniami do jednego hosta (sekundy)
+MIN_HOST_DELAY = 0.5
+MAX_HOST_DELAY = 120.0
+# Docelowa przerwa = tyle razy średni czas odpowiedzi hosta (wolny serwer = rzadsze zapytania)
+LATENCY_DELAY_FACTOR = 4.0
+# Po udanym zapytaniu przerwa maleje tak szybko w stronę celu (po 429/503 rośnie x2)
+DELAY_DECAY = 0.75
+LATENCY_EWMA_WEIGHT = 0.3
+# Bezpiecznik: po tylu błędach z rzędu host jest pomijany przez BREAKER_COOLDOWN sekund
+BREAKER_FAILURES = 3
+BREAKER_COOLDOWN = 300.0
+# ... a cała podsieć (/24 lub /48), gdy bezpiecznik otworzył się dla tylu różnych hostów w niej
+RANGE_BREAKER_HOSTS = 3
+
+SLOW_DOWN_STATUSES = (429, 503)
+
+
+def parse_retry_after(value, now=None):
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date), or None."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - (now or datetime.now(timezone.utc))).total_seconds())
+
+
+def ip_range(ip):
+    """The /24 (IPv4) or /48 (IPv6) network of an address, as text."""
+    address = ipaddress.ip_address(ip)
+    prefix = 24 if address.version == 4 else 48
+    return str(ipaddress.ip_network(f"{ip}/{prefix}", strict=False))
+
+
+class HostState:
+    """Politeness and circuit-breaker state of one host."""
+
+    def __init__(self):
+        self.delay = HOST_INITIAL_DELAY
+        self.latency = None
+        self.next_allowed = 0.0
+        self.failures = 0
+        self.open_until = 0.0
+        self.cooldown = BREAKER_COOLDOWN
+        self.ip_range = None
+
+
+class HostThrottle:
+    """Adaptive per-host scheduler with a circuit breaker per host and per IP range.
+
+    The gap between two requests to a host follows its observed response time
+    (LATENCY_DELAY_FACTOR x EWMA latency, within MIN/MAX_HOST_DELAY), doubles on 429/503 and
+    honours Retry-After. Hosts that fail BREAKER_FAILURES times in a row (connection errors,
+    timeouts, 5xx) are skipped for BREAKER_COOLDOWN seconds; when that happens to
+    RANGE_BREAKER_HOSTS hosts of one /24 network, the whole range is skipped. After a cooldown
+    one more failure reopens the breaker for twice as long.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._hosts = {}
+        self._range_open_until = {}
+        self._range_failed_hosts = {}
+
+    def _state(self, host):
+        state = self._hosts.get(host)
+        if state is None:
+            state = self._hosts[host] = HostState()
+        return state
+
+    @staticmethod
+    def _host(url):
+        return urlsplit(url).netloc.lower()
+
+    def _resolve_range(self, host, state):
+        if state.ip_range is None:
+            ip = get_dns_cache().resolve_ip(urlsplit("//" + host).hostname or "")
+            state.ip_range = ip_range(ip) if ip else ""
+        return state.ip_range
+
+    def is_open(self, url):
+        """True if the host (or its IP range) is currently skipped by the circuit breaker."""
+        host = self._host(url)
+        now = time.monotonic()
+        with self._lock:
+            state = self._state(host)
+            ip_range = state.ip_range
+        if ip_range is None:
+            # Rozwiązanie nazwy poza blokadą (wynik trafia do wspólnego cache DNS)
+            ip_range = self._resolve_range(host, state)
+        with self._lock:
+            return state.open_until > now or self._range_open_until.get(ip_range, 0.0) > now
+
+    def wait(self, url):
+        """Blocks until the host may be contacted again. Returns False if it should be skipped."""
+        if self.is_open(url):
+            get_metrics().event("fetch", "circuit_open")
+            return False
+        host = self._host(url)
+        with self._lock:
+            state = self._state(host)
+            now = time.monotonic()
+            slot = max(now, state.next_allowed)
+            # Rezerwujemy kolejny termin od razu, żeby równoległe wątki nie trafiły w ten sam
+            state.next_allowed = slot + state.delay * random.uniform(1.0, 1.25)
+        delay = slot - now
+        get_metrics().observe("throttle_wait", max(0.0, delay))
+        if delay > 0:
+            time.sleep(delay)
+        return True
+
+    def record(self, url, latency=None, status=None, retry_after=None, failed=False):
+        """Feeds the outcome of a request back into the host's delay and circuit breaker.
+
+        failed marks a connection error or timeout; a status of 5xx counts as a failure too.
+        """
+        host = self._host(url)
+        now = time.monotonic()
+        with self._lock:
+            state = self._state(host)
+            if latency is not None:
+                state.latency = latency if state.latency is None else (
+                    LATENCY_EWMA_WEIGHT * latency + (1 - LATENCY_EWMA_WEIGHT) * state.latency)
+
+            if status in SLOW_DOWN_STATUSES:
+                get_metrics().event("fetch", "slow_down")
+                state.delay = min(MAX_HOST_DELAY, max(state.delay * 2, retry_after or 0.0))
+                state.next_allowed = max(state.next_allowed, now + max(state.delay, retry_after or 0.0))
+
+            if failed or (status is not None and status >= 500):
+                state.failures += 1
+                if state.failures >= BREAKER_FAILURES:
+                    self._trip(host, state, now)
+                return
+
+            # Host odpowiada: zerujemy licznik błędów i zbliżamy przerwę do celu wynikającego z opóźnień
+            state.failures = 0
+            state.cooldown = BREAKER_COOLDOWN
+            self._range_failed_hosts.get(state.ip_range, set()).discard(host)
+            if status not in SLOW_DOWN_STATUSES:
+                target = LATENCY_DELAY_FACTOR * (state.latency or 0.0)
+                target = min(MAX_HOST_DELAY, max(MIN_HOST_DELAY, target))
+                state.delay = max(target, state.delay * DELAY_DECAY)
+
+    def _trip(self, host, state, now):
+        state.open_until = now + state.cooldown
+        get_metrics().event("fetch", "circuit_tripped")
+        print(f"Skipping {host} for {state.cooldown:.0f} s after {state.failures} failed requests")
+        # Po ponownym otwarciu wystarczy jeden błąd, a przerwa się wydłuża
+        state.failures = BREAKER_FAILURES - 1
+        state.cooldown = min(state.cooldown * 2, 24 * 3600)
+        if state.ip_range:
+            failed_hosts = self._range_failed_hosts.setdefault(state.ip_range, set())
+            failed_hosts.add(host)
+            if len(failed_hosts) >= RANGE_BREAKER_HOSTS:
+                self._range_open_until[state.ip_range] = now + BREAKER_COOLDOWN
+                print(f"Skipping IP range {state.ip_range} for {BREAKER_COOLDOWN:.0f} s "
+                      f"({len(failed_hosts)} failing hosts)")
@@ -0,0 +1,145 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+# =======================
+# Post-Processing Configuration
+# =======================
+# Wiersze normalizowane w jednej paczce (jedno zapytanie SQL i jeden przebieg wektorowy)
+POSTPROCESS_BATCH_ROWS = 50000
+
+# Numery kierunkowe krajów z engine.country_codes, według domeny kraju (tld)
+CALLING_CODES = {
+    "pl": "48", "de": "49", "uk": "44", "gb": "44", "fr": "33", "es": "34", "it": "39",
+    "nl": "31", "be": "32", "se": "46", "no": "47", "dk": "45", "fi": "358",
+    "ch": "41", "at": "43", "pt": "351", "ie": "353", "gr": "30", "cz": "420",
+    "sk": "421", "hu": "36", "ro": "40", "bg": "359", "hr": "385", "rs": "381",
+    "ua": "380", "lt": "370", "lv": "371", "ee": "372", "si": "386", "is": "354",
+    "al": "355", "ba": "387", "xk": "383", "mk": "389", "md": "373", "me": "382",
+}
+# Długość numeru krajowego (bez numeru kierunkowego kraju): najkrótszy i najdłuższy poprawny
+NATIONAL_LENGTHS = {
+    "pl": (9, 9), "de": (6, 11), "uk": (9, 10), "gb": (9, 10), "fr": (9, 9), "es": (9, 9),
+    "it": (6, 11), "nl": (9, 9), "be": (8, 9), "se": (7, 10), "no": (8, 8), "dk": (8, 8),
+    "fi": (5, 12), "ch": (9, 9), "at": (4, 13), "pt": (9, 9), "ie": (7, 9), "gr": (10, 10),
+    "cz": (9, 9), "sk": (9, 9), "hu": (8, 9), "ro": (9, 9), "bg": (7, 9), "hr": (8, 9),
+    "rs": (6, 10), "ua": (9, 9), "lt": (8, 8), "lv": (8, 8), "ee": (7, 8), "si": (8, 8),
+    "is": (7, 9), "al": (8, 9), "ba": (8, 9), "xk": (8, 9), "mk": (8, 8), "md": (8, 8), "me": (8, 8),
+}
+# Kraje, w których wiodące 0 numeru krajowego zostaje w formacie E.164 (w pozostałych to prefiks międzymiastowy)
+TRUNK_ZERO_KEPT = frozenset(["it"])
+# PHONE_RE wymaga co najmniej 9 cyfr numeru bez prefiksu kraju
+NATIONAL_MIN_DIGITS = 9
+E164_MIN_DIGITS = 8
+E164_MAX_DIGITS = 15
+
+ZIP_CODE_RE = re.compile(r"\b\d{2}-\d{3}\b")
+EMAIL_VALID_RE = re.compile(r"[a-z0-9._%+\-]+@(?:[a-z0-9](?:[a-z0-9\-]*[a-z0-9])?\.)+[a-z]{2,}")
+# "logo@2x.png" itp. - nazwy plików graficznych pasujące do EMAIL_RE
+NOT_EMAIL_SUFFIXES = (".png", ".jpg", ".jpeg", ".gif", ".webp", ".svg", ".bmp", ".ico")
+URL_TLD_RE = re.compile(r"^[a-z][a-z0-9+.\-]*://(?:[^/?#@]*@)?[^/?#:]*\.([a-z]+)\.?(?::\d*)?(?:[/?#]|$)", re.I)
+
+
+# =======================
+# Vectorized Helpers
+# =======================
+def _explode(lists):
+    """One (row index, value) entry per list item; rows with empty lists drop out."""
+    values = lists.explode()
+    return values[values.notna()].astype(str)
+
+
+def _collect(values, index):
+    """Deduplicated, sorted list per row of index (rows without values get [])."""
+    pairs = pd.DataFrame({"row": index.get_indexer(values.index), "value": values.to_numpy()})
+    pairs = pairs.drop_duplicates().sort_values(["row", "value"])
+    # Posortowane po wierszu: granice grup i wycinki jednej listy zamiast groupby().agg(list)
+    positions, starts = np.unique(pairs["row"].to_numpy(), return_index=True)
+    ends = np.append(starts[1:], len(pairs))
+    flat = pairs["value"].tolist()
+    lists = [[] for _ in range(len(index))]
+    for position, start, end in zip(positions.tolist(), starts.tolist(), ends.tolist()):
+        lists[position] = flat[start:end]
+    return pd.Series(lists, index=index, dtype=object)
+
+
+def row_countries(df):
+    """Country tld of each row: the searched country, else the TLD of the row's URL."""
+    url_tld = df["url"].astype(str).str.extract(URL_TLD_RE, expand=False).str.lower()
+    if "tld" not in df:
+        return url_tld
+    return df["tld"].where(df["tld"].notna() & (df["tld"] != ""), url_tld)
+
+
+# =======================
+# Emails and Phones
+# =======================
+def normalize_emails(emails):
+    """Lower-cases, validates and dedupes a Series of email lists."""
+    values = _explode(emails).str.strip(" \t\r\n.-_").str.lower()
+    valid = values.str.fullmatch(EMAIL_VALID_RE) & ~values.str.endswith(NOT_EMAIL_SUFFIXES)
+    return _collect(values[valid], emails.index)
+
+
+def normalize_phones(phones, countries):
+    """Formats a Series of phone lists as E.164 (+48601234567), by each row's country tld.
+
+    Zip-code-like matches and numbers of impossible length are dropped: E.164 allows 8-15 digits,
+    and for the countries in NATIONAL_LENGTHS the number after the country code must also have a
+    valid national length (so a misread "+48 48601234" is not taken for a Polish number). Numbers
+    written without a country prefix in a country missing from CALLING_CODES are kept as bare digits.
+    """
+    raw = _explode(phones).str.strip()
+    raw = raw[~raw.str.contains(ZIP_CODE_RE)]
+    digits = raw.str.replace(r"\D", "", regex=True)
+    international = raw.str.startswith("+") | digits.str.startswith("00")
+    digits = digits.mask(digits.str.startswith("00"), digits.str[2:])
+    country = countries.reindex(raw.index)
+
+    formatted = digits.where(international)
+    national = ~international
+    for tld in country[national].dropna().unique():
+        code = CALLING_CODES.get(tld)
+        if code is None:
+            continue
+        mask = national & (country == tld)
+        number = digits[mask]
+        # "48 601 234 567" bez plusa: prefiks kraju jest już w numerze
+        has_code = number.str.startswith(code) & (number.str.len() >= len(code) + NATIONAL_MIN_DIGITS)
+        if tld not in TRUNK_ZERO_KEPT:
+            number = number.mask(~has_code & number.str.startswith("0"), number.str[1:])
+        formatted[mask] = number.where(has_code, code + number)
+
+    known = formatted.notna()
+    length = formatted.str.len()
+    valid = known & length.between(E164_MIN_DIGITS, E164_MAX_DIGITS)
+    for tld, (shortest, longest) in NATIONAL_LENGTHS.items():
+        code = CALLING_CODES[tld]
+        with_code = formatted.str.startswith(code, na=False)
+        valid &= ~with_code | (length - len(code)).between(shortest, longest)
+    values = pd.concat([("+" + formatted[valid]), digits[~known & (digits.str.len() >= NATIONAL_MIN_DIGITS)]])
+    return _collect(values, phones.index)
+
+
+def normalize_contacts(df):
+    """Returns a copy of df with its emails and phones lists validated, formatted and deduped.
+
+    df needs url, emails and phones columns (lists); an optional tld column names the searched
+    country for phone formatting. The whole frame is processed with vectorized string operations.
+    """
+    df = df.copy()
+    df["emails"] = normalize_emails(df["emails"])
+    df["phones"] = normalize_phones(df["phones"], row_countries(df))
+    return df
+
+
+def normalize_store(store, batch_rows=POSTPROCESS_BATCH_ROWS):
+    """Post-processes every stored row not normalized yet. Returns the number of rows updated."""
+    updated = 0
+    while True:
+        df = store.pending_normalization(batch_rows)
+        if df.empty:
+            return updated
+        store.update_contacts(normalize_contacts(df))
+        updated += len(df)
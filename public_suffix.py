@@ -0,0 +1,127 @@
+import ipaddress
+import os
+import threading
+from functools import lru_cache
+from urllib.parse import urlsplit
+
+# =======================
+# Public Suffix Configuration
+# =======================
+# Kopia https://publicsuffix.org/list/public_suffix_list.dat (MPL 2.0); działa offline
+PUBLIC_SUFFIX_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "public_suffix_list.dat")
+# Liczba zapamiętanych hostów (wyniki Google powtarzają te same hosty wielokrotnie)
+HOST_CACHE_SIZE = 65536
+
+_RULE_END = "$"
+_EXCEPTION = "!"
+_WILDCARD = "*"
+
+
+def to_ascii(label):
+    """Punycode form of one hostname label, so 'łódź.pl' and 'xn--d-uga0v4h.pl' resolve alike."""
+    if label.isascii():
+        return label
+    try:
+        return label.encode("idna").decode("ascii")
+    except UnicodeError:
+        return label
+
+
+def compile_rules(lines):
+    """Builds the suffix trie: labels from right to left, '$' marks a rule (value '!' for exceptions)."""
+    trie = {}
+    for line in lines:
+        rule = line.strip().split(" ", 1)[0]
+        if not rule or rule.startswith("//"):
+            continue
+        exception = rule.startswith(_EXCEPTION)
+        node = trie
+        for label in reversed(rule.lstrip(_EXCEPTION).lower().split(".")):
+            node = node.setdefault(to_ascii(label), {})
+        node[_RULE_END] = _EXCEPTION if exception else True
+    return trie
+
+
+class PublicSuffixList:
+    """Offline public suffix list resolver: finds the registrable domain of a host."""
+
+    def __init__(self, path=PUBLIC_SUFFIX_FILE):
+        with open(path, "r", encoding="utf-8") as f:
+            self._trie = compile_rules(f)
+
+    def suffix_length(self, labels):
+        """Number of trailing labels forming the public suffix (at least 1, per the implicit '*' rule)."""
+        length = 1
+        node = self._trie
+        for depth, label in enumerate(reversed(labels), 1):
+            child = node.get(label)
+            if child is not None and child.get(_RULE_END) == _EXCEPTION:
+                return depth - 1
+            if child is not None and child.get(_RULE_END):
+                length = depth
+            elif _WILDCARD in node:
+                length = depth
+            if child is None:
+                break
+            node = child
+        return length
+
+    def registrable_domain(self, host):
+        """eTLD+1 of a normalized host, e.g. 'shop.firma.com.pl' -> 'firma.com.pl'."""
+        labels = [to_ascii(label) for label in host.split(".")]
+        length = self.suffix_length(labels)
+        return ".".join(labels[-(length + 1):])
+
+
+def normalize_host(netloc):
+    """Lowercase host of a netloc without credentials, port or trailing dot."""
+    host = urlsplit("//" + netloc).hostname or ""
+    return host.rstrip(".")
+
+
+def is_ip_address(host):
+    try:
+        ipaddress.ip_address(host)
+        return True
+    except ValueError:
+        return False
+
+
+_public_suffix_list = None
+_public_suffix_lock = threading.Lock()
+
+
+def get_public_suffix_list():
+    """Returns the shared resolver, compiling the list on first use."""
+    global _public_suffix_list
+    if _public_suffix_list is None:
+        with _public_suffix_lock:
+            if _public_suffix_list is None:
+                _public_suffix_list = PublicSuffixList()
+    return _public_suffix_list
+
+
+@lru_cache(maxsize=HOST_CACHE_SIZE)
+def domain_of_netloc(netloc):
+    """Registrable domain for a URL's netloc; cached, since search results repeat the same hosts."""
+    try:
+        host = normalize_host(netloc)
+    except ValueError:
+        return ""
+    if not host or is_ip_address(host):
+        return host
+    return get_public_suffix_list().registrable_domain(host)
+
+
+def registrable_domain_of_url(url):
+    """Registrable domain of a URL ('https://www.sklep.firma.co.uk:8080/x' -> 'firma.co.uk').
+
+    'www.' and any other subdomain fall away with the eTLD+1 rule, while a host that is itself
+    directly under a public suffix (e.g. 'www.ck') is kept whole. IP addresses are returned as
+    they are; an unparsable URL gives ''.
+    """
+    # Wycinamy netloc bez pełnego parsowania adresu; parsowanie robi (raz na host) domain_of_netloc
+    rest = url.partition("//")[2] if "//" in url else url
+    for separator in "/?#":
+        rest = rest.split(separator, 1)[0]
+    return domain_of_netloc(rest)
@@ -0,0 +1,187 @@
+import json
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# =======================
+# Quota Configuration
+# =======================
+DAILY_QUERY_LIMIT = 100
+# Godzina, o której Google odnawia dzienny limit zapytań
+QUOTA_RESET_HOUR = 9
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+# Liczba dni przechowywanych w historii zużycia (plik <licznik>.history.json)
+QUOTA_HISTORY_DAYS = 400
+
+
+def next_quota_reset(now=None):
+    """Returns the datetime of the next 9:00 quota reset."""
+    now = now or datetime.now()
+    next_reset = datetime(now.year, now.month, now.day, QUOTA_RESET_HOUR, 0, 0)
+    if now.hour >= QUOTA_RESET_HOUR:
+        next_reset += timedelta(days=1)
+    return next_reset
+
+
+def is_reset_due(last_date, now=None):
+    """Checks whether a 9:00 reset happened since last_date (they fall in different quota days)."""
+    return quota_day(last_date) != quota_day(now or datetime.now())
+
+
+def quota_day(moment=None):
+    """Name of the quota day a moment belongs to: the date on which that day's 9:00 window opened."""
+    moment = moment or datetime.now()
+    day = moment.date() if moment.hour >= QUOTA_RESET_HOUR else moment.date() - timedelta(days=1)
+    return day.isoformat()
+
+
+@contextmanager
+def file_lock(path):
+    """Exclusive lock on path + '.lock', held across processes (CLI and GUI running side by side)."""
+    with open(path + ".lock", "a+") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        else:
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def atomic_write(path, text):
+    """Writes text to a temporary file next to path and renames it over path."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+class QuotaLedger:
+    """Daily query counter for one API key, stored as 'date\\ncount' in a text file.
+
+    The count is cached in memory; the file is parsed again only when its mtime changes, i.e. when
+    another process wrote it. Updates re-read the file under a cross-process lock and persist it by
+    write-and-rename, so a reader never sees a truncated file. Observers registered with subscribe()
+    are called with (count, limit) after every change, and the final count of each quota day is kept
+    in <file>.history.json for capacity planning.
+    """
+
+    def __init__(self, path, limit=DAILY_QUERY_LIMIT):
+        self.path = path
+        self.history_path = path + ".history.json"
+        self.limit = limit
+        self._lock = threading.RLock()
+        self._observers = []
+        self._count = 0
+        self._last_date = None
+        self._mtime = None
+
+    def subscribe(self, callback):
+        """Registers callback(count, limit), called after every change of the counter."""
+        with self._lock:
+            self._observers.append(callback)
+
+    def _notify(self, count):
+        for callback in list(self._observers):
+            try:
+                callback(count, self.limit)
+            except Exception as e:
+                print(f"Quota observer error: {e}")
+
+    def _file_mtime(self):
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _load(self):
+        """Parses the counter file into memory."""
+        self._mtime = self._file_mtime()
+        try:
+            with open(self.path, "r") as f:
+                lines = f.readlines()
+            self._last_date = datetime.strptime(lines[0].strip(), DATE_FORMAT)
+            self._count = int(lines[1].strip())
+        except (FileNotFoundError, IndexError, ValueError):
+            self._last_date, self._count = None, 0
+
+    def _current(self):
+        """In-memory count for the current quota day (0 once 9:00 has passed since the last write)."""
+        if self._last_date is None or is_reset_due(self._last_date):
+            return 0
+        return self._count
+
+    def get_count(self):
+        """Returns the query counter, re-reading the file only if another process changed it."""
+        with self._lock:
+            if self._mtime is None or self._file_mtime() != self._mtime:
+                self._load()
+            return self._current()
+
+    def update(self, count):
+        """Sets the query counter."""
+        with self._lock:
+            with file_lock(self.path):
+                self._persist(count)
+        self._notify(count)
+
+    def increment(self, amount=1):
+        """Adds used queries (a negative amount refunds them) and returns the new count."""
+        with self._lock:
+            with file_lock(self.path):
+                self._load()
+                count = max(0, self._current() + amount)
+                self._persist(count)
+        self._notify(count)
+        return count
+
+    def reset(self):
+        """Resets the query counter."""
+        self.update(0)
+
+    def remaining(self):
+        return max(0, self.limit - self.get_count())
+
+    def _persist(self, count):
+        now = datetime.now()
+        atomic_write(self.path, now.strftime(DATE_FORMAT) + "\n" + str(count) + "\n")
+        self._count, self._last_date, self._mtime = count, now, self._file_mtime()
+        self._record_history(quota_day(now), count)
+
+    def history(self):
+        """Returns {quota_day: queries used} for the recorded days, oldest first."""
+        try:
+            with open(self.history_path, "r") as f:
+                return dict(sorted(json.load(f).items()))
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _record_history(self, day, count):
+        history = self.history()
+        history[day] = count
+        days = sorted(history)[-QUOTA_HISTORY_DAYS:]
+        atomic_write(self.history_path, json.dumps({d: history[d] for d in days}, indent=1))
@@ -0,0 +1,277 @@
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+# =======================
+# Result Store Configuration
+# =======================
+OUTPUT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Search_Results")
+RESULTS_DB_FILE = os.path.join(OUTPUT_DIR, "prospects.sqlite")
+PROSPECTS_FILE = os.path.join(OUTPUT_DIR, "prospects.xlsx")
+
+# Kolumny w kolejności, w jakiej trafiały do prospects.xlsx
+CONTACT_COLUMNS = ["query", "url", "emails", "phones", "description", "contact_links"]
+# Kolumny listowe: w bazie jako tablice JSON, w DataFrame jako listy Pythona
+LIST_COLUMNS = ["emails", "phones", "contact_links"]
+# Separator list w plikach płaskich (xlsx, csv)
+LIST_SEPARATOR = ";"
+# Podział eksportu: wartość partycji i kolejność wierszy (zgodna z indeksami poniżej)
+PARTITIONS = {
+    None: ("''", "id"),
+    "query": ("COALESCE(query, '')", "query, id"),
+    "country": ("COALESCE(tld, '')", "tld, id"),
+    "date": ("substr(added_at, 1, 10)", "added_at, id"),
+}
+# Wersja reguł wyznaczania domeny (PRAGMA user_version); 1 = domena rejestrowalna wg listy sufiksów publicznych
+DOMAIN_RULES_VERSION = 1
+
+
+def encode_list(value):
+    """Stores a list column as a JSON array; legacy ';'-joined strings are split first."""
+    if isinstance(value, str):
+        value = [item for item in value.split(LIST_SEPARATOR) if item]
+    return json.dumps(list(value or []), ensure_ascii=False)
+
+
+def decode_list(value):
+    """Reads a list column written by encode_list (or a legacy ';'-joined string)."""
+    if not value:
+        return []
+    if value.startswith("["):
+        return json.loads(value)
+    return [item for item in value.split(LIST_SEPARATOR) if item]
+
+
+def flatten_lists(df):
+    """Copy of df with list columns joined by LIST_SEPARATOR, for formats without list cells."""
+    df = df.copy()
+    for column in LIST_COLUMNS:
+        if column in df:
+            df[column] = df[column].map(LIST_SEPARATOR.join)
+    return df
+
+
+class ResultStore:
+    """Append-only SQLite store of contact rows, unique on url and on domain."""
+
+    def __init__(self, path=RESULTS_DB_FILE):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(
+            "PRAGMA journal_mode=WAL;"
+            "CREATE TABLE IF NOT EXISTS contacts ("
+            " id INTEGER PRIMARY KEY,"
+            " query TEXT, url TEXT NOT NULL, domain TEXT,"
+            " emails TEXT, phones TEXT, description TEXT, contact_links TEXT,"
+            " added_at TEXT NOT NULL);"
+            "CREATE UNIQUE INDEX IF NOT EXISTS contacts_url ON contacts (url);"
+            "CREATE UNIQUE INDEX IF NOT EXISTS contacts_domain ON contacts (domain);"
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(contacts)")}
+        # tld kraju wyszukiwania (do formatu E.164); normalized = 1 po przejściu przez postprocess
+        if "tld" not in columns:
+            self._conn.execute("ALTER TABLE contacts ADD COLUMN tld TEXT")
+        if "normalized" not in columns:
+            self._conn.execute("ALTER TABLE contacts ADD COLUMN normalized INTEGER NOT NULL DEFAULT 0")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS contacts_pending ON contacts (normalized) WHERE normalized = 0")
+        self._conn.executescript(
+            "CREATE INDEX IF NOT EXISTS contacts_query ON contacts (query);"
+            "CREATE INDEX IF NOT EXISTS contacts_tld ON contacts (tld);"
+            "CREATE INDEX IF NOT EXISTS contacts_added ON contacts (added_at);"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def _row_values(row):
+        return [encode_list(row.get(column)) if column in LIST_COLUMNS else row.get(column, "")
+                for column in CONTACT_COLUMNS]
+
+    def add(self, row, domain=None, tld=None):
+        """Records one contact row immediately. Returns False if its url/domain is already stored.
+
+        List columns may be lists or ';'-joined strings. tld is the searched country's domain.
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO contacts"
+                " (query, url, emails, phones, description, contact_links, domain, added_at, tld)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                self._row_values(row) + [domain or None, datetime.now().isoformat(timespec="seconds"), tld],
+            )
+            self._conn.commit()
+        return cursor.rowcount == 1
+
+    def has_url(self, url):
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM contacts WHERE url = ?", (url,)).fetchone() is not None
+
+    def has_domain(self, domain):
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM contacts WHERE domain = ?", (domain,)).fetchone() is not None
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM contacts").fetchone()[0]
+
+    def domain_version(self):
+        with self._lock:
+            return self._conn.execute("PRAGMA user_version").fetchone()[0]
+
+    def reindex_domains(self, domain_of, version=DOMAIN_RULES_VERSION):
+        """Recomputes the domain column with new rules. Rows whose new domain is taken keep no domain."""
+        changed = 0
+        with self._lock:
+            rows = self._conn.execute("SELECT id, url, domain FROM contacts ORDER BY id").fetchall()
+            for row_id, url, old_domain in rows:
+                domain = domain_of(url) or None
+                if domain == old_domain:
+                    continue
+                try:
+                    self._conn.execute("UPDATE contacts SET domain = ? WHERE id = ?", (domain, row_id))
+                except sqlite3.IntegrityError:
+                    self._conn.execute("UPDATE contacts SET domain = NULL WHERE id = ?", (row_id,))
+                changed += 1
+            self._conn.execute(f"PRAGMA user_version = {int(version)}")
+            self._conn.commit()
+        return changed
+
+    def count_domains(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(domain) FROM contacts").fetchone()[0]
+
+    def iter_domains(self, batch_size=10000):
+        """Yields every stored domain, reading in batches so millions of rows never sit in memory."""
+        last_id = 0
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT id, domain FROM contacts WHERE id > ? AND domain IS NOT NULL ORDER BY id LIMIT ?",
+                    (last_id, batch_size),
+                ).fetchall()
+            if not rows:
+                return
+            for _, domain in rows:
+                yield domain
+            last_id = rows[-1][0]
+
+    @staticmethod
+    def _decode_lists(df):
+        for column in LIST_COLUMNS:
+            if column in df:
+                df[column] = df[column].map(decode_list)
+        return df
+
+    def to_dataframe(self, urls=None):
+        """Loads stored rows (all, or only the given urls) in insertion order, with list columns."""
+        # pandas ładowany dopiero przy pierwszym użyciu - krótszy start GUI i cli.py
+        import pandas as pd
+
+        sql = f"SELECT {', '.join(CONTACT_COLUMNS)} FROM contacts"
+        if urls is None:
+            with self._lock:
+                return self._decode_lists(pd.read_sql_query(sql + " ORDER BY id", self._conn))
+
+        urls = list(urls)
+        frames = []
+        with self._lock:
+            # Paczki po 500, żeby nie przekroczyć limitu parametrów SQLite
+            for i in range(0, len(urls), 500):
+                chunk = urls[i:i + 500]
+                frames.append(pd.read_sql_query(
+                    sql + f" WHERE url IN ({', '.join('?' * len(chunk))}) ORDER BY id", self._conn,
+                    params=chunk))
+        if not frames:
+            return pd.DataFrame(columns=CONTACT_COLUMNS)
+        return self._decode_lists(pd.concat(frames, ignore_index=True))
+
+    def pending_normalization(self, limit=50000):
+        """Up to limit rows not yet post-processed: id, url, tld and the email/phone lists."""
+        import pandas as pd
+
+        with self._lock:
+            df = pd.read_sql_query(
+                "SELECT id, url, tld, emails, phones FROM contacts WHERE normalized = 0 ORDER BY id LIMIT ?",
+                self._conn, params=(limit,))
+        return self._decode_lists(df)
+
+    def update_contacts(self, df):
+        """Writes back post-processed email/phone lists (df with id, emails, phones) and marks the rows."""
+        rows = zip(df["emails"].map(encode_list), df["phones"].map(encode_list), df["id"].astype(int))
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE contacts SET emails = ?, phones = ?, normalized = 1 WHERE id = ?", list(rows))
+            self._conn.commit()
+
+    def iter_rows(self, partition_by=None, batch_size=5000):
+        """Streams (partition value, row tuple in CONTACT_COLUMNS order) for every stored row.
+
+        Rows come ordered by partition (query, country tld or date added) and then by insertion.
+        List columns stay JSON text. A separate read-only connection is used, so a long export
+        reads a consistent snapshot and does not hold up rows being added meanwhile.
+        """
+        partition, order = PARTITIONS[partition_by]
+        conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True)
+        try:
+            cursor = conn.execute(f"SELECT {partition}, {', '.join(CONTACT_COLUMNS)} FROM contacts ORDER BY {order}")
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    return
+                for row in rows:
+                    yield row[0], row[1:]
+        finally:
+            conn.close()
+
+    def import_excel(self, path=PROSPECTS_FILE, domain_of=None):
+        """One-off migration of rows from an existing prospects.xlsx."""
+        if not os.path.exists(path):
+            return 0
+        import pandas as pd
+
+        df = pd.read_excel(path).fillna("")
+        imported = 0
+        with self._lock:
+            for row in df.to_dict("records"):
+                cursor = self._conn.execute(
+                    "INSERT OR IGNORE INTO contacts"
+                    " (query, url, emails, phones, description, contact_links, domain, added_at)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    self._row_values({column: str(row.get(column, "")) for column in CONTACT_COLUMNS})
+                    + [(domain_of(str(row.get("url", ""))) if domain_of else "") or None,
+                       datetime.now().isoformat(timespec="seconds")],
+                )
+                imported += cursor.rowcount
+            self._conn.commit()
+        return imported
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_result_store = None
+_result_store_lock = threading.Lock()
+
+
+def get_result_store(domain_of=None):
+    """Returns the shared result store; on first creation imports an existing prospects.xlsx."""
+    global _result_store
+    if _result_store is None:
+        with _result_store_lock:
+            if _result_store is None:
+                is_new = not os.path.exists(RESULTS_DB_FILE)
+                store = ResultStore()
+                if is_new:
+                    imported = store.import_excel(domain_of=domain_of)
+                    if imported:
+                        print(f"Imported {imported} existing records from {PROSPECTS_FILE}")
+                if domain_of is not None and store.domain_version() < DOMAIN_RULES_VERSION:
+                    changed = store.reindex_domains(domain_of)
+                    if changed:
+                        print(f"Recomputed the domain of {changed} stored records")
+                _result_store = store
+    return _result_store
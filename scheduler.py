@@ -0,0 +1,146 @@
+import threading
+from datetime import datetime, timedelta
+
+import engine
+from job_journal import get_job_journal
+from quota import next_quota_reset
+
+# =======================
+# Scheduler Configuration
+# =======================
+# Co ile sekund harmonogram zagląda do kolejki, jeśli nic go wcześniej nie obudzi
+SCHEDULER_POLL_SECONDS = 60
+# Przy wyczerpanym limicie: ponowne sprawdzenie co tyle sekund (np. po dodaniu klucza w innym procesie)
+QUOTA_RECHECK_SECONDS = 300
+# Zapas po resecie o 9:00, zanim ruszą czekające zadania
+RESET_MARGIN_SECONDS = 60
+# Zadanie przerwane mimo wolnego limitu (np. awaria sieci) jest ponawiane dopiero po tej przerwie
+JOB_RETRY_DELAY = 15 * 60
+
+
+class JobScheduler:
+    """Runs queued journal jobs in the background, one at a time, as quota allows.
+
+    Jobs never overlap by design: run metrics (reset_metrics) and the query-limit warning are
+    shared by the whole process, and parallel jobs would only compete for the same quota and
+    fetch workers. Parallelism lives inside a job (search_workers, workers, extract_workers).
+
+    When the key pool has no queries left, queued jobs wait for the next 9:00 reset. A job that
+    stops unfinished (quota used up mid-run, network failure) goes back to the queue and is
+    continued later, so a large campaign spreads over as many quota days as it needs.
+    run_job(job) runs one job dict from the journal and returns the pipeline summary.
+    """
+
+    def __init__(self, run_job=None, journal=None, quota_remaining=None):
+        self.run_job = run_job or engine.run_job
+        self.journal = journal or get_job_journal()
+        self.quota_remaining = quota_remaining or engine.quota_remaining
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._active = {}
+        self._not_before = {}
+        self._announced_reset = None
+        self._thread = None
+
+    def start(self):
+        """Starts the background dispatch loop (once)."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="job-scheduler", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        """Stops starting new jobs; jobs already running finish normally."""
+        self._stopped.set()
+        self._wakeup.set()
+
+    def wake(self):
+        """Re-checks the queue now (after a job was queued or keys were added)."""
+        self._wakeup.set()
+
+    def retry_now(self, job_id):
+        """Drops the retry delay of a queued job and re-checks the queue."""
+        with self._lock:
+            self._not_before.pop(job_id, None)
+        self.wake()
+
+    def active_jobs(self):
+        with self._lock:
+            return sorted(self._active)
+
+    def run_until_idle(self):
+        """Runs the queue from the calling thread until no job is queued or running (cli.py --run-queue)."""
+        while not self._stopped.is_set():
+            delay = self.dispatch()
+            with self._lock:
+                idle = not self._active
+            if idle and not self.journal.queued_jobs():
+                return
+            self._wakeup.wait(delay)
+            self._wakeup.clear()
+
+    def _loop(self):
+        while not self._stopped.is_set():
+            delay = self.dispatch()
+            self._wakeup.wait(delay)
+            self._wakeup.clear()
+
+    def dispatch(self, now=None):
+        """Starts the next queued job when none is running and quota allows. Returns seconds until the next check."""
+        now = now or datetime.now()
+        queued = self.journal.queued_jobs()
+        with self._lock:
+            ready = [job for job in queued
+                     if job["id"] not in self._active and self._not_before.get(job["id"], now) <= now]
+            busy = bool(self._active)
+            retries = [moment for moment in self._not_before.values() if moment > now]
+        delay = SCHEDULER_POLL_SECONDS
+        if retries:
+            delay = max(1.0, min(delay, (min(retries) - now).total_seconds()))
+        if not ready or busy:
+            return delay
+
+        if self.quota_remaining() <= 0:
+            reset = next_quota_reset(now)
+            if self._announced_reset != reset:
+                self._announced_reset = reset
+                print(f"Daily query limit used up: {len(ready)} queued job(s) will start after "
+                      f"the reset at {reset:%Y-%m-%d %H:%M}")
+            until_reset = (reset - now).total_seconds() + RESET_MARGIN_SECONDS
+            return max(1.0, min(until_reset, QUOTA_RECHECK_SECONDS))
+
+        for job in ready:
+            # Zajęcie w bazie: inny proces (GUI albo cli.py --run-queue) nie uruchomi tego samego zadania
+            if not self.journal.claim_job(job["id"]):
+                continue
+            print(f"Starting queued job #{job['id']} ({len(job['queries'])} queries)")
+            thread = threading.Thread(target=self._run, args=(job,), name=f"job-{job['id']}")
+            with self._lock:
+                self._active[job["id"]] = thread
+            thread.start()
+            break
+        return delay
+
+    def _run(self, job):
+        job_id = job["id"]
+        summary = None
+        try:
+            summary = self.run_job(job)
+        except Exception as e:
+            print(f"Job #{job_id} failed: {e}")
+        finally:
+            if not (summary and summary.get("completed")):
+                self.journal.requeue_job(job_id)
+                if self.quota_remaining() > 0:
+                    # Przerwane mimo wolnego limitu - bez natychmiastowej pętli ponowień
+                    with self._lock:
+                        self._not_before[job_id] = datetime.now() + timedelta(seconds=JOB_RETRY_DELAY)
+                    print(f"Job #{job_id} is back in the queue; retrying in {JOB_RETRY_DELAY // 60} minutes")
+                else:
+                    print(f"Job #{job_id} is back in the queue until the daily limit resets")
+            with self._lock:
+                self._active.pop(job_id, None)
+                if summary and summary.get("completed"):
+                    self._not_before.pop(job_id, None)
+            self.wake()
@@ -0,0 +1,173 @@
+import csv
+import os
+import re
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+
+# =======================
+# Search History Configuration
+# =======================
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SEARCH_HISTORY_DB = os.path.join(BASE_DIR, "search_history.sqlite")
+# Dawny płaski plik historii; importowany jednorazowo przy tworzeniu bazy
+LEGACY_HISTORY_FILE = os.path.join(BASE_DIR, "search_history.txt")
+# Zapytanie wyszukiwane w tym okresie jest oznaczane jako powtórka przed wydaniem limitu API
+RECENT_SEARCH_DAYS = 30
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+HISTORY_COLUMNS = ["id", "searched_at", "job_id", "query", "lang_code", "tld", "num_results", "api_queries", "leads"]
+LEGACY_SEARCH_RE = re.compile(r"^Search on: (.+)$")
+LEGACY_QUERY_RE = re.compile(r"^- (.*) \((\d+) API queries\)$")
+
+
+def query_key(query):
+    """Case- and whitespace-insensitive form of a query, used to spot repeated searches."""
+    return " ".join(query.lower().split())
+
+
+class SearchHistory:
+    """SQLite history of searched queries: one row per query of a job, with the leads it yielded."""
+
+    def __init__(self, path=SEARCH_HISTORY_DB):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(
+            "PRAGMA journal_mode=WAL;"
+            "CREATE TABLE IF NOT EXISTS searches ("
+            " id INTEGER PRIMARY KEY,"
+            " searched_at TEXT NOT NULL, job_id INTEGER,"
+            " query TEXT NOT NULL, query_key TEXT NOT NULL,"
+            " lang_code TEXT, tld TEXT, num_results INTEGER, api_queries INTEGER,"
+            " leads INTEGER NOT NULL DEFAULT 0);"
+            "CREATE INDEX IF NOT EXISTS searches_query ON searches (query_key, tld, searched_at);"
+            "CREATE INDEX IF NOT EXISTS searches_country ON searches (tld, searched_at);"
+            "CREATE INDEX IF NOT EXISTS searches_date ON searches (searched_at);"
+            "CREATE INDEX IF NOT EXISTS searches_leads ON searches (leads);"
+            "CREATE INDEX IF NOT EXISTS searches_job ON searches (job_id, query);"
+        )
+        self._conn.commit()
+
+    def record_job(self, job_id, queries, lang_code, tld, num_results, when=None):
+        """Adds one history row per query of a newly started or queued job."""
+        searched_at = (when or datetime.now()).strftime(DATE_FORMAT)
+        api_queries = (num_results + 9) // 10
+        with self._lock:
+            self._conn.executemany(
+                "INSERT INTO searches (searched_at, job_id, query, query_key, lang_code, tld, num_results, api_queries)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [(searched_at, job_id, query, query_key(query), lang_code, tld, num_results, api_queries)
+                 for query in queries],
+            )
+            self._conn.commit()
+
+    def add_leads(self, job_id, leads_by_query):
+        """Adds the new records found by a run to its queries' rows ({query: count})."""
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE searches SET leads = leads + ? WHERE job_id = ? AND query = ?",
+                [(count, job_id, query) for query, count in leads_by_query.items() if count],
+            )
+            self._conn.commit()
+
+    def _where(self, text=None, tld=None):
+        clauses, params = [], []
+        if text:
+            clauses.append("query_key LIKE ?")
+            params.append(f"%{query_key(text)}%")
+        if tld:
+            clauses.append("tld = ?")
+            params.append(tld)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def count(self, text=None, tld=None):
+        where, params = self._where(text, tld)
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM searches{where}", params).fetchone()[0]
+
+    def page(self, offset=0, limit=50, text=None, tld=None):
+        """One page of history rows (dicts), newest first; text filters on the query."""
+        where, params = self._where(text, tld)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {', '.join(HISTORY_COLUMNS)} FROM searches{where} ORDER BY id DESC LIMIT ? OFFSET ?",
+                params + [limit, offset],
+            ).fetchall()
+        return [dict(zip(HISTORY_COLUMNS, row)) for row in rows]
+
+    def recent_searches(self, queries, tld=None, days=RECENT_SEARCH_DAYS, now=None):
+        """{query: last history row} for the queries already searched (same country) in the last days."""
+        since = ((now or datetime.now()) - timedelta(days=days)).strftime(DATE_FORMAT)
+        found = {}
+        with self._lock:
+            for query in queries:
+                row = self._conn.execute(
+                    f"SELECT {', '.join(HISTORY_COLUMNS)} FROM searches"
+                    # Wpisy zaimportowane ze starego pliku nie mają kraju - pasują do każdego
+                    " WHERE query_key = ? AND (tld IS ? OR tld IS NULL) AND searched_at >= ?"
+                    " ORDER BY searched_at DESC LIMIT 1",
+                    (query_key(query), tld, since),
+                ).fetchone()
+                if row is not None:
+                    found[query] = dict(zip(HISTORY_COLUMNS, row))
+        return found
+
+    def export_csv(self, path):
+        """Writes the whole history to a CSV file, oldest first. Returns the number of rows."""
+        with self._lock:
+            rows = self._conn.execute(f"SELECT {', '.join(HISTORY_COLUMNS)} FROM searches ORDER BY id").fetchall()
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(HISTORY_COLUMNS)
+            writer.writerows(rows)
+        return len(rows)
+
+    def import_text_file(self, path=LEGACY_HISTORY_FILE):
+        """One-off migration of the old search_history.txt (country unknown). Returns rows imported."""
+        if not os.path.exists(path):
+            return 0
+        rows = []
+        searched_at = None
+        with open(path, "r", errors="replace") as f:
+            for line in f:
+                line = line.rstrip("\n")
+                match = LEGACY_SEARCH_RE.match(line)
+                if match:
+                    searched_at = match.group(1).strip()
+                    continue
+                match = LEGACY_QUERY_RE.match(line)
+                if match and searched_at:
+                    query, api_queries = match.group(1), int(match.group(2))
+                    rows.append((searched_at, query, query_key(query), api_queries * 10, api_queries))
+        with self._lock:
+            self._conn.executemany(
+                "INSERT INTO searches (searched_at, query, query_key, num_results, api_queries) VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._conn.commit()
+        return len(rows)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_search_history = None
+_search_history_lock = threading.Lock()
+
+
+def get_search_history():
+    """Returns the shared search history; on first creation imports an existing search_history.txt."""
+    global _search_history
+    if _search_history is None:
+        with _search_history_lock:
+            if _search_history is None:
+                is_new = not os.path.exists(SEARCH_HISTORY_DB)
+                history = SearchHistory()
+                if is_new:
+                    imported = history.import_text_file()
+                    if imported:
+                        print(f"Imported {imported} searches from {LEGACY_HISTORY_FILE}")
+                _search_history = history
+    return _search_history
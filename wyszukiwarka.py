@@ -1,77 +1,36 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 import threading
-import pandas as pd
-import re
 import os
-import requests
-from bs4 import BeautifulSoup
-from urllib.parse import urljoin, urlparse
-import time
-import random
-from datetime import datetime, timedelta
 import platform
 import sys
 import webbrowser 
-
-# =======================
-# API and Limit Configuration
-# =======================
-MAX_RESULTS_PER_QUERY = 100
-SEARCH_HISTORY_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "search_history.txt")
-QUERIES_COUNT_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "query_counter.txt")
-# Plik konfiguracyjny do zapisu kluczy API
-API_CONFIG_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "api_config.txt")
-DATE_FORMAT = "%Y-%m-%d %H:%M:%S" 
-
-# =======================
-# Global Variables for API Keys (will be populated on load or input)
-# =======================
-GLOBAL_API_KEY = ""
-GLOBAL_CSE_ID = ""
-
-
-# =======================
-# Working Folder
-# =======================
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-OUTPUT_DIR = os.path.join(BASE_DIR, "Search_Results")
-os.makedirs(OUTPUT_DIR, exist_ok=True)
-
-
-# =======================
-# Key Persistence Functions
-# =======================
-def save_api_keys(api_key, cse_id):
-    """Saves API keys to a local file."""
-    try:
-        with open(API_CONFIG_FILE, "w") as f:
-            f.write(f"API_KEY={api_key}\n")
-            f.write(f"CSE_ID={cse_id}\n")
-        return True
-    except Exception as e:
-        print(f"Error saving API keys: {e}")
-        return False
-
-def load_api_keys():
-    """Loads API keys from a local file and sets global variables."""
-    keys = {"API_KEY": "", "CSE_ID": ""}
-    try:
-        with open(API_CONFIG_FILE, "r") as f:
-            for line in f:
-                if line.startswith("API_KEY="):
-                    keys["API_KEY"] = line.split("=")[1].strip()
-                elif line.startswith("CSE_ID="):
-                    keys["CSE_ID"] = line.split("=")[1].strip()
-    except FileNotFoundError:
-        pass
-    
-    # Ustawienie zmiennych globalnych
-    global GLOBAL_API_KEY, GLOBAL_CSE_ID
-    GLOBAL_API_KEY = keys["API_KEY"]
-    GLOBAL_CSE_ID = keys["CSE_ID"]
-    
-    return keys
+from collections import deque
+from datetime import datetime
+
+import engine
+from crawler import CRAWL_MAX_DEPTH
+from fetcher import FETCH_WORKERS
+from job_journal import get_job_journal
+from quota import next_quota_reset
+from result_store import PROSPECTS_FILE
+from scheduler import JobScheduler
+from search_history import RECENT_SEARCH_DAYS, get_search_history
+
+# Zmiany licznika w tym procesie przychodzą od razu (observer); odczyt okresowy łapie reset i inne procesy
+COUNTER_REFRESH_MS = 30000
+# Co ile pętla Tk odbiera zdarzenia z wątków roboczych (log, postęp, licznik)
+UI_DRAIN_MS = 100
+# Maksymalna liczba linii w konsoli; starsze są usuwane (bufor cykliczny)
+CONSOLE_MAX_LINES = 5000
+# Wpisy historii na jednej stronie panelu (kolejne strony wczytywane na żądanie)
+HISTORY_PAGE_SIZE = 50
+# Eksport historii otwierany przyciskiem "Open History .csv"
+HISTORY_EXPORT_FILE = os.path.join(engine.OUTPUT_DIR, "search_history.csv")
+# Ile powtórzonych zapytań wymienić w ostrzeżeniu przed ponownym wyszukaniem
+RECENT_SHOWN = 10
+
+history_offset = 0
 
 
 # =======================
@@ -81,7 +40,7 @@ def load_api_keys():
 def check_and_require_api_keys():
     """Checks for saved keys and opens the input dialog if they are missing."""
     # 1. Wczytanie kluczy
-    keys = load_api_keys()
+    keys = engine.load_api_keys()
     
     # 2. Sprawdzenie, czy klucze są puste (jeśli są, wychodzi z funkcji)
     if keys["API_KEY"] and keys["CSE_ID"]:
@@ -118,11 +77,9 @@ def check_and_require_api_keys():
         cse_id = cse_entry.get().strip()
 
         if api_key and cse_id:
-            if save_api_keys(api_key, cse_id):
+            if engine.save_api_keys(api_key, cse_id):
                 # Ustawienie kluczy globalnych i zamknięcie okna
-                global GLOBAL_API_KEY, GLOBAL_CSE_ID
-                GLOBAL_API_KEY = api_key
-                GLOBAL_CSE_ID = cse_id
+                engine.set_api_keys(api_key, cse_id)
                 messagebox.showinfo("Success", "API keys saved and loaded.")
                 dialog.destroy()
             else:
@@ -139,334 +96,138 @@ def check_and_require_api_keys():
     root.wait_window(dialog)
 
     # Po zamknięciu dialogu, jeśli klucze nadal są puste, zamykamy program
-    if not GLOBAL_API_KEY or not GLOBAL_CSE_ID:
+    if not engine.has_api_keys():
         root.destroy()
         sys.exit()
 
 
 # =======================
-# Helper Functions (Query Counter, History, etc.)
+# Helper Functions (History, Files)
 # =======================
-def get_query_count():
-    """Retrieves the query counter from file or resets it if 9:00 AM has passed."""
-    now = datetime.now()
-    try:
-        with open(QUERIES_COUNT_FILE, "r") as f:
-            lines = f.readlines()
-            last_date_str = lines[0].strip()
-            count = int(lines[1].strip())
-            
-            last_date = datetime.strptime(last_date_str, DATE_FORMAT)
-
-            if now.date() > last_date.date() or (
-                    now.date() == last_date.date() and now.hour >= 9 and last_date.hour < 9):
-                reset_query_count()
-                return 0
-            return count
-    except (FileNotFoundError, IndexError, ValueError):
-        reset_query_count()
-        return 0
-
-
-def update_query_count(count):
-    """Updates the query counter in the file."""
-    now = datetime.now()
-    with open(QUERIES_COUNT_FILE, "w") as f:
-        f.write(now.strftime(DATE_FORMAT) + "\n")
-        f.write(str(count) + "\n")
+def format_history_row(row):
+    country = f"[{row['tld']}] " if row["tld"] else ""
+    return (f"{row['searched_at'][:16]}  {country}{row['query']}  "
+            f"({row['api_queries']} API queries, {row['leads']} leads)")
 
 
-def reset_query_count():
-    """Resets the query counter."""
-    now = datetime.now()
-    with open(QUERIES_COUNT_FILE, "w") as f:
-        f.write(now.strftime(DATE_FORMAT) + "\n")
-        f.write("0\n")
+def load_search_history(offset=None):
+    """Shows one page of the search history (newest first), filtered by the history search box."""
+    global history_offset
+    if offset is not None:
+        history_offset = max(0, offset)
+    history = get_search_history()
+    text = history_filter_var.get().strip()
+    total = history.count(text)
+    if history_offset >= total:
+        history_offset = max(0, (total - 1) // HISTORY_PAGE_SIZE * HISTORY_PAGE_SIZE)
+    rows = history.page(history_offset, HISTORY_PAGE_SIZE, text)
 
+    history_text.config(state=tk.NORMAL)
+    history_text.delete("1.0", tk.END)
+    history_text.insert(tk.END, "\n".join(format_history_row(row) for row in rows))
+    history_text.config(state=tk.DISABLED)
 
-def load_search_history():
-    """Loads history from file and displays it in the window."""
-    try:
-        with open(SEARCH_HISTORY_FILE, "r") as f:
-            history = f.read()
-            history_text.config(state=tk.NORMAL)
-            history_text.delete("1.0", tk.END)
-            history_text.insert(tk.END, history)
-            history_text.config(state=tk.DISABLED)
-    except FileNotFoundError:
-        pass
+    first = history_offset + 1 if rows else 0
+    history_page_label.config(text=f"{first}-{history_offset + len(rows)} of {total}")
+    newer_button.config(state=tk.NORMAL if history_offset > 0 else tk.DISABLED)
+    older_button.config(state=tk.NORMAL if history_offset + len(rows) < total else tk.DISABLED)
 
 
-def open_prospects_file():
-    """Opens the generated prospects.xlsx file, cross-platform."""
-    file_path = os.path.join(OUTPUT_DIR, "prospects.xlsx")
-    if os.path.exists(file_path):
-        current_os = platform.system()
-        try:
-            if current_os == "Windows":
-                os.startfile(file_path)
-            elif current_os == "Darwin":  # macOS
-                os.system(f"open {file_path}")
-            elif current_os == "Linux":
-                os.system(f"xdg-open {file_path}")
-            else:
-                messagebox.showerror("Error", "Unsupported operating system for file opening.")
-        except Exception as e:
-            messagebox.showerror("Error", f"An error occurred while opening the file: {e}")
-    else:
-        messagebox.showerror("Error", f"File does not exist:\n{file_path}")
+def show_newer_history():
+    load_search_history(history_offset - HISTORY_PAGE_SIZE)
 
 
-def open_history_file():
-    """Opens the search history file, cross-platform."""
-    if os.path.exists(SEARCH_HISTORY_FILE):
-        current_os = platform.system()
-        try:
-            if current_os == "Windows":
-                os.startfile(SEARCH_HISTORY_FILE)
-            elif current_os == "Darwin":  # macOS
-                os.system(f"open {SEARCH_HISTORY_FILE}")
-            elif current_os == "Linux":
-                os.system(f"xdg-open {SEARCH_HISTORY_FILE}")
-            else:
-                messagebox.showerror("Error", "Unsupported operating system for file opening.")
-        except Exception as e:
-            messagebox.showerror("Error", f"An error occurred while opening the file: {e}")
-    else:
-        messagebox.showerror("Error", f"History file does not exist:\n{SEARCH_HISTORY_FILE}")
+def show_older_history():
+    load_search_history(history_offset + HISTORY_PAGE_SIZE)
 
 
-def get_domain_from_url(url):
-    """Extracts the main domain from the given URL."""
+def open_file(file_path):
+    """Opens a file with the default application, cross-platform."""
+    current_os = platform.system()
     try:
-        parsed_url = urlparse(url)
-        domain_parts = parsed_url.netloc.split('.')
-        if len(domain_parts) > 1:
-            return '.'.join(domain_parts[-2:])
-        return parsed_url.netloc
-    except Exception:
-        return ""
-
-
-# =======================
-# Scraping Functions
-# =======================
-EMAIL_RE = re.compile(r"[a-zA-Z0-9.\-+_]+@[a-zA-Z0-9.\-+_]+\.[a-zA-Z]{2,}", re.I)
-ZIP_CODE_RE = re.compile(r"\b\d{2}-\d{3}\b")
-PHONE_RE = re.compile(r"(?:\+?\d{2}\s*)?(\d{3}[\s-]?\d{3}[\s-]?\d{3}|\d{9})")
+        if current_os == "Windows":
+            os.startfile(file_path)
+        elif current_os == "Darwin":  # macOS
+            os.system(f"open {file_path}")
+        elif current_os == "Linux":
+            os.system(f"xdg-open {file_path}")
+        else:
+            messagebox.showerror("Error", "Unsupported operating system for file opening.")
+    except Exception as e:
+        messagebox.showerror("Error", f"An error occurred while opening the file: {e}")
 
-warning_displayed = False
 
-def search_with_api(query, lang_code, num_results, tld):
-    """Searches for links on Google using the API, using global keys."""
-    global warning_displayed
-    global GLOBAL_API_KEY, GLOBAL_CSE_ID
-    
-    if not GLOBAL_API_KEY or not GLOBAL_CSE_ID:
-        # Ten warunek nie powinien być osiągnięty, jeśli check_and_require_api_keys zadziałało
-        root.after(0, lambda: messagebox.showerror("Błąd API", "Brak kluczy Google API Key i CSE ID."))
-        return []
-        
-    links = []
-    queries_to_make = (num_results + 9) // 10
+# Jeden eksport naraz - kolejne kliknięcia w trakcie eksportu są ignorowane
+export_lock = threading.Lock()
 
-    current_count = get_query_count()
-    if current_count + queries_to_make > 100:
-        root.after(0, lambda: messagebox.showerror("Query Limit", "Daily limit of 100 API queries reached."))
-        return []
 
-    for i in range(queries_to_make):
-        start_index = i * 10 + 1
-        url = f"https://www.googleapis.com/customsearch/v1?key={GLOBAL_API_KEY}&cx={GLOBAL_CSE_ID}&q={query}&gl={tld}&hl={lang_code}&start={start_index}"
+def open_prospects_file():
+    """Exports the result store to prospects.xlsx in the background and opens it."""
+    if not export_lock.acquire(blocking=False):
+        return
+    status_label.config(text="Exporting prospects.xlsx...")
 
+    def export():
         try:
-            response = requests.get(url, timeout=15)
-            response.raise_for_status()
-            results = response.json()
-
-            if 'items' in results:
-                for item in results['items']:
-                    links.append({"query": query, "url": item['link']})
-
-            current_count += 1
-            update_query_count(current_count)
-            
-            root.after(0, lambda count=current_count: counter_label.config(text=f"Queries: {count}/100"))
-            
-            if current_count >= 70 and not warning_displayed:
-                root.after(0, lambda: messagebox.showwarning("Uwaga: Limit Zapytania", "Zostało 30 zapytań."))
-                warning_displayed = True
-            
-            if current_count >= 100:
-                root.after(0, lambda: messagebox.showerror("Query Limit", "Dzienny limit 100 API queries osiągnięty."))
-                break
-
-
-            sleep_time = random.uniform(2, 5)
-            time.sleep(sleep_time)
-
-        except requests.exceptions.RequestException as e:
-            print(f"Error during API query for '{query}': {e}")
-            break
-
-    return links
-
-
-def fetch_page_with_requests(url):
-    """Fetches page content using requests."""
-    try:
-        response = requests.get(url, timeout=15)
-        response.raise_for_status()
-        return response.text
-    except requests.exceptions.RequestException as e:
-        print(f"Error fetching {url}: {e}")
-        return None
-
-
-def extract_contacts(html, base_url):
-    """Extracts contact details from HTML."""
-    if not html:
-        return {"emails": "", "phones": "", "description": "", "contact_links": ""}
-    soup = BeautifulSoup(html, "lxml")
-    text = soup.get_text(" ", strip=True)
-    emails = set(EMAIL_RE.findall(text))
-
-    phones = set()
-    all_numbers = PHONE_RE.findall(text)
-
-    for num in all_numbers:
-        clean_num = num.replace(" ", "").replace("-", "")
-        if not ZIP_CODE_RE.search(num) and len(clean_num) >= 9:
-            phones.add(num)
-
-    desc = ""
-    d = soup.find("meta", {"name": "description"}) or soup.find("meta", {"property": "og:description"})
-    if d and d.get("content"):
-        desc = d.get("content").strip()
-
-    contact_links = [urljoin(base_url, a["href"]) for a in soup.select("a[href]")
-                     if
-                     "kontakt" in a["href"].lower() or "contact" in a["href"].lower() or "mailto:" in a["href"].lower()]
-    return {
-        "emails": ";".join(sorted(emails)),
-        "phones": ";".join(sorted(phones)),
-        "description": desc,
-        "contact_links": ";".join(contact_links)
-    }
-
-
-def process_queries_and_links(queries, lang_code, tld):
-    """Main, synchronous function for processing queries and links."""
-    # Write search history
-    with open(SEARCH_HISTORY_FILE, "a") as f:
-        f.write(f"Search on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-        num_results_to_get = int(results_var.get())
-        queries_to_make = (num_results_to_get + 9) // 10
-        for q in queries:
-            f.write(f"- {q} ({queries_to_make} API queries)\n")
-        f.write("\n")
-
-    root.after(0, load_search_history)
-
-    num_results_to_get = int(results_var.get())
-
-    # --- Step 1: Search Links ---
-    status_label.config(text="⏳ Searching for links...")
-    progress["maximum"] = len(queries)
-    progress["value"] = 0
-    all_links = []
+            exported = engine.export_prospects(PROSPECTS_FILE)
+        except Exception as e:
+            ui_events.call(messagebox.showerror, "Save Error", f"An error occurred while saving the file: {e}")
+        else:
+            ui_events.latest("status", lambda: status_label.config(text=f"Exported {exported['rows']} records."))
+            ui_events.call(open_file, PROSPECTS_FILE)
+        finally:
+            export_lock.release()
 
-    seen_domains = set()
-    filtered_links = []
+    threading.Thread(target=export, daemon=True).start()
 
-    for idx, query in enumerate(queries):
-        links = search_with_api(query, lang_code, num_results_to_get, tld)
-        if links is None:
-            return
 
-        for link in links:
-            domain = get_domain_from_url(link['url'])
-            if domain and domain not in seen_domains:
-                filtered_links.append(link)
-                seen_domains.add(domain)
-
-        progress["value"] = idx + 1
-        root.update_idletasks()
-
-    df_links = pd.DataFrame(filtered_links).drop_duplicates(subset=["url"])
-
-    # --- Step 2: Fetch Pages and Extract Contacts ---
-    status_label.config(text="⏳ Fetching pages and extracting contacts...")
-    contacts_results = []
-    progress["maximum"] = len(df_links)
-    progress["value"] = 0
-
-    for idx, row in df_links.iterrows():
-        html = fetch_page_with_requests(row["url"])
-        info = extract_contacts(html, row["url"])
-        contacts_results.append({
-            "query": row["query"],
-            "url": row["url"],
-            **info
-        })
-        progress["value"] = idx + 1
-        root.update_idletasks()
-        sleep_time = random.uniform(2, 5)
-        print(f"Waiting for {sleep_time:.2f} seconds before next page fetch...")
-        time.sleep(sleep_time)
-
-    df_contacts = pd.DataFrame(contacts_results).drop_duplicates(subset=["url"])
-    contacts_file = os.path.join(OUTPUT_DIR, "prospects.xlsx")
-
-    # --- Step 3: Save to Excel ---
+def open_history_file():
+    """Exports the search history to a .csv file and opens it, cross-platform."""
     try:
-        if os.path.exists(contacts_file):
-            existing_df = pd.read_excel(contacts_file)
-            updated_df = pd.concat([existing_df, df_contacts]).drop_duplicates(subset=["url"]).reset_index(drop=True)
-            updated_df.to_excel(contacts_file, index=False)
-            messagebox.showinfo("Finished", f"Added {len(df_contacts)} new records to:\n{contacts_file}")
-        else:
-            df_contacts.to_excel(contacts_file, index=False)
-            messagebox.showinfo("Finished", f"Saved {len(df_contacts)} records to:\n{contacts_file}")
-    except Exception as e:
-        messagebox.showerror("Save Error", f"An error occurred while saving the file: {e}")
-
-    status_label.config(text=f"✅ Ready!")
+        get_search_history().export_csv(HISTORY_EXPORT_FILE)
+    except OSError as e:
+        messagebox.showerror("Error", f"Could not export the search history: {e}")
+        return
+    open_file(HISTORY_EXPORT_FILE)
 
 
 # =======================
 # GUI Functions
 # =======================
-def update_timer_and_counter():
-    """Updates the query counter and reset timer in the GUI."""
+def update_timer():
+    """Updates the reset countdown in the GUI (no file access, runs every second)."""
     now = datetime.now()
-    next_reset = datetime(now.year, now.month, now.day, 9, 0, 0)
-    if now.hour >= 9:
-        next_reset += timedelta(days=1)
-
-    time_left = next_reset - now
+    time_left = next_quota_reset(now) - now
     hours, remainder = divmod(time_left.seconds, 3600)
     minutes, seconds = divmod(remainder, 60)
 
     timer_label.config(text=f"Reset in: {hours:02d}:{minutes:02d}:{seconds:02d}")
 
-    query_count = get_query_count()
-    counter_label.config(text=f"Queries: {query_count}/100")
+    root.after(1000, update_timer)
+
 
-    root.after(1000, update_timer_and_counter)
+def show_query_count(used, capacity):
+    counter_label.config(text=f"Queries: {used}/{capacity}")
+
+
+def on_quota_changed(used, capacity):
+    """Quota observer; called from search threads, so the label update is handed to the Tk thread."""
+    ui_events.latest("quota", show_query_count, used, capacity)
+
+
+def refresh_query_counter():
+    """Re-reads the counter now and then to pick up the 9:00 reset and other processes (e.g. cli.py)."""
+    show_query_count(*engine.quota_status())
+    root.after(COUNTER_REFRESH_MS, refresh_query_counter)
 
 
 def run_pipeline():
-    """Starts the main process function in a separate thread."""
-    global warning_displayed
-    
+    """Adds the entered queries to the job queue; the scheduler runs them as quota allows."""
     # Sprawdzenie, czy klucze zostały załadowane 
-    if not GLOBAL_API_KEY or not GLOBAL_CSE_ID:
+    if not engine.has_api_keys():
         messagebox.showerror("Błąd Uruchomienia", "Brak kluczy API. Uruchom ponownie i wprowadź klucze.")
         return
 
-    warning_displayed = False
-    
     # 1. Pobranie zapytań tekstowych
     queries_text = queries_entry.get("1.0", tk.END).strip()
     queries = [q.strip() for q in queries_text.split("\n") if q.strip()]
@@ -476,154 +237,327 @@ def run_pipeline():
         return
     
     selected_country = country_var.get()
-    lang_code, tld = country_codes.get(selected_country, ("pl", "pl"))
+    lang_code, tld = engine.country_codes.get(selected_country, ("pl", "pl"))
+
+    # Ostrzeżenie przed ponownym wydaniem limitu na te same zapytania
+    recent = engine.recently_searched(queries, tld)
+    if recent:
+        listed = "\n".join(f"- {query} ({row['searched_at'][:10]}, {row['leads']} leads)"
+                           for query, row in list(recent.items())[:RECENT_SHOWN])
+        if len(recent) > RECENT_SHOWN:
+            listed += f"\n... and {len(recent) - RECENT_SHOWN} more"
+        answer = messagebox.askyesnocancel(
+            "Already searched recently",
+            f"{len(recent)} of {len(queries)} queries were already searched for {selected_country} "
+            f"in the last {RECENT_SEARCH_DAYS} days:\n{listed}\n\n"
+            "Yes - skip them, No - search them again, Cancel - do not start.")
+        if answer is None:
+            return
+        if answer:
+            queries = [query for query in queries if query not in recent]
+            if not queries:
+                messagebox.showinfo("Nothing to search", "All queries were searched recently.")
+                return
+
+    num_results_to_get = int(results_var.get())
+    workers = int(workers_var.get())
+    crawl_depth = CRAWL_MAX_DEPTH if crawl_var.get() else 0
+
+    # Kolejne kliknięcia nie uruchamiają równoległych przebiegów - zadania czekają w kolejce
+    job_id = engine.enqueue_job(queries, lang_code, tld, num_results_to_get, listener=TkListener(),
+                                workers=workers, crawl_depth=crawl_depth)
+    running = scheduler.active_jobs()
+    if running:
+        status_label.config(text=f"Job #{job_id} queued (job #{running[0]} is running)")
+    scheduler.wake()
 
-    def start_process():
-        process_queries_and_links(queries, lang_code, tld)
 
-    t = threading.Thread(target=start_process)
-    t.start()
+def resume_last_job():
+    """Puts the most recent interrupted job back in the queue, skipping work already done."""
+    if not engine.has_api_keys():
+        messagebox.showerror("Błąd Uruchomienia", "Brak kluczy API. Uruchom ponownie i wprowadź klucze.")
+        return
+
+    journal = get_job_journal()
+    # Tylko zadania bez żywej dzierżawy - te wykonywane teraz (tu lub w cli.py) są pomijane
+    job = journal.last_unfinished_job()
+    if job is None or not journal.requeue_job(job["id"]):
+        # Zadania czekające w kolejce na ponowienie ruszają od razu
+        queued = journal.queued_jobs()
+        for queued_job in queued:
+            scheduler.retry_now(queued_job["id"])
+        if not queued:
+            messagebox.showinfo("Resume", "There is no interrupted job to resume.")
+        return
+
+    print(f"Job #{job['id']} is back in the queue")
+    scheduler.retry_now(job["id"])
+
+
+def run_queued_job(job):
+    """Scheduler callback: runs one queued job with progress reported to the window."""
+    return engine.run_job(job, listener=TkListener())
+
+
+# =======================
+# UI Event Queue
+# =======================
+class UiEventQueue:
+    """Thread-safe mailbox from worker threads to Tk, drained in batches by drain_ui_events().
+
+    Log text is kept in a bounded deque, so a burst of output cannot pile up faster than it is
+    shown. Progress-like updates are coalesced by key (only the latest value is applied), while
+    one-off calls such as message boxes run once each, in order.
+    """
+
+    def __init__(self, max_log_chunks=CONSOLE_MAX_LINES * 2):
+        self._lock = threading.Lock()
+        self._log = deque(maxlen=max_log_chunks)
+        self._latest = {}
+        self._calls = deque()
+
+    def log(self, text):
+        with self._lock:
+            self._log.append(text)
+
+    def latest(self, key, func, *args):
+        """Schedules func(*args), replacing any not yet applied update with the same key."""
+        with self._lock:
+            self._latest[key] = (func, args)
+
+    def call(self, func, *args):
+        with self._lock:
+            self._calls.append((func, args))
+
+    def take(self):
+        """Returns and clears everything queued: (log text, coalesced updates, calls)."""
+        with self._lock:
+            text = "".join(self._log)
+            self._log.clear()
+            updates, self._latest = list(self._latest.values()), {}
+            calls, self._calls = list(self._calls), deque()
+        return text, updates, calls
+
+
+ui_events = UiEventQueue()
+
+
+def append_console(text):
+    """Appends text to the debug console and trims it to the last CONSOLE_MAX_LINES lines."""
+    console_text.config(state=tk.NORMAL)
+    console_text.insert(tk.END, text)
+    lines = int(console_text.index("end-1c").split(".")[0])
+    if lines > CONSOLE_MAX_LINES:
+        console_text.delete("1.0", f"{lines - CONSOLE_MAX_LINES + 1}.0")
+    console_text.see(tk.END)
+    console_text.config(state=tk.DISABLED)
+
+
+def drain_ui_events():
+    """Applies queued worker-thread events on the Tk thread, one batch per UI_DRAIN_MS."""
+    # Następny odbiór planujemy od razu, bo okna komunikatów poniżej są modalne
+    root.after(UI_DRAIN_MS, drain_ui_events)
+    text, updates, calls = ui_events.take()
+    if text:
+        append_console(text)
+    for func, args in updates + calls:
+        func(*args)
+
+
+# =======================
+# Pipeline Events -> Tk
+# =======================
+class TkListener(engine.PipelineListener):
+    """Forwards pipeline events from the worker thread to the Tk main loop."""
+
+    def status(self, text):
+        ui_events.latest("status", lambda: status_label.config(text=text))
+
+    def progress(self, value, maximum):
+        def apply():
+            progress["maximum"] = maximum
+            progress["value"] = value
+        ui_events.latest("progress", apply)
+
+    def info(self, title, message):
+        ui_events.call(messagebox.showinfo, title, message)
+
+    def warning(self, title, message):
+        ui_events.call(messagebox.showwarning, title, message)
+
+    def error(self, title, message):
+        ui_events.call(messagebox.showerror, title, message)
+
+    def history_changed(self):
+        ui_events.call(load_search_history)
 
 
 # =======================
 # Console Redirection Class
 # =======================
 class ConsoleRedirect:
-    def __init__(self, text_widget):
-        self.text_widget = text_widget
+    """stdout replacement: queues text for the console instead of touching Tk from worker threads."""
+
+    def __init__(self, events):
+        self.events = events
 
     def write(self, string):
-        self.text_widget.config(state=tk.NORMAL)
-        self.text_widget.insert(tk.END, string)
-        self.text_widget.see(tk.END)
-        self.text_widget.config(state=tk.DISABLED)
+        self.events.log(string)
 
     def flush(self):
         pass
 
 
+def finish_startup():
+    """Loads keys, quota, history and the job queue once the window is on screen, then preloads imports."""
+    global scheduler
+
+    # Sprawdzenie i wymuszenie wprowadzenia kluczy API, jeśli są nieobecne
+    check_and_require_api_keys()
+
+    engine.add_quota_observer(on_quota_changed)
+    refresh_query_counter()
+    load_search_history()
+    # Zadania z kolejki (także z poprzednich sesji) ruszają, gdy jest wolny limit zapytań
+    scheduler = JobScheduler(run_job=run_queued_job).start()
+    # requests, lxml, pandas i openpyxl ładowane w tle, zanim użytkownik kliknie "Start Search"
+    engine.warm_up_imports()
+
+
 # =======================
 # GUI Setup
 # =======================
-root = tk.Tk()
-root.title("Prospecting Tool - Google API")
-# Używam zapamiętanej przez Ciebie geometrii:
-root.geometry("1120x720") 
+def main():
+    """Builds the window and runs the Tk main loop."""
+    global root, queries_entry, results_var, workers_var, counter_label, timer_label
+    global country_var, crawl_var, progress, status_label, history_text, console_text
+    global history_filter_var, history_page_label, newer_button, older_button
+
+    root = tk.Tk()
+    root.title("Prospecting Tool - Google API")
+    # Używam zapamiętanej przez Ciebie geometrii:
+    root.geometry("1120x720") 
+
+    # Main frame split into two columns (left and right)
+    main_frame = ttk.Frame(root, padding=10)
+    main_frame.pack(fill=tk.BOTH, expand=True)
+
+    left_frame = ttk.Frame(main_frame, padding=10)
+    left_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
 
-# Main frame split into two columns (left and right)
-main_frame = ttk.Frame(root, padding=10)
-main_frame.pack(fill=tk.BOTH, expand=True)
+    right_frame = ttk.Frame(main_frame, padding=10)
+    right_frame.pack(side=tk.RIGHT, fill=tk.BOTH, expand=True)
 
-left_frame = ttk.Frame(main_frame, padding=10)
-left_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+    # Left Side - Controls
+    ttk.Label(left_frame, text="Enter search phrases (one per line):").pack(anchor="w")
+    queries_entry = tk.Text(left_frame, width=50, height=10)
+    queries_entry.pack(fill=tk.BOTH, expand=True, pady=5)
 
-right_frame = ttk.Frame(main_frame, padding=10)
-right_frame.pack(side=tk.RIGHT, fill=tk.BOTH, expand=True)
 
-# Left Side - Controls
-ttk.Label(left_frame, text="Enter search phrases (one per line):").pack(anchor="w")
-queries_entry = tk.Text(left_frame, width=50, height=10)
-queries_entry.pack(fill=tk.BOTH, expand=True, pady=5)
+    # --- Usunięto: Sekcja Image Search Integration ---
+    ttk.Label(left_frame, text="--- Search Options ---").pack(anchor="w", pady=(10, 0))
 
 
-# --- Usunięto: Sekcja Image Search Integration ---
-ttk.Label(left_frame, text="--- Search Options ---").pack(anchor="w", pady=(10, 0))
+    # Options and Indicators Frame
+    options_frame = ttk.Frame(left_frame)
+    options_frame.pack(fill=tk.X, pady=10)
 
+    ttk.Label(options_frame, text="Results per query:").pack(side=tk.LEFT)
+    results_var = tk.StringVar(value=10)
+    results_menu = ttk.Combobox(options_frame, textvariable=results_var, values=[10, 20, 30, 40, 50], width=5)
+    results_menu.pack(side=tk.LEFT, padx=(5, 20))
 
-# Options and Indicators Frame
-options_frame = ttk.Frame(left_frame)
-options_frame.pack(fill=tk.X, pady=10)
+    ttk.Label(options_frame, text="Fetch workers:").pack(side=tk.LEFT)
+    workers_var = tk.StringVar(value=FETCH_WORKERS)
+    workers_menu = ttk.Combobox(options_frame, textvariable=workers_var, values=[1, 4, 8, 16, 32], width=4)
+    workers_menu.pack(side=tk.LEFT, padx=(5, 20))
 
-ttk.Label(options_frame, text="Results per query:").pack(side=tk.LEFT)
-results_var = tk.StringVar(value=10)
-results_menu = ttk.Combobox(options_frame, textvariable=results_var, values=[10, 20, 30, 40, 50], width=5)
-results_menu.pack(side=tk.LEFT, padx=(5, 20))
+    counter_label = ttk.Label(options_frame, text="Queries: 0/100")
+    counter_label.pack(side=tk.LEFT, padx=10)
 
-counter_label = ttk.Label(options_frame, text="Queries: 0/100")
-counter_label.pack(side=tk.LEFT, padx=10)
+    timer_label = ttk.Label(options_frame, text="Reset in: 00:00:00")
+    timer_label.pack(side=tk.LEFT)
 
-timer_label = ttk.Label(options_frame, text="Reset in: 00:00:00")
-timer_label.pack(side=tk.LEFT)
+    country_var = tk.StringVar(value="Poland")
+    country_menu = ttk.Combobox(left_frame, textvariable=country_var, values=list(engine.country_codes.keys()))
+    country_menu.pack(pady=5)
+    country_menu.bind("<<ComboboxSelected>>", lambda e: root.focus())
 
-# Country List and Codes (Country Name: (language_code, tld))
-country_codes = {
-    "Poland": ("pl", "pl"), "Germany": ("de", "de"), "United Kingdom": ("en", "uk"),
-    "France": ("fr", "fr"), "Spain": ("es", "es"), "Italy": ("it", "it"),
-    "Netherlands": ("nl", "nl"), "Belgium": ("nl", "be"), "Sweden": ("sv", "se"),
-    "Norway": ("no", "no"), "Denmark": ("da", "dk"), "Finland": ("fi", "fi"),
-    "Switzerland": ("de", "ch"), "Austria": ("de", "at"), "Portugal": ("pt", "pt"),
-    "Ireland": ("en", "ie"), "Greece": ("el", "gr"), "Czech Republic": ("cs", "cz"),
-    "Slovakia": ("sk", "sk"), "Hungary": ("hu", "hu"), "Romania": ("ro", "ro"),
-    "Bulgaria": ("bg", "bg"), "Croatia": ("hr", "hr"), "Serbia": ("sr", "rs"),
-    "Ukraine": ("uk", "ua"), "Lithuania": ("lt", "lt"), "Latvia": ("lv", "lv"),
-    "Estonia": ("et", "ee"), "Slovenia": ("sl", "si"), "Iceland": ("is", "is"),
-    "Albania": ("sq", "al"), "Bosnia and Herzegovina": ("bs", "ba"), "Kosovo": ("sq", "xk"),
-    "North Macedonia": ("mk", "mk"), "Moldova": ("ro", "md"), "Montenegro": ("sr", "me")
-}
+    crawl_var = tk.BooleanVar(value=False)
+    ttk.Checkbutton(left_frame, text="Follow contact pages (kontakt/impressum/about)", variable=crawl_var).pack(anchor="w")
 
-country_var = tk.StringVar(value="Poland")
-country_menu = ttk.Combobox(left_frame, textvariable=country_var, values=list(country_codes.keys()))
-country_menu.pack(pady=5)
-country_menu.bind("<<ComboboxSelected>>", lambda e: root.focus())
+    # Informacja, że klucze są wczytane 
+    ttk.Label(left_frame, text="--- API Keys Loaded ---").pack(anchor="w", pady=(10, 0))
 
-# Informacja, że klucze są wczytane 
-ttk.Label(left_frame, text="--- API Keys Loaded ---").pack(anchor="w", pady=(10, 0))
 
+    progress = ttk.Progressbar(left_frame, orient="horizontal", length=400, mode="determinate")
+    progress.pack(pady=5)
 
-progress = ttk.Progressbar(left_frame, orient="horizontal", length=400, mode="determinate")
-progress.pack(pady=5)
+    status_label = ttk.Label(left_frame, text="Ready")
+    status_label.pack()
 
-status_label = ttk.Label(left_frame, text="Ready")
-status_label.pack()
+    start_button = ttk.Button(left_frame, text="Start Search", command=run_pipeline)
+    start_button.pack(pady=10)
 
-start_button = ttk.Button(left_frame, text="Start Search", command=run_pipeline)
-start_button.pack(pady=10)
+    resume_button = ttk.Button(left_frame, text="Resume Last Job", command=resume_last_job)
+    resume_button.pack()
 
-# Right Side - Search History
-history_frame = ttk.Frame(right_frame)
-history_frame.pack(fill=tk.BOTH, expand=True)
-ttk.Label(history_frame, text="Search History:").pack(anchor="w")
+    # Right Side - Search History
+    history_frame = ttk.Frame(right_frame)
+    history_frame.pack(fill=tk.BOTH, expand=True)
+    history_header = ttk.Frame(history_frame)
+    history_header.pack(fill=tk.X)
+    ttk.Label(history_header, text="Search History:").pack(side=tk.LEFT)
+    history_filter_var = tk.StringVar()
+    history_filter = ttk.Entry(history_header, textvariable=history_filter_var, width=20)
+    history_filter.pack(side=tk.LEFT, padx=5)
+    history_filter.bind("<Return>", lambda e: load_search_history(0))
+    older_button = ttk.Button(history_header, text="Older", width=6, command=show_older_history)
+    older_button.pack(side=tk.RIGHT)
+    newer_button = ttk.Button(history_header, text="Newer", width=6, command=show_newer_history)
+    newer_button.pack(side=tk.RIGHT)
+    history_page_label = ttk.Label(history_header, text="")
+    history_page_label.pack(side=tk.RIGHT, padx=5)
 
-history_text = tk.Text(history_frame, wrap=tk.WORD, state=tk.DISABLED, height=5)
-history_text.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+    history_text = tk.Text(history_frame, wrap=tk.WORD, state=tk.DISABLED, height=5)
+    history_text.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
 
-history_scrollbar = ttk.Scrollbar(history_frame, orient="vertical", command=history_text.yview)
-history_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-history_text.config(yscrollcommand=history_scrollbar.set)
+    history_scrollbar = ttk.Scrollbar(history_frame, orient="vertical", command=history_text.yview)
+    history_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+    history_text.config(yscrollcommand=history_scrollbar.set)
 
-# Console Output Window
-console_frame = ttk.Frame(right_frame)
-console_frame.pack(fill=tk.BOTH, expand=True)
-ttk.Label(console_frame, text="Debug Console:").pack(anchor="w", pady=(10, 0))
+    # Console Output Window
+    console_frame = ttk.Frame(right_frame)
+    console_frame.pack(fill=tk.BOTH, expand=True)
+    ttk.Label(console_frame, text="Debug Console:").pack(anchor="w", pady=(10, 0))
 
-console_text = tk.Text(console_frame, wrap=tk.WORD, state=tk.DISABLED, height=10, bg="#2b2b2b", fg="#cccccc")
-console_text.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+    console_text = tk.Text(console_frame, wrap=tk.WORD, state=tk.DISABLED, height=10, bg="#2b2b2b", fg="#cccccc")
+    console_text.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
 
-console_scrollbar = ttk.Scrollbar(console_frame, orient="vertical", command=console_text.yview)
-console_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-console_text.config(yscrollcommand=console_scrollbar.set)
+    console_scrollbar = ttk.Scrollbar(console_frame, orient="vertical", command=console_text.yview)
+    console_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+    console_text.config(yscrollcommand=console_scrollbar.set)
 
-sys.stdout = ConsoleRedirect(console_text)
+    sys.stdout = ConsoleRedirect(ui_events)
 
-buttons_frame = ttk.Frame(right_frame)
-buttons_frame.pack(pady=10)
+    buttons_frame = ttk.Frame(right_frame)
+    buttons_frame.pack(pady=10)
 
-open_file_button = ttk.Button(buttons_frame, text="Open .xlsx File", command=open_prospects_file)
-open_file_button.pack(side=tk.LEFT, padx=5)
+    open_file_button = ttk.Button(buttons_frame, text="Open .xlsx File", command=open_prospects_file)
+    open_file_button.pack(side=tk.LEFT, padx=5)
 
-open_history_button = ttk.Button(buttons_frame, text="Open History .txt", command=open_history_file)
-open_history_button.pack(side=tk.LEFT, padx=5)
+    open_history_button = ttk.Button(buttons_frame, text="Open History .csv", command=open_history_file)
+    open_history_button.pack(side=tk.LEFT, padx=5)
 
 
-# --- INITIALIZATION LOGIC ---
+    # --- INITIALIZATION LOGIC ---
 
-# Sprawdzenie i wymuszenie wprowadzenia kluczy API, jeśli są nieobecne
-check_and_require_api_keys()
+    # Okno pokazuje się od razu; klucze, licznik, historia i kolejka wczytywane po jego narysowaniu
+    update_timer()
+    drain_ui_events()
+    root.after_idle(finish_startup)
+    root.mainloop()
 
-# Wczytanie historii i uruchomienie timera
-history_text.config(state=tk.NORMAL)
-load_search_history()
-history_text.config(state=tk.DISABLED)
 
-update_timer_and_counter()
-root.mainloop()
\ No newline at end of file
+if __name__ == "__main__":
+    main()